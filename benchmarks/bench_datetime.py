@@ -0,0 +1,53 @@
+"""Compare the fixed format datetime codec with the former strptime/strftime
+based implementation.
+
+Usage::
+
+    $ python benchmarks/bench_datetime.py [iterations]
+"""
+from __future__ import absolute_import, print_function
+
+import sys
+import timeit
+from datetime import datetime
+
+from dynamodb2_mapper.dates import utc_tz, parse_datetime, format_datetime
+
+
+VALUE = datetime(2012, 5, 31, 12, 0, 0, 42, tzinfo=utc_tz)
+STRING = "2012-05-31T12:00:00.000042+00:00"
+
+
+def strptime_parse(value):
+    if value.endswith('Z'):
+        value = value[:-1] + '+00:00'
+    return datetime.strptime(
+        value, "%Y-%m-%dT%H:%M:%S.%f+00:00").replace(tzinfo=utc_tz)
+
+
+def strftime_format(value):
+    s = value.astimezone(utc_tz).strftime("%Y-%m-%dT%H:%M:%S.%f%z")
+    return s[:-2] + ':' + s[-2:]
+
+
+def bench(label, fn, arg, iterations):
+    seconds = min(timeit.repeat(lambda: fn(arg), number=iterations, repeat=3))
+    print("%-20s %8.3f us/call" % (label, seconds / iterations * 1e6))
+    return seconds
+
+
+def main(iterations=100000):
+    assert strptime_parse(STRING) == parse_datetime(STRING)
+    assert strftime_format(VALUE) == format_datetime(VALUE)
+
+    old = bench("strptime parse", strptime_parse, STRING, iterations)
+    new = bench("fixed parse", parse_datetime, STRING, iterations)
+    print("%-20s %8.1fx" % ("parse speedup", old / new))
+
+    old = bench("strftime format", strftime_format, VALUE, iterations)
+    new = bench("fixed format", format_datetime, VALUE, iterations)
+    print("%-20s %8.1fx" % ("format speedup", old / new))
+
+
+if __name__ == "__main__":
+    main(*[int(arg) for arg in sys.argv[1:]])
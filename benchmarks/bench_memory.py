@@ -0,0 +1,73 @@
+"""Compare the memory used by rows loaded as regular model instances and as
+compact records (``compact=True``, see ``DynamoDBModel.compact_class``).
+
+Rows are built from in-memory raw items, no DynamoDB access is needed. The
+reported figure is the per row overhead of the containers (instance,
+``__dict__``, raw snapshot dict or tuple). Attribute values themselves are
+shared by both layouts and excluded.
+
+Usage::
+
+    $ python benchmarks/bench_memory.py [rows]
+"""
+from __future__ import absolute_import, print_function
+
+import sys
+
+from dynamodb2_mapper.model import DynamoDBModel
+
+
+class LeaderboardEntry(DynamoDBModel):
+    __table__ = "leaderboard"
+    __hash_key__ = "board"
+    __range_key__ = "player"
+    __schema__ = {
+        "board": unicode,
+        "player": unicode,
+        "score": int,
+        "rank": int,
+        "country": unicode,
+        "level": int,
+    }
+
+
+def raw_item(i):
+    return {
+        u"board": u"weekly",
+        u"player": u"player-%d" % i,
+        u"score": i * 7,
+        u"rank": i,
+        u"country": u"FR",
+        u"level": i % 50,
+    }
+
+
+def model_overhead(row):
+    return (sys.getsizeof(row)
+            + sys.getsizeof(row.__dict__)
+            + sys.getsizeof(row._raw_data))
+
+
+def compact_overhead(row):
+    return sys.getsizeof(row) + sys.getsizeof(row._raw_values)
+
+
+def main(rows=100000):
+    items = [raw_item(i) for i in xrange(rows)]
+
+    models = [LeaderboardEntry._from_db_dict(item) for item in items]
+    model_bytes = sum(model_overhead(row) for row in models)
+    del models
+
+    compact_from_db_dict = LeaderboardEntry.compact_class()._from_db_dict
+    records = [compact_from_db_dict(item) for item in items]
+    compact_bytes = sum(compact_overhead(row) for row in records)
+    del records
+
+    print("%-16s %8.1f bytes/row" % ("model", float(model_bytes) / rows))
+    print("%-16s %8.1f bytes/row" % ("compact", float(compact_bytes) / rows))
+    print("%-16s %8.1f bytes/row" % ("saved", float(model_bytes - compact_bytes) / rows))
+
+
+if __name__ == "__main__":
+    main(*[int(arg) for arg in sys.argv[1:]])
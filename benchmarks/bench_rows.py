@@ -0,0 +1,71 @@
+"""Compare the time spent building the rows returned by read methods: model
+instances, compact records (``compact=True``), decoded dicts
+(``as_dict=True``) and stored values (``as_dict=True, raw=True``).
+
+Rows are built from in-memory raw items, no DynamoDB access is needed. The
+reported figure is the per row cost of the row factory used by ``query``,
+``scan`` and ``get_batch``.
+
+Usage::
+
+    $ python benchmarks/bench_rows.py [rows]
+"""
+from __future__ import absolute_import, print_function
+
+import sys
+import timeit
+from datetime import datetime
+
+from dynamodb2_mapper.model import DynamoDBModel
+
+
+class FeedEntry(DynamoDBModel):
+    __table__ = "feed"
+    __hash_key__ = "user_id"
+    __range_key__ = "posted_at"
+    __schema__ = {
+        "user_id": int,
+        "posted_at": datetime,
+        "author": unicode,
+        "text": unicode,
+        "likes": int,
+        "tags": set,
+        "attachments": list,
+    }
+    __defaults__ = {
+        "tags": set,
+        "attachments": list,
+    }
+
+
+def raw_item(i):
+    return {
+        u"user_id": 42,
+        u"posted_at": u"2012-05-31T12:00:%02d.000000+00:00" % (i % 60),
+        u"author": u"author-%d" % (i % 100),
+        u"text": u"Lorem ipsum dolor sit amet " * 4,
+        u"likes": i * 3,
+        u"tags": set([u"doom", u"e1m%d" % (i % 9)]),
+        u"attachments": u'[{"type": "image", "url": "http://example.com/%d.png"}]' % i,
+    }
+
+
+def bench(label, factory, items):
+    seconds = min(timeit.repeat(lambda: [factory(item) for item in items], number=1, repeat=3))
+    print("%-16s %8.3f us/row" % (label, seconds / len(items) * 1e6))
+    return seconds
+
+
+def main(rows=20000):
+    items = [raw_item(i) for i in xrange(rows)]
+
+    model = bench("model", FeedEntry._get_row_factory(), items)
+    bench("compact", FeedEntry._get_row_factory(compact=True), items)
+    as_dict = bench("as_dict", FeedEntry._get_row_factory(as_dict=True), items)
+    raw = bench("as_dict raw", FeedEntry._get_row_factory(as_dict=True, raw=True), items)
+    print("%-16s %8.1fx" % ("as_dict speedup", model / as_dict))
+    print("%-16s %8.1fx" % ("raw speedup", model / raw))
+
+
+if __name__ == "__main__":
+    main(*[int(arg) for arg in sys.argv[1:]])
@@ -0,0 +1,223 @@
+"""Low level helpers for the batch operations of
+:py:class:`~dynamodb2_mapper.model.DynamoDBModel`.
+
+DynamoDB batch requests are bounded (100 keys per ``BatchGetItem``, 25 items
+per ``BatchWriteItem``) and may only be partially processed when the table is
+throttled. These helpers split
+the requests in chunks, send the chunks concurrently on a bounded thread pool
+and re-send unprocessed keys with an exponential backoff.
+
+Keys and items handled here are plain DynamoDB values (as stored), models
+take care of the conversion from and to Python objects.
+"""
+from __future__ import absolute_import
+
+import logging
+import random
+import time
+from collections import deque
+from itertools import islice
+from multiprocessing.pool import ThreadPool
+from Queue import Queue
+
+from boto.dynamodb.types import Dynamizer
+
+from dynamodb2_mapper.exceptions import MaxRetriesExceededError
+
+
+log = logging.getLogger(__name__)
+
+#: Maximum number of keys in a ``BatchGetItem`` request
+MAX_BATCH_GET = 100
+
+#: Maximum number of puts and deletes in a ``BatchWriteItem`` request
+MAX_BATCH_WRITE = 25
+
+#: Default number of concurrent requests
+DEFAULT_MAX_WORKERS = 4
+
+#: Maximum number of attempts to get all the keys of a chunk processed
+MAX_BATCH_RETRIES = 10
+
+#: First backoff delay, in seconds. It doubles on each retry.
+BACKOFF_BASE = 0.05
+
+#: Longest backoff delay, in seconds
+BACKOFF_MAX = 5
+
+# Stateless, shared by all threads
+_dynamizer = Dynamizer()
+
+
+def chunks(iterable, size):
+    """Yield lists of ``size`` items (the last one may be shorter) from
+    ``iterable``, lazily.
+    """
+    iterator = iter(iterable)
+    while True:
+        chunk = list(islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def backoff(attempt):
+    """Sleep before retry number ``attempt`` (starting at 0). Delays grow
+    exponentially, up to :py:data:`BACKOFF_MAX`, with full jitter so that
+    concurrent workers do not retry in lockstep.
+    """
+    delay = min(BACKOFF_MAX, BACKOFF_BASE * 2 ** attempt)
+    time.sleep(random.uniform(0, delay))
+
+
+def decode_item(raw_item):
+    """Convert a low level item (``{"name": {"S": "value"}}``) to a dict of
+    DynamoDB values, as returned by the high level ``boto`` API.
+    """
+    decode = _dynamizer.decode
+    return {name: decode(value) for (name, value) in raw_item.iteritems()}
+
+
+def batch_get_chunk(connection, table_name, keys, consistent_read=False, ordered=False,
+                    attributes=None):
+    """Get the items of ``keys`` with one ``BatchGetItem`` request, then as
+    many as needed to get the unprocessed keys. Missing items are skipped.
+
+    :param connection: low level DynamoDB connection
+    :param table_name: name of the table
+    :param keys: at most :py:data:`MAX_BATCH_GET` ``{name: value}`` keys
+    :param consistent_read: use strongly consistent reads
+    :param ordered: return the items in ``keys`` order rather than in
+        DynamoDB's order
+    :param attributes: only get these attributes. They must include the keys.
+
+    :return: list of items, as dicts of DynamoDB values
+
+    :raises MaxRetriesExceededError: when some keys are still unprocessed
+        after :py:data:`MAX_BATCH_RETRIES` attempts
+    """
+    encode = _dynamizer.encode
+    raw_keys = [{name: encode(value) for (name, value) in key.iteritems()}
+                for key in keys]
+    request = {"Keys": raw_keys}
+    if consistent_read:
+        request["ConsistentRead"] = True
+    if attributes is not None:
+        request["AttributesToGet"] = attributes
+
+    raw_items = []
+    for attempt in xrange(MAX_BATCH_RETRIES):
+        if attempt:
+            backoff(attempt - 1)
+        response = connection.batch_get_item(request_items={table_name: request})
+        raw_items.extend(response["Responses"].get(table_name, []))
+
+        unprocessed = response.get("UnprocessedKeys", {}).get(table_name)
+        if not unprocessed or not unprocessed.get("Keys"):
+            items = [decode_item(raw_item) for raw_item in raw_items]
+            if ordered and items:
+                # match decoded values: DynamoDB normalizes numbers, "1.50"
+                # comes back as "1.5"
+                key_names = sorted(raw_keys[0])
+                positions = {}
+                for (position, raw_key) in enumerate(raw_keys):
+                    key = decode_item(raw_key)
+                    positions[tuple(key[name] for name in key_names)] = position
+                items.sort(key=lambda item: positions[tuple(item[name] for name in key_names)])
+            return items
+        log.debug("%d unprocessed keys on table %s", len(unprocessed["Keys"]), table_name)
+        request = unprocessed
+
+    raise MaxRetriesExceededError(
+        "{} keys still unprocessed on table {} after {} attempts".format(
+            len(request["Keys"]), table_name, MAX_BATCH_RETRIES))
+
+
+def batch_write_chunk(connection, table_name, items=(), keys=()):
+    """Put ``items`` and delete the items of ``keys`` with one
+    ``BatchWriteItem`` request, then as many as needed to get the unprocessed
+    writes done. Writes are unconditional.
+
+    :param connection: low level DynamoDB connection
+    :param table_name: name of the table
+    :param items: ``{name: value}`` items to put. ``None`` values are skipped.
+    :param keys: ``{name: value}`` keys of the items to delete. There are at
+        most :py:data:`MAX_BATCH_WRITE` items and keys in total, all of
+        distinct keys.
+
+    :raises MaxRetriesExceededError: when some writes are still unprocessed
+        after :py:data:`MAX_BATCH_RETRIES` attempts
+    """
+    encode = _dynamizer.encode
+    requests = [
+        {"PutRequest": {"Item": {name: encode(value) for (name, value) in item.iteritems()
+                                 if value is not None}}}
+        for item in items]
+    requests.extend(
+        {"DeleteRequest": {"Key": {name: encode(value) for (name, value) in key.iteritems()}}}
+        for key in keys)
+
+    for attempt in xrange(MAX_BATCH_RETRIES):
+        if attempt:
+            backoff(attempt - 1)
+        response = connection.batch_write_item(request_items={table_name: requests})
+
+        unprocessed = response.get("UnprocessedItems", {}).get(table_name)
+        if not unprocessed:
+            return
+        log.debug("%d unprocessed writes on table %s", len(unprocessed), table_name)
+        requests = unprocessed
+
+    raise MaxRetriesExceededError(
+        "{} writes still unprocessed on table {} after {} attempts".format(
+            len(requests), table_name, MAX_BATCH_RETRIES))
+
+
+def imap(function, iterable, max_workers=DEFAULT_MAX_WORKERS, ordered=True):
+    """Yield ``function(item)`` for each item of ``iterable``, computed by up
+    to ``max_workers`` threads. Results are yielded as soon as they are ready:
+    in ``iterable`` order if ``ordered``, as they complete otherwise.
+
+    ``iterable`` is consumed lazily: at most ``2 * max_workers`` items are
+    being processed or waiting to be yielded at any time. Closing the generator
+    drops the items still in progress.
+
+    With ``max_workers=1``, everything runs in the calling thread.
+
+    The first exception raised by ``function`` is raised again here, when its
+    result would have been yielded.
+    """
+    if max_workers <= 1:
+        for item in iterable:
+            yield function(item)
+        return
+
+    pool = ThreadPool(max_workers)
+    max_pending = 2 * max_workers
+    try:
+        if ordered:
+            pending = deque()
+            for item in iterable:
+                pending.append(pool.apply_async(function, (item,)))
+                if len(pending) >= max_pending:
+                    yield pending.popleft().get()
+            while pending:
+                yield pending.popleft().get()
+        else:
+            # workers push the number of the task they are done with
+            done = Queue()
+            def run(number, item):
+                try:
+                    return function(item)
+                finally:
+                    done.put(number)
+
+            pending = {}
+            for (number, item) in enumerate(iterable):
+                pending[number] = pool.apply_async(run, (number, item))
+                if len(pending) >= max_pending:
+                    yield pending.pop(done.get()).get()
+            while pending:
+                yield pending.pop(done.get()).get()
+    finally:
+        pool.terminate()
@@ -0,0 +1,135 @@
+"""Columnar reads: pages of items copied straight into NumPy arrays, one per
+attribute, without building model instances.
+
+Column types are derived from the model's ``__schema__``:
+
+  - ``int`` and ``long`` attributes go to ``int64`` columns, missing values
+    are ``0`` as when loading objects;
+  - ``float`` attributes go to ``float64`` columns, missing values are ``NaN``;
+  - ``bool`` attributes go to ``bool`` columns, missing values are ``False``;
+  - ``datetime`` attributes go to ``datetime64[us]`` columns, in UTC, missing
+    values are ``NaT``;
+  - anything else goes to ``object`` columns holding the values as decoded
+    for objects.
+
+Each column is a :py:class:`ColumnBuffer` growing by doubling its capacity, so
+that only the rows of the current page live as Python objects.
+
+NumPy is optional: it is only needed by the functions of this module.
+"""
+from __future__ import absolute_import
+
+from datetime import datetime
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+
+#: Capacity of new column buffers, in rows
+INITIAL_CAPACITY = 1024
+
+
+def _check_numpy():
+    if numpy is None:
+        raise ImportError("NumPy is required for columnar reads")
+
+
+def _utc_naive(value):
+    # numpy.datetime64 has no timezone, store UTC
+    return value.replace(tzinfo=None) - value.utcoffset()
+
+
+def _compile_column(schema_entry, decode):
+    """Return the ``(dtype, convert)`` of a column of ``schema_entry``
+    attributes, where ``convert(value)`` takes a DynamoDB value, ``None`` when
+    missing.
+
+    :param decode: decoder of the attribute, see
+        :py:func:`~dynamodb2_mapper.model._compile_decoder`
+    """
+    if schema_entry is bool:
+        return "bool", lambda value: value is not None and decode(value)
+    if schema_entry is float:
+        return "float64", lambda value: float(value) if value is not None else numpy.nan
+    if schema_entry is datetime:
+        nat = numpy.datetime64("NaT")
+        def convert(value):
+            if value is None:
+                return nat
+            return _utc_naive(decode(value))
+        return "datetime64[us]", convert
+    if isinstance(schema_entry, type) and issubclass(schema_entry, (int, long)):
+        return "int64", lambda value: int(value) if value is not None else 0
+    return object, decode
+
+
+class ColumnBuffer(object):
+    """Growable typed array.
+
+    :param dtype: NumPy dtype of the values
+    :param capacity: initial capacity, in rows
+    """
+    def __init__(self, dtype, capacity=INITIAL_CAPACITY):
+        _check_numpy()
+        self.dtype = numpy.dtype(dtype)
+        self._data = numpy.empty(capacity, self.dtype)
+        self._size = 0
+
+    def extend(self, values):
+        """Append ``values``, a list of values of the buffer's type."""
+        size = self._size + len(values)
+        if size > len(self._data):
+            capacity = max(size, 2 * len(self._data))
+            data = numpy.empty(capacity, self.dtype)
+            data[:self._size] = self._data[:self._size]
+            self._data = data
+        if self.dtype == object:
+            # do not let numpy turn sequence values into dimensions
+            for (i, value) in enumerate(values, self._size):
+                self._data[i] = value
+        else:
+            self._data[self._size:size] = values
+        self._size = size
+
+    def __len__(self):
+        return self._size
+
+    def to_array(self):
+        """Return the values as an array of the exact size. The buffer must
+        not be used anymore.
+        """
+        data = self._data
+        self._data = None
+        if len(data) != self._size:
+            data = data[:self._size].copy()
+        return data
+
+
+def read_columns(pages, schema, decoders, fields, skip=None):
+    """Copy the items of ``pages`` into one array per attribute.
+
+    :param pages: iterable of lists of items, as dicts of DynamoDB values
+    :param schema: ``__schema__`` of the model
+    :param decoders: decoders of the model, by attribute name
+    :param fields: names of the attributes to read, all in ``schema``
+    :param skip: optional ``skip(item)`` predicate of the items to leave out
+
+    :return: ``{field: numpy.ndarray}`` dict, all arrays of the same length
+
+    :raises ImportError: when NumPy is not installed
+    """
+    _check_numpy()
+    columns = []
+    for name in fields:
+        dtype, convert = _compile_column(schema[name], decoders[name])
+        columns.append((name, convert, ColumnBuffer(dtype)))
+
+    for items in pages:
+        if skip is not None:
+            items = [item for item in items if not skip(item)]
+        for (name, convert, buffer_) in columns:
+            buffer_.extend([convert(item.get(name)) for item in items])
+
+    return {name: buffer_.to_array() for (name, _, buffer_) in columns}
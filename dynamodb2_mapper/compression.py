@@ -0,0 +1,191 @@
+"""Transparent compression of large string attributes.
+
+Wrap a schema type in :py:class:`Compressed` to store it as a compressed
+DynamoDB ``BINARY`` attribute::
+
+    class Report(DynamoDBModel):
+        __table__ = "report"
+        __hash_key__ = "id"
+        __schema__ = {
+            "id": int,
+            "body": Compressed(dict),
+            "summary": Compressed(unicode, codec="bz2", threshold=4096),
+        }
+
+Read and write capacity is billed per KB, so shrinking big text or JSON
+attributes saves capacity as well as storage. The value is first serialized as
+usual (JSON for list/dict, UTF-8 for text). It is then compressed when it
+reaches the attribute's ``threshold`` and prefixed with a one byte marker
+naming the codec. Values under the threshold, or which do not shrink, are
+stored uncompressed behind a marker as well. Readers therefore do not need to
+know which codec wrote a value.
+
+Values stored before an attribute was wrapped in :py:class:`Compressed`
+(plain strings) are still read. They are compressed on next save.
+
+Use :py:meth:`~.DynamoDBModel.size_report` to see what compression saves on an
+item.
+"""
+from __future__ import absolute_import
+
+import zlib
+import bz2
+from decimal import Decimal
+
+from boto.dynamodb.types import Binary
+from onctuous import Schema
+
+try:
+    import lzma
+except ImportError:
+    try:
+        from backports import lzma
+    except ImportError:
+        lzma = None
+
+from dynamodb2_mapper.types import (BINARY, BINARY_SET, BOOLEAN, LIST, MAP,
+                                    NULL, NUMBER, NUMBER_SET, STRING, STRING_SET)
+
+
+# Marker of values stored as is
+_RAW = b"\x00"
+
+#: ``{name: (marker, compress(data, level), decompress(data))}`` of the
+#: available codecs. Markers are stored in front of each value and must never
+#: change.
+CODECS = {
+    "zlib": (b"\x01", zlib.compress, zlib.decompress),
+    "bz2": (b"\x02", bz2.compress, bz2.decompress),
+}
+if lzma is not None:
+    CODECS["lzma"] = (
+        b"\x03",
+        lambda data, level: lzma.compress(data, preset=level),
+        lzma.decompress,
+    )
+
+_decompressors = {marker: decompress for (marker, _, decompress) in CODECS.itervalues()}
+
+
+class Compressed(object):
+    """Schema entry storing a ``type_`` attribute as a compressed binary.
+
+    :param type_: type or validator of the value: ``unicode``, ``str``,
+        ``list``, ``dict`` or a list/dict validator.
+    :param codec: one of :py:data:`CODECS` names
+    :param threshold: size, in bytes, of the serialized value from which it is
+        compressed. Compressing small values costs CPU for no gain.
+    :param level: compression level passed to the codec
+
+    :raises ValueError: when ``codec`` is unknown or not installed
+    """
+    def __init__(self, type_=unicode, codec="zlib", threshold=1024, level=6):
+        if codec not in CODECS:
+            raise ValueError("Compression codec {} is unknown or not installed".format(codec))
+        self.type = type_
+        self.codec = codec
+        self.threshold = threshold
+        self.level = level
+        self._marker, self._compress, _ = CODECS[codec]
+        self._validate = Schema(type_)
+
+    def __call__(self, value):
+        # used as a validator: validate as the wrapped type
+        return self._validate(value)
+
+    def compress(self, data):
+        """Return the ``Binary`` to store for ``data``, a serialized
+        (``unicode`` or ``str``) value.
+        """
+        if isinstance(data, unicode):
+            data = data.encode("utf-8")
+        if len(data) >= self.threshold:
+            compressed = self._compress(data, self.level)
+            if len(compressed) + 1 < len(data):
+                return Binary(self._marker + compressed)
+        return Binary(_RAW + data)
+
+    def decompress(self, value):
+        """Return the serialized value stored in the ``Binary`` ``value``. It
+        is a ``str`` if the wrapped type is ``str``, ``unicode`` otherwise.
+
+        :raises ValueError: when the value was written by an unknown codec
+        """
+        data = value.value
+        marker = data[:1]
+        if marker == _RAW:
+            data = data[1:]
+        else:
+            try:
+                data = _decompressors[marker](data[1:])
+            except KeyError:
+                raise ValueError("Unknown compression marker {!r}".format(marker))
+        if self.type is str:
+            return data
+        return data.decode("utf-8")
+
+    def __repr__(self):
+        return "Compressed({!r}, codec={!r}, threshold={!r})".format(
+            self.type, self.codec, self.threshold)
+
+
+def get_attribute_type(value):
+    """Return the DynamoDB type (see :py:mod:`~dynamodb2_mapper.types`) of a
+    value serialized by the mapper.
+    """
+    if value is None:
+        return NULL
+    if isinstance(value, bool):
+        return BOOLEAN
+    if isinstance(value, (int, long, float, Decimal)):
+        return NUMBER
+    if isinstance(value, Binary):
+        return BINARY
+    if isinstance(value, basestring):
+        return STRING
+    if isinstance(value, (set, frozenset)):
+        if all(isinstance(item, basestring) for item in value):
+            return STRING_SET
+        if all(isinstance(item, Binary) for item in value):
+            return BINARY_SET
+        return NUMBER_SET
+    if isinstance(value, (list, tuple)):
+        return LIST
+    if isinstance(value, dict):
+        return MAP
+    raise TypeError("Unsupported DynamoDB value {!r}".format(value))
+
+
+def _get_number_size(value):
+    # 1 byte per 2 significant digits, plus 1 byte
+    digits = str(abs(Decimal(str(value)))).replace(".", "").strip("0")
+    return (len(digits) + 1) // 2 + 1
+
+
+def _get_string_size(value):
+    if isinstance(value, unicode):
+        return len(value.encode("utf-8"))
+    return len(value)
+
+
+def get_attribute_size(value):
+    """Return the size, in bytes, DynamoDB accounts for a serialized value
+    (attribute name excluded). Number sizes are approximations, as documented
+    by AWS.
+    """
+    attribute_type = get_attribute_type(value)
+    if attribute_type == STRING:
+        return _get_string_size(value)
+    if attribute_type == BINARY:
+        return len(value.value)
+    if attribute_type == NUMBER:
+        return _get_number_size(value)
+    if attribute_type in (NULL, BOOLEAN):
+        return 1
+    if attribute_type in (STRING_SET, NUMBER_SET, BINARY_SET):
+        return sum(get_attribute_size(item) for item in value)
+    if attribute_type == LIST:
+        return 3 + sum(1 + get_attribute_size(item) for item in value)
+    # MAP
+    return 3 + sum(1 + _get_string_size(key) + get_attribute_size(item)
+                   for (key, item) in value.iteritems())
@@ -0,0 +1,134 @@
+"""Fixed format datetime codec.
+
+Datetimes are stored in DynamoDB as W3CDTF strings with microseconds
+(``2012-05-31T12:00:00.000042+00:00``). They are parsed and generated by
+slicing instead of going through ``strptime`` and ``strftime`` which are slow
+and do not support timezone offsets in Python 2.
+"""
+from __future__ import absolute_import
+
+from datetime import datetime, timedelta, tzinfo
+
+
+class UTC(tzinfo):
+    """UTC timezone"""
+    def utcoffset(self, dt):
+        return timedelta(0)
+
+    def tzname(self, dt):
+        return "UTC"
+
+    def dst(self, dt):
+        return timedelta(0)
+
+
+utc_tz = UTC()
+
+
+class FixedOffset(tzinfo):
+    """Fixed offset timezone, as found in a ``+HH:MM`` suffix. Use
+    :py:func:`get_fixed_offset` to get shared instances.
+    """
+    def __init__(self, minutes):
+        self._minutes = minutes
+        self._offset = timedelta(minutes=minutes)
+        sign = "-" if minutes < 0 else "+"
+        self._name = "%s%02d:%02d" % (sign, abs(minutes) // 60, abs(minutes) % 60)
+
+    def utcoffset(self, dt):
+        return self._offset
+
+    def tzname(self, dt):
+        return self._name
+
+    def dst(self, dt):
+        return timedelta(0)
+
+    def __repr__(self):
+        return "FixedOffset(%r)" % self._name
+
+    def __reduce__(self):
+        # datetimes are pickled to be sent to worker processes. Unpickle to
+        # the shared instance.
+        return (get_fixed_offset, (self._minutes,))
+
+
+_fixed_offsets = {0: utc_tz}
+
+def get_fixed_offset(minutes):
+    """Return a shared timezone instance for an offset of ``minutes`` to UTC.
+    ``utc_tz`` is returned for a null offset.
+    """
+    tz = _fixed_offsets.get(minutes)
+    if tz is None:
+        tz = _fixed_offsets[minutes] = FixedOffset(minutes)
+    return tz
+
+
+def parse_datetime(value):
+    """Parse a ``YYYY-MM-DDTHH:MM:SS[.ffffff]`` string followed by either ``Z``
+    or a ``+HH:MM``/``-HH:MM`` offset. The fraction is optional and may have 1
+    to 6 digits, like what other DynamoDB clients write.
+
+    The offset is preserved in the returned datetime's ``tzinfo``. Use
+    ``astimezone`` if you need to normalize it.
+
+    :param value: string to parse
+
+    :return: timezone aware datetime
+
+    :raises ValueError: when ``value`` does not match the format. Timezone is
+        mandatory.
+    """
+    try:
+        if (value[4] != '-' or value[7] != '-' or value[10] != 'T'
+                or value[13] != ':' or value[16] != ':'):
+            raise ValueError()
+
+        # optional fraction, padded to microseconds
+        end = 19
+        microsecond = 0
+        if value[19:20] == '.':
+            end = 20
+            while value[end:end + 1].isdigit():
+                end += 1
+            digits = end - 20
+            if not 1 <= digits <= 6:
+                raise ValueError()
+            microsecond = int(value[20:end]) * 10 ** (6 - digits)
+
+        suffix = value[end:]
+        if suffix == 'Z':
+            tz = utc_tz
+        elif len(suffix) == 6 and suffix[3] == ':' and suffix[0] in '+-':
+            minutes = int(suffix[1:3]) * 60 + int(suffix[4:6])
+            tz = get_fixed_offset(-minutes if suffix[0] == '-' else minutes)
+        else:
+            raise ValueError()
+
+        return datetime(
+            int(value[0:4]), int(value[5:7]), int(value[8:10]),
+            int(value[11:13]), int(value[14:16]), int(value[17:19]),
+            microsecond, tz)
+    except (ValueError, TypeError, IndexError):
+        raise ValueError(
+            "Invalid datetime {!r}, expected 'YYYY-MM-DDTHH:MM:SS.ffffff+HH:MM'".format(value))
+
+
+def format_datetime(value):
+    """Format a timezone aware datetime as a UTC
+    ``YYYY-MM-DDTHH:MM:SS.ffffff+00:00`` string. Storing UTC only keeps the
+    strings sortable.
+
+    :param value: timezone aware datetime
+
+    :raises ValueError: when ``value`` has no timezone.
+    """
+    tz = value.tzinfo
+    if tz is not utc_tz:
+        if tz is None:
+            raise ValueError("naive datetime {!r} can not be stored".format(value))
+        value = value.astimezone(utc_tz)
+    return "%04d-%02d-%02dT%02d:%02d:%02d.%06d+00:00" % (
+        value.year, value.month, value.day,
+        value.hour, value.minute, value.second, value.microsecond)
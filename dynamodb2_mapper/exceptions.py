@@ -35,4 +35,8 @@ class InvalidRegionError(Exception):
     """
 
 
-
+class ProjectionError(Exception):
+    """Raised when an object loaded with an ``attributes`` projection would be
+    saved in a way overwriting the attributes which were not loaded (see
+    :meth:`DynamoDBModel.save`).
+    """
@@ -0,0 +1,263 @@
+"""Bulk export of a model's table to JSON Lines or CSV files.
+
+:py:func:`export_table` scans the table page after page, optionally in
+parallel segments, and appends the rows to one file per segment. Only a few
+pages are held in memory at any time. Values are converted as by
+:py:meth:`~.DynamoDBModel.to_json_dict`: sets are sorted lists, datetimes UTC
+ISO 8601 strings.
+
+With a ``checkpoint`` file, the position of each segment (its scan cursor and
+the size of its file) is saved every few pages, once the rows it covers are
+flushed to disk. Running the same export again after it was killed truncates
+the files back to the last checkpoint and resumes the scan from there::
+
+    export_table(Player, "players.jsonl.gz", compress=True, segments=4,
+                 checkpoint="players.checkpoint")
+
+Compressed files are written as a sequence of gzip members, one per
+checkpoint interval, which ``gzip`` and ``zcat`` read as a single stream.
+
+The checkpoint file is removed once the export is complete.
+"""
+from __future__ import absolute_import
+
+import csv
+import gzip
+import json
+import os
+from cStringIO import StringIO
+
+from dynamodb2_mapper.model import _to_json_value
+from dynamodb2_mapper.pages import parallel_pages, _get_scan_filter
+
+
+#: Supported output formats
+FORMATS = ("jsonl", "csv")
+
+#: Default number of pages of a segment between two checkpoints
+DEFAULT_CHECKPOINT_EVERY = 10
+
+
+def segment_path(path, segment, total_segments):
+    """Return the path of the file of ``segment``: ``path`` itself for
+    unsegmented exports, otherwise ``path`` with the segment number inserted
+    before the extensions (``players-0003.jsonl.gz``).
+    """
+    if total_segments is None:
+        return path
+    directory, name = os.path.split(path)
+    root, dot, extensions = name.partition(".")
+    return os.path.join(directory, "{}-{:04d}{}{}".format(root, segment, dot, extensions))
+
+
+def _to_csv_value(value, dumps):
+    if value is None:
+        return ""
+    if isinstance(value, unicode):
+        return value.encode("utf-8")
+    if isinstance(value, (list, dict)):
+        return dumps(value, True).encode("utf-8")
+    if isinstance(value, float):
+        return repr(value)
+    return str(value)
+
+
+class _SegmentWriter(object):
+    """Output file of a segment, truncated to ``offset`` when resuming."""
+    def __init__(self, path, format, compress, columns, dumps, offset=0):
+        self.path = path
+        self.format = format
+        self.compress = compress
+        self.columns = columns
+        self.dumps = dumps
+        if offset:
+            self._file = open(path, "r+b")
+            self._file.truncate(offset)
+            self._file.seek(offset)
+        else:
+            self._file = open(path, "wb")
+        self._member = None
+        if format == "csv" and not offset:
+            self._write(self._format_csv([columns]))
+
+    def _format_csv(self, rows):
+        data = StringIO()
+        writer = csv.writer(data)
+        for row in rows:
+            writer.writerow(row)
+        return data.getvalue()
+
+    def _write(self, data):
+        if not self.compress:
+            self._file.write(data)
+            return
+        if self._member is None:
+            self._member = gzip.GzipFile(fileobj=self._file, mode="wb")
+        self._member.write(data)
+
+    def write_rows(self, rows):
+        """Append ``rows``, dicts of JSON friendly values."""
+        if not rows:
+            return
+        dumps = self.dumps
+        if self.format == "jsonl":
+            lines = [dumps(row, True) for row in rows]
+            data = u"\n".join(lines).encode("utf-8") + "\n"
+        else:
+            data = self._format_csv(
+                [[_to_csv_value(row.get(name), dumps) for name in self.columns]
+                 for row in rows])
+        self._write(data)
+
+    def flush(self):
+        """Flush the rows written so far to disk and return the size of the
+        file.
+        """
+        if self._member is not None:
+            # ends the gzip member, not the file
+            self._member.close()
+            self._member = None
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        return self._file.tell()
+
+    def close(self):
+        self.flush()
+        self._file.close()
+
+
+def _read_checkpoint(checkpoint, header):
+    """Return the segment states saved in ``checkpoint``, ``None`` when there
+    is no checkpoint to resume from.
+
+    :raises ValueError: when the checkpoint belongs to another export
+    """
+    if checkpoint is None or not os.path.exists(checkpoint):
+        return None
+    with open(checkpoint, "rb") as f:
+        saved = json.load(f)
+    for (name, value) in header.iteritems():
+        if saved.get(name) != value:
+            raise ValueError("Checkpoint {} was saved with {}={!r}, not {!r}".format(
+                checkpoint, name, saved.get(name), value))
+    return saved["segments"]
+
+
+def _write_checkpoint(checkpoint, header, states):
+    # write then rename, so that a killed export leaves the previous checkpoint
+    data = dict(header, segments=states)
+    path = checkpoint + ".tmp"
+    with open(path, "wb") as f:
+        json.dump(data, f, sort_keys=True)
+        f.flush()
+        os.fsync(f.fileno())
+    os.rename(path, checkpoint)
+
+
+def _export_segment(model, scan_filter, segment, total_segments, cursor, attributes):
+    """Yield the ``(segment, rows, cursor)`` of the pages of a segment, rows
+    being JSON friendly dicts. Runs in the workers of :py:func:`export_table`.
+    """
+    while True:
+        page = model.scan_page(
+            scan_filter, cursor=cursor, attributes=attributes, segment=segment,
+            total_segments=total_segments, as_dict=True)
+        rows = [{name: _to_json_value(value) for (name, value) in row.iteritems()}
+                for row in page]
+        cursor = page.cursor
+        yield segment, rows, cursor
+        if cursor is None:
+            return
+
+
+def export_table(model, path, format="jsonl", compress=False, checkpoint=None,
+                 checkpoint_every=DEFAULT_CHECKPOINT_EVERY, segments=None, max_workers=None,
+                 scan_filter=None, attributes=None, **filters):
+    """Scan the table of ``model`` into ``path``, see the module documentation.
+
+    :param model: :py:class:`~.DynamoDBModel` subclass to export
+    :param path: output file. With ``segments``, each segment gets its own
+        file, see :py:func:`segment_path`.
+    :param format: ``"jsonl"``, one JSON object per line, or ``"csv"``, with
+        a header line. CSV columns are the schema attributes (or
+        ``attributes`` and the keys), lists and dicts are JSON encoded.
+    :param compress: gzip the files
+    :param checkpoint: path of the checkpoint file, to resume a killed export.
+        An existing checkpoint of the same export is resumed.
+    :param checkpoint_every: number of pages of a segment between two
+        checkpoints
+    :param segments: split the scan in this many segments, scanned in
+        parallel by threads
+    :param max_workers: number of segments scanned at the same time.
+        Defaults to ``segments``.
+    :param scan_filter: ``{attribute_name: condition}`` dict, see
+        :py:meth:`~.DynamoDBModel.scan`
+    :param attributes: only export these attributes, and the keys
+    :param filters: keyword filters, see :py:meth:`~.DynamoDBModel.scan`
+
+    :return: number of exported rows, including those exported before the
+        checkpoint
+
+    :raises ValueError: on an unknown format, or a checkpoint of another
+        export
+    :raises QueryError: on invalid filters
+    """
+    if format not in FORMATS:
+        raise ValueError("Unknown export format {!r}, expected one of {}".format(
+            format, ", ".join(FORMATS)))
+    projection = model._get_projection(attributes)
+    scan_filter = model._get_filter(scan_filter, filters)
+    attributes = sorted(projection) if projection is not None else None
+    columns = attributes or sorted(model.__schema__)
+    json_engine = model._get_json_engine()
+
+    # resuming with other filters would mix rows of two exports
+    if scan_filter:
+        filter_key = json.dumps(_get_scan_filter(scan_filter), sort_keys=True)
+    else:
+        filter_key = None
+    header = {"table": model.__table__, "format": format, "compress": bool(compress),
+              "total_segments": segments, "attributes": attributes,
+              "scan_filter": filter_key}
+    states = _read_checkpoint(checkpoint, header)
+    if states is None:
+        states = [{"cursor": None, "offset": 0, "rows": 0, "done": False}
+                  for _ in xrange(segments or 1)]
+
+    writers = {}
+    tasks = []
+    for (segment, state) in enumerate(states):
+        if state["done"]:
+            continue
+        writers[segment] = _SegmentWriter(
+            segment_path(path, segment, segments), format, compress, columns,
+            json_engine.dumps, state["offset"])
+        tasks.append((model, scan_filter, segment if segments else None, segments,
+                      state["cursor"], attributes))
+
+    if segments:
+        pages = parallel_pages(_export_segment, tasks, max_workers or segments)
+    else:
+        pages = (page for task in tasks for page in _export_segment(*task))
+
+    rows = [state["rows"] for state in states]
+    page_counts = dict.fromkeys(writers, 0)
+    try:
+        for (segment, page_rows, cursor) in pages:
+            segment = segment or 0
+            writer = writers[segment]
+            writer.write_rows(page_rows)
+            rows[segment] += len(page_rows)
+            page_counts[segment] += 1
+            if cursor is None or page_counts[segment] % checkpoint_every == 0:
+                states[segment] = {"cursor": cursor, "offset": writer.flush(),
+                                   "rows": rows[segment], "done": cursor is None}
+                if checkpoint is not None:
+                    _write_checkpoint(checkpoint, header, states)
+    finally:
+        for writer in writers.itervalues():
+            writer.close()
+
+    if checkpoint is not None and os.path.exists(checkpoint):
+        os.remove(checkpoint)
+    return sum(rows)
@@ -0,0 +1,122 @@
+"""JSON engines used to (de-)serialize ``list`` and ``dict`` attributes.
+
+An engine is any object exposing:
+
+  - ``dumps(value, sort_keys)`` -> JSON string
+  - ``loads(string)`` -> Python object
+
+Engines are selected by name with :py:func:`get_json_engine`, either globally
+with :py:meth:`~.ConnectionBorg.set_json_engine` or per model with the
+``__json_engine__`` attribute.
+
+Engines do not all produce the same strings for the same value (separators,
+escaping). All of them read each other's output, but values stored in key
+attributes must be byte-for-byte stable so key attributes are always encoded
+with :py:data:`DEFAULT_ENGINE`.
+"""
+from __future__ import absolute_import
+
+import json
+
+try:
+    import simplejson
+except ImportError:
+    simplejson = None
+
+try:
+    import ujson
+except ImportError:
+    ujson = None
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+class JSONEngine(object):
+    """Wrap a ``json`` compatible module (``json``, ``simplejson``)."""
+    def __init__(self, name, module):
+        self.name = name
+        self._module = module
+        self.loads = module.loads
+
+    def dumps(self, value, sort_keys=True):
+        return self._module.dumps(value, sort_keys=sort_keys)
+
+    def __repr__(self):
+        return "<JSONEngine %s>" % self.name
+
+
+class UJSONEngine(JSONEngine):
+    """ujson engine. Falls back to ``fallback`` on values ujson can not
+    represent exactly (``Decimal``...).
+    """
+    def __init__(self, fallback):
+        super(UJSONEngine, self).__init__("ujson", ujson)
+        self._fallback = fallback
+
+    def dumps(self, value, sort_keys=True):
+        try:
+            return ujson.dumps(value, sort_keys=sort_keys, escape_forward_slashes=False)
+        except (TypeError, OverflowError):
+            return self._fallback.dumps(value, sort_keys)
+
+
+class ORJSONEngine(JSONEngine):
+    """orjson engine. Falls back to ``fallback`` on values orjson does not
+    support natively (``Decimal``, non string keys...).
+    """
+    def __init__(self, fallback):
+        super(ORJSONEngine, self).__init__("orjson", orjson)
+        self._fallback = fallback
+
+    def dumps(self, value, sort_keys=True):
+        try:
+            if sort_keys:
+                return orjson.dumps(value, option=orjson.OPT_SORT_KEYS).decode("utf-8")
+            return orjson.dumps(value).decode("utf-8")
+        except TypeError:
+            return self._fallback.dumps(value, sort_keys)
+
+
+STDLIB_ENGINE = JSONEngine("json", json)
+
+#: Engine used unless configured otherwise. This is also the only engine used
+#: for key attributes.
+DEFAULT_ENGINE = JSONEngine("simplejson", simplejson) if simplejson else STDLIB_ENGINE
+
+_engines = {
+    "json": STDLIB_ENGINE,
+    DEFAULT_ENGINE.name: DEFAULT_ENGINE,
+}
+if ujson is not None:
+    _engines["ujson"] = UJSONEngine(DEFAULT_ENGINE)
+if orjson is not None:
+    _engines["orjson"] = ORJSONEngine(DEFAULT_ENGINE)
+
+# Fastest first
+AUTO_PREFERENCE = ("orjson", "ujson", "simplejson", "json")
+
+
+def get_json_engine(engine):
+    """Resolve ``engine`` to a JSON engine instance.
+
+    :param engine: either an engine instance, ``None`` for
+        :py:data:`DEFAULT_ENGINE`, ``"auto"`` for the fastest available engine
+        or one of ``"orjson"``, ``"ujson"``, ``"simplejson"``, ``"json"``.
+
+    :raises ValueError: when the engine is unknown or not installed
+    """
+    if engine is None:
+        return DEFAULT_ENGINE
+    if not isinstance(engine, basestring):
+        return engine
+    if engine == "auto":
+        for name in AUTO_PREFERENCE:
+            if name in _engines:
+                return _engines[name]
+    try:
+        return _engines[engine]
+    except KeyError:
+        raise ValueError("JSON engine {} is unknown or not installed".format(engine))
@@ -0,0 +1,140 @@
+"""Coalescing of concurrent single key reads into batch reads.
+
+Threads calling :py:meth:`~.DynamoDBModel.get` on a model declaring
+``__batch_get_window__`` go through the model's :py:class:`BatchLoader`:
+
+  - a key already being loaded is not requested again, its callers all wait
+    for the same result (*singleflight*);
+  - distinct keys requested within ``window`` seconds of each other, up to
+    :py:data:`~.batch.MAX_BATCH_GET` of them, are sent in a single
+    ``BatchGetItem`` request (*micro-batching*).
+
+There is no background thread: the first caller of a batch waits for the
+window to close, sends the request and wakes the other callers up. A lone
+caller is thus delayed by ``window``, which must stay small compared to a
+request round trip.
+"""
+from __future__ import absolute_import
+
+import threading
+import time
+
+from dynamodb2_mapper.batch import MAX_BATCH_GET
+
+
+#: Default time, in seconds, during which keys are collected
+DEFAULT_WINDOW = 0.002
+
+
+class _Call(object):
+    """Result of a key, shared by all its callers"""
+    __slots__ = ("done", "value", "error")
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.value = None
+        self.error = None
+
+    def wait(self):
+        self.done.wait()
+        if self.error is not None:
+            raise self.error
+        return self.value
+
+
+class _Batch(object):
+    """Keys collected during a window"""
+    __slots__ = ("keys",)
+
+    def __init__(self, key):
+        self.keys = [key]
+
+
+class BatchLoader(object):
+    """Load values by key, coalescing the keys requested concurrently by
+    several threads into calls of ``fetch``.
+
+    :param fetch: ``fetch(keys)`` returning a ``{key: value}`` dict. Missing
+        keys are loaded as ``None``. Its exceptions are raised to the callers
+        of all the keys of the batch.
+    :param window: seconds during which keys are collected before calling
+        ``fetch``
+    :param max_batch: maximum number of keys per call of ``fetch``. A full
+        batch is sent without waiting for the end of the window.
+
+    :ivar loads: number of calls of :py:meth:`load`
+    :ivar coalesced: number of loads served by a load of the same key
+        already in flight
+    :ivar batches: number of calls of ``fetch``
+    """
+    def __init__(self, fetch, window=DEFAULT_WINDOW, max_batch=MAX_BATCH_GET):
+        self.fetch = fetch
+        self.window = window
+        self.max_batch = max_batch
+        self.loads = 0
+        self.coalesced = 0
+        self.batches = 0
+        self._lock = threading.Lock()
+        self._batch_closed = threading.Condition(self._lock)
+        # calls of the keys waiting to be sent or being fetched
+        self._calls = {}
+        # batch collecting keys, if any
+        self._batch = None
+
+    def load(self, key):
+        """Return the value of ``key``, ``None`` if it is missing. Blocks
+        until the batch of the key has been fetched.
+
+        :param key: hashable key
+        """
+        with self._lock:
+            self.loads += 1
+            call = self._calls.get(key)
+            if call is not None:
+                self.coalesced += 1
+                batch = None
+            else:
+                call = self._calls[key] = _Call()
+                batch = self._batch
+                if batch is None:
+                    # this caller sends the new batch
+                    batch = self._batch = _Batch(key)
+                    self._collect(batch)
+                    self.batches += 1
+                else:
+                    batch.keys.append(key)
+                    if len(batch.keys) >= self.max_batch:
+                        self._batch = None
+                        self._batch_closed.notify_all()
+                    batch = None
+
+        if batch is not None:
+            self._send(batch.keys)
+        return call.wait()
+
+    def _collect(self, batch):
+        # wait, with the lock held, for ``batch`` to be full or its window over
+        deadline = time.time() + self.window
+        while self._batch is batch:
+            remaining = deadline - time.time()
+            if remaining <= 0:
+                self._batch = None
+                break
+            self._batch_closed.wait(remaining)
+
+    def _send(self, keys):
+        error = None
+        try:
+            values = self.fetch(keys)
+        except Exception as e:
+            error = e
+            values = {}
+
+        with self._lock:
+            calls = [self._calls.pop(key) for key in keys]
+        for (key, call) in zip(keys, calls):
+            if error is None:
+                call.value = values.get(key)
+            else:
+                call.error = error
+            call.done.set()
@@ -1,5 +1,7 @@
 from __future__ import absolute_import
 
+from dynamodb2_mapper.types import JSON_TYPES
+
 # Sorting stuffs
 version_key = lambda name: int(name.split('_')[-1])
 
@@ -46,8 +48,9 @@ class Migration(object):
 
         self.model = model
 
-        # Did we already gather all this ?
-        if cls._migrators is not None:
+        # Did we already gather all this ? Look at this very class only as
+        # migrators may be derived.
+        if cls.__dict__.get("_migrators") is not None:
             return
 
         _detectors = []
@@ -114,3 +117,70 @@ class Migration(object):
         """
         current_version = self._detect_version(raw_data)
         return self._do_migration(current_version, raw_data)
+
+
+class NativeTypesMigration(Migration):
+    """
+    Migrate items stored before ``__native_types__`` was enabled on a model:
+    list/dict attributes stored as JSON strings are loaded and bool attributes
+    stored as ints are converted. Keys are left untouched.
+
+    - version 1: legacy JSON strings/ints
+    - version 2: native lists/maps/bools
+
+    >>> class User(DynamoDBModel):
+    ...     __native_types__ = True
+    ...     __migrator__ = NativeTypesMigration
+
+    Items are migrated when loaded and stored natively on their next save. To
+    convert a whole table, scan it and save each item.
+
+    If the model already has a migrator, call :py:meth:`has_legacy_types` and
+    :py:meth:`migrate_native_types` from its own ``check_N``/``migrate_to_N``.
+    """
+    def _legacy_fields(self, raw_data):
+        """Yield ``(name, schema_entry)`` of the non-key attributes of
+        ``raw_data`` still stored as JSON strings or ints.
+        """
+        model = self.model
+        keys = (model.__hash_key__, model.__range_key__)
+        for (name, schema_entry) in model.__schema__.iteritems():
+            if name in keys or name not in raw_data:
+                continue
+            value = raw_data[name]
+            if schema_entry in JSON_TYPES or type(schema_entry) in JSON_TYPES:
+                if isinstance(value, basestring):
+                    yield (name, schema_entry)
+            elif schema_entry is bool and not isinstance(value, bool):
+                yield (name, schema_entry)
+
+    def has_legacy_types(self, raw_data):
+        """Return True if some attributes of ``raw_data`` are still stored as
+        JSON strings or ints.
+        """
+        for _ in self._legacy_fields(raw_data):
+            return True
+        return False
+
+    def migrate_native_types(self, raw_data):
+        """Return a copy of ``raw_data`` with all legacy attributes converted
+        to native types. ``raw_data`` itself is kept as is as it is used for
+        conflict detection.
+        """
+        loads = self.model._get_json_engine().loads
+        migrated = dict(raw_data)
+        for (name, schema_entry) in self._legacy_fields(raw_data):
+            if schema_entry is bool:
+                migrated[name] = bool(raw_data[name])
+            else:
+                migrated[name] = loads(raw_data[name])
+        return migrated
+
+    def check_1(self, raw_data):
+        return True
+
+    def check_2(self, raw_data):
+        return not self.has_legacy_types(raw_data)
+
+    def migrate_to_2(self, raw_data):
+        return self.migrate_native_types(raw_data)
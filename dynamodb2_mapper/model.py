@@ -6,18 +6,23 @@ Released under the GNU LGPL, version 3 or later (see COPYING).
 """
 from __future__ import absolute_import
 
-import simplejson, logging, copy
-from datetime import datetime, timedelta, tzinfo
-from base64 import b64encode, b64decode
+import logging, copy
+import threading
+from datetime import datetime
 
 from boto.dynamodb2 import connect_to_region as connect_dynamodb2
 from boto.dynamodb2 import import regions as dynamodb_regions2
+from boto.dynamodb.types import Binary, Dynamizer
 from boto.dynamodb2.items import Item
 from boto.dynamodb2.table import Table
 from boto.dynamodb2.fields import HashKey, RangeKey
 from boto.dynamodb2.fields  import AllIndex, GlobalAllIndex
 
 from boto.exception import DynamoDBResponseError
+from boto.dynamodb.exceptions import DynamoDBKeyNotFoundError
+from boto.dynamodb import condition
+
+from onctuous import Schema
 
 from boto.dynamodb2.exceptions import (ConditionalCheckFailedException, ItemNotFound,
                                        QueryError, UnknownFieldError, DynamoDBError,
@@ -29,26 +34,31 @@ from dynamodb2_mapper.types import (BINARY, BINARY_SET, BOOLEAN, FILTER_OPERATOR
                                     QUERY_OPERATORS, STRING, STRING_SET)
 
 from dynamodb2_mapper.exceptions import (SchemaError, MaxRetriesExceededError,
-                                         ConflictError, OverwriteError, InvalidRegionError)
+                                         ConflictError, OverwriteError, InvalidRegionError,
+                                         ProjectionError)
+from dynamodb2_mapper.dates import UTC, utc_tz, parse_datetime, format_datetime
+from dynamodb2_mapper.json_engines import DEFAULT_ENGINE, get_json_engine
+from dynamodb2_mapper.compression import Compressed, get_attribute_size
+from dynamodb2_mapper.batch import (MAX_BATCH_GET, MAX_BATCH_WRITE, DEFAULT_MAX_WORKERS,
+                                    batch_get_chunk, batch_write_chunk, chunks, imap)
+from dynamodb2_mapper.pages import (Page, Count, encode_cursor, decode_cursor,
+                                    fetch_query_page, fetch_scan_page, query_pages, scan_pages,
+                                    parallel_pages, prefetch_pages, count_query, count_scan)
+from dynamodb2_mapper.session import get_session
+from dynamodb2_mapper.loader import BatchLoader
+from dynamodb2_mapper.throttle import Throttle
+from dynamodb2_mapper.columns import read_columns
 log = logging.getLogger(__name__)
 dblog = logging.getLogger(__name__+".database-access")
 
 
 MAX_RETRIES = 100
 
-class UTC(tzinfo):
-    """UTC timezone"""
-    def utcoffset(self, dt):
-        return timedelta(0)
-
-    def tzname(self, dt):
-        return "UTC"
-
-    def dst(self, dt):
-        return timedelta(0)
+# Stateless, shared by all low level calls
+_dynamizer = Dynamizer()
 
-
-utc_tz = UTC()
+# Guards the creation of the models' batch loaders
+_batch_loaders_lock = threading.Lock()
 
 def _get_proto_value(schema_entry):
     """Return a prototype value matching what schema_type will be serialized
@@ -88,17 +98,13 @@ def _python_to_dynamodb(value):
     """
     if isinstance(value, tuple(JSON_TYPES)):
         # json serialization hooks for json_* data types.
-        return simplejson.dumps(value, sort_keys=True)
+        return DEFAULT_ENGINE.dumps(value, sort_keys=True)
 
     if isinstance(value, datetime):
         # datetime instances are stored as UTC in the DB itself.
         # (that way, they become sortable)
         # datetime objects without tzinfo are not supported.
-        s = value.astimezone(utc_tz).strftime("%Y-%m-%dT%H:%M:%S.%f%z")
-        # there is not strftime code to output the timezone with the ':' that
-        # is mandated by the W3CDTF format, so here's an ugly hack
-        s = s[:-2] + ':' + s[-2:]
-        return s
+        return format_datetime(value)
 
     # This case prevents `'fields': False` to be added when genereating expected
     # values dict in save as this would mean 'field does not exist' instead of
@@ -125,58 +131,250 @@ def _dynamodb_to_python(schema_entry, value):
     The resulting value is then passed to the validation engine. If needed, make
     sure that your validator starts by manually coerce the input value.
 
+    This is a convenience wrapper around :py:func:`_compile_decoder`. Models
+    use the compiled version directly (see :py:meth:`DynamoDBModel._get_codecs`).
+
     :param schema_entry: A type or validator supported by the mapper
     :param value: The DynamoDB attribute to convert to a Python object.
         May be ``None``.
 
     :return: coerced and validated ``value``.
     """
+    return _compile_decoder(schema_entry)(value)
+
+
+def _compile_decoder(schema_entry, json_engine=DEFAULT_ENGINE):
+    """Return a ``decode(value)`` closure converting a DynamoDB attribute value
+    to a Python object according to ``schema_entry``.
+
+    All the dispatching on the schema entry kind is done once, here, so that
+    the returned closure only has to deal with the value. See
+    :py:func:`_dynamodb_to_python` for the conversion semantics.
+
+    list/dict attributes are accepted both as JSON strings and as native
+    DynamoDB lists/maps so that models can switch between storage modes (see
+    ``__native_types__``).
+
+    :param schema_entry: A type or validator supported by the mapper
+    :param json_engine: engine used to load list/dict attributes
+
+    :raises SchemaError: when ``schema_entry`` is not supported
+    """
     schema_type = type(schema_entry)
+    loads = json_engine.loads
+
+    # decompress, then decode as the wrapped type. Values stored before the
+    # attribute was compressed are not binaries.
+    if schema_type is Compressed:
+        decompress = schema_entry.decompress
+        decode_wrapped = _compile_decoder(schema_entry.type, json_engine)
+        def decode(value):
+            if isinstance(value, Binary):
+                value = decompress(value)
+            return decode_wrapped(value)
+        return decode
 
     # Handle json related type
     if schema_type in JSON_TYPES:
         # looks like a validator => load and validate it
-        if value is None:
-            value = schema_type()
-        else:
-            value = schema_type(simplejson.loads(value))
-        return Schema(schema_entry)(value)
+        validate = Schema(schema_entry)
+        def decode(value):
+            if value is None:
+                return validate(schema_type())
+            if isinstance(value, basestring):
+                value = loads(value)
+            return validate(schema_type(value))
+        return decode
     elif schema_entry in JSON_TYPES:
         # basic type => just load it and return
-        if value is None:
-            return schema_entry()
-        return schema_entry(simplejson.loads(value))
+        def decode(value):
+            if value is None:
+                return schema_entry()
+            if isinstance(value, basestring):
+                value = loads(value)
+            return schema_entry(value)
+        return decode
 
     # Handle this f** datetime sh** (sorry for expressing my thougts aloud)
     # if we enter this, it means this is not a validator so return directly
     if schema_entry is datetime:
-        if value is None:
-            return datetime.now(tz=utc_tz)
-        else:
-            # Parse TZ-aware isoformat
-
-            # strptime doesn't support timezone parsing (%z flag), so we're forcing
-            # the strings in the database to be UTC (+00:00) for now.
-            # TODO Handle arbitrary timezones (with manual parsing).
-            if value.endswith('Z'):
-                value = value[:-1] + '+00:00'
-            return datetime.strptime(
-                value, "%Y-%m-%dT%H:%M:%S.%f+00:00").replace(tzinfo=utc_tz)
+        def decode(value):
+            if value is None:
+                return datetime.now(tz=utc_tz)
+            # Parse TZ-aware isoformat, 'Z' or any '+HH:MM' offset
+            return parse_datetime(value)
+        return decode
 
     # handle "base" type like int and unicode: if no value, load "neutral" value
     # for basic type, if coercion is OK, validation is done. Hence the "return" shortcut
     # do it only once json and dates are done as json is only a special case of this one
     if schema_type is type:
-        if value is None:
-            return schema_entry()
-        return schema_entry(value)
+        def decode(value):
+            if value is None:
+                return schema_entry()
+            return schema_entry(value)
+        return decode
 
     # if this is a regular callable, run it on the input as a validator
     elif callable(schema_entry):
-        return schema_entry(value)
+        return schema_entry
+
+    def decode(value):
+        raise SchemaError("Invalid schema entry {}; can not load value {}".format(schema_entry, value))
+    return decode
 
-    raise SchemaError("Invalid schema entry {}; can not load value {}".format(schema_entry, value))
 
+def _compile_encoder(schema_entry, json_engine=DEFAULT_ENGINE, sort_keys=True, native=False):
+    """Return an ``encode(value)`` closure converting a Python object to its
+    DynamoDB representation according to ``schema_entry``.
+
+    Plain types get a specialized closure. Validators may return anything, so
+    they fall back to the generic, value driven, :py:func:`_python_to_dynamodb`.
+
+    :param schema_entry: A type or validator supported by the mapper
+    :param json_engine: engine used to dump list/dict attributes
+    :param sort_keys: whether dumped dicts must have sorted keys. This makes
+        the JSON strings stable, which matters for keys and conflict detection.
+    :param native: store list/dict as native DynamoDB lists/maps (``L``/``M``)
+        and bool as ``BOOL`` instead of JSON strings and ints. Keys can not be
+        stored this way.
+    """
+    json_types = tuple(JSON_TYPES)
+
+    if type(schema_entry) is Compressed:
+        # compressed values are always serialized as strings first
+        compress = schema_entry.compress
+        encode_wrapped = _compile_encoder(schema_entry.type, json_engine, sort_keys)
+        def encode(value):
+            value = encode_wrapped(value)
+            if value is None:
+                return None
+            return compress(value)
+        return encode
+
+    # validators (lists, dicts) are not hashable: check their type first
+    if type(schema_entry) in JSON_TYPES or schema_entry in JSON_TYPES:
+        if native:
+            def encode(value):
+                if isinstance(value, json_types):
+                    return value or None
+                return _python_to_dynamodb(value)
+            return encode
+
+        dumps = json_engine.dumps
+        def encode(value):
+            if isinstance(value, json_types):
+                return dumps(value, sort_keys)
+            return _python_to_dynamodb(value)
+        return encode
+
+    if schema_entry is datetime:
+        def encode(value):
+            if isinstance(value, datetime):
+                return format_datetime(value)
+            return _python_to_dynamodb(value)
+        return encode
+
+    if schema_entry is bool:
+        if native:
+            def encode(value):
+                if isinstance(value, bool):
+                    return value
+                return _python_to_dynamodb(value)
+            return encode
+
+        def encode(value):
+            if isinstance(value, bool):
+                return int(value)
+            return _python_to_dynamodb(value)
+        return encode
+
+    if type(schema_entry) is type:
+        # numbers, strings and sets are stored as is. Empty values are missing
+        # attributes, exactly like in _python_to_dynamodb
+        special_types = (bool, datetime) + json_types
+        def encode(value):
+            if isinstance(value, special_types):
+                return _python_to_dynamodb(value)
+            if value or value == 0:
+                return value
+            return None
+        return encode
+
+    return _python_to_dynamodb
+
+
+def _to_json_value(value):
+    """Convert an attribute value to a JSON friendly value, as documented in
+    :py:meth:`DynamoDBModel.to_json_dict`.
+    """
+    if isinstance(value, (set, frozenset)):
+        return sorted(value)
+    if isinstance(value, datetime):
+        # Using strftime instead of str or isoformat to get the right
+        # separator ('T') and time offset notation (with ':')
+        return value.astimezone(utc_tz).isoformat()
+    return value
+
+
+def _build_conditions(encoders, conditions, operators):
+    """Convert keyword conditions (``{"<attribute>__<operator>": value}``, as
+    accepted by ``boto``'s ``Table``) to low level conditions.
+
+    Values are encoded with the attribute's encoder. ``between`` expects a
+    ``(low, high)`` pair, ``in`` a list of values and ``null``/``nnull`` a
+    boolean: ``attribute__null=False`` is the same as
+    ``attribute__nnull=True``.
+
+    :param encoders: ``{attribute_name: encode}`` of the model
+    :param conditions: keyword conditions
+    :param operators: ``{operator: ComparisonOperator}`` of the allowed
+        operators, see :py:mod:`~dynamodb2_mapper.types`
+
+    :raises QueryError: on unknown attributes or operators, when an attribute
+        has several conditions or when a value is empty (empty values are
+        stored as missing attributes, use ``null``)
+    """
+    low_level = {}
+    for (keyword, value) in conditions.iteritems():
+        name, _, operator = keyword.rpartition("__")
+        if not name or operator not in operators:
+            raise QueryError("Invalid condition {!r}: expected <attribute>__<operator> with "
+                             "an operator in {}".format(keyword, ", ".join(sorted(operators))))
+        if name not in encoders:
+            raise QueryError("Condition {!r} on unknown attribute {!r}".format(keyword, name))
+        if name in low_level:
+            raise QueryError("Several conditions on attribute {!r}".format(name))
+
+        if operator in ("null", "nnull"):
+            is_null = (operator == "null") == bool(value)
+            low_level[name] = {"ComparisonOperator": "NULL" if is_null else "NOT_NULL"}
+            continue
+
+        if operator == "between":
+            values = list(value)
+            if len(values) != 2:
+                raise QueryError("Condition {!r} expects a (low, high) pair".format(keyword))
+        elif operator == "in":
+            values = list(value)
+            if not values:
+                raise QueryError("Condition {!r} expects at least one value".format(keyword))
+        else:
+            values = [value]
+
+        encode = encoders[name]
+        attribute_values = []
+        for v in values:
+            v = encode(v)
+            if v is None:
+                raise QueryError("Condition {!r} on an empty value, use {}__null".format(
+                    keyword, name))
+            attribute_values.append(_dynamizer.encode(v))
+        low_level[name] = {
+            "AttributeValueList": attribute_values,
+            "ComparisonOperator": operators[operator],
+        }
+    return low_level
 
 
 class ConnectionBorg(object):
@@ -198,6 +396,7 @@ class ConnectionBorg(object):
         "_region_name": None,
         "_connection": None,
         "_tables_cache": {},
+        "_json_engine": None,
     }
 
     def __init__(self):
@@ -240,6 +439,22 @@ class ConnectionBorg(object):
 
         raise InvalidRegionError("Region name %s is invalid" % region_name)
 
+    def set_json_engine(self, engine):
+        """Set the JSON engine used to store ``list`` and ``dict`` attributes
+        of all models not defining their own ``__json_engine__``. Defaults to
+        simplejson, or the standard library if it is not installed.
+
+        Models compiled with the previous engine are re-compiled on their next
+        use.
+
+        :param engine: ``"auto"`` to pick the fastest installed engine, an
+            engine name (``"orjson"``, ``"ujson"``, ``"simplejson"``, ``"json"``)
+            or an engine instance. See :py:mod:`~dynamodb2_mapper.json_engines`.
+
+        :raises ValueError: when the engine is unknown or not installed
+        """
+        self._json_engine = get_json_engine(engine)
+
     def create_table(self, cls, read_units, write_units, wait_for_active=False):
         """Create a table that'll be used to store instances of cls.
 
@@ -319,6 +534,31 @@ class ConnectionBorg(object):
         return self._tables_cache[name]
 
 
+class _LazyAttribute(object):
+    """Non-data descriptor decoding a schema attribute from the instance's
+    ``_lazy_data`` on first access. The decoded value is then stored in the
+    instance ``__dict__`` where it shadows the descriptor: further accesses
+    are plain attribute lookups.
+
+    Installed on models with ``__lazy_load__ = True``.
+    """
+    __slots__ = ("name", "decode")
+
+    def __init__(self, name, decode):
+        self.name = name
+        self.decode = decode
+
+    def __get__(self, instance, owner):
+        if instance is None:
+            return self
+        try:
+            lazy_data = instance.__dict__["_lazy_data"]
+        except KeyError:
+            raise AttributeError(self.name)
+        value = instance.__dict__[self.name] = self.decode(lazy_data.get(self.name))
+        return value
+
+
 class DynamoDBModel(object):
     """Abstract base class for all models that use DynamoDB as their storage
     backend.
@@ -341,6 +581,62 @@ class DynamoDBModel(object):
           "defaulter" may either be a scalar value or a callable with no
           arguments.
       - ``__migrator__``: :py:class:`~.Migration` handler attached to this model
+      - ``__json_engine__``: (optional) JSON engine (name or instance) used for
+          list/dict attributes of this model. Defaults to the engine set with
+          :py:meth:`ConnectionBorg.set_json_engine`.
+      - ``__json_sort_keys__``: (optional) set to ``False`` to dump dict
+          attributes without sorting their keys. It is faster for big
+          documents but the same value may then be stored as different
+          strings, so only do this if no conflict detection relies on these
+          attributes. Key attributes are always sorted.
+      - ``__native_types__``: (optional) set to ``True`` to store list/dict
+          attributes as native DynamoDB lists/maps and bool attributes as
+          ``BOOL`` rather than JSON strings and ints. Items are smaller and
+          there is nothing to parse on read. Numbers nested in lists/maps are
+          loaded as ``Decimal`` and floats must be representable by
+          DynamoDB. Both representations are read regardless of this flag.
+          To convert existing items, see
+          :py:class:`~dynamodb2_mapper.migration.NativeTypesMigration`.
+          Keys are never stored natively.
+      - ``__lazy_load__``: (optional) set to ``True`` to decode attributes of
+          instances loaded from the DB on first access only. The migrated raw
+          item is kept in ``self._lazy_data``. This makes loading wide items
+          cheap when only a few attributes are read. Validation, saving and
+          :py:meth:`to_json_dict` access, hence decode, every attribute.
+      - ``__validate_dirty_only__``: (optional) set to ``True`` to only
+          validate the attributes which changed since load when saving. See
+          :py:meth:`validate`.
+      - ``__partial_save__``: (optional) set to ``True`` to make :py:meth:`save`
+          only write the attributes which changed since load, by default.
+      - ``__version_key__``: (optional) name of a numeric schema attribute
+          used for optimistic locking. It is incremented on every save and,
+          with ``raise_on_conflict``, conditional writes and deletes only
+          check it instead of every original attribute. This keeps the
+          requests small whatever the item size. All writers must then go
+          through the mapper, or bump the version themselves.
+      - ``__batch_get_window__``: (optional) time, in seconds, during which
+          concurrent :py:meth:`get` calls of several threads are collected
+          to be sent as a single ``BatchGetItem``. Calls on a key already
+          being loaded wait for its result. See
+          :py:mod:`~dynamodb2_mapper.loader`. Strongly consistent and
+          ``attributes`` reads are not batched.
+
+    Secondary indexes are declared so that :py:meth:`query` can use them:
+
+      - ``__indexes__``: (optional) ``{index_name: range_key_name}`` of the
+          local secondary indexes. They share the table's hash key.
+      - ``__global_indexes__``: (optional) ``{index_name: (hash_key_name,
+          range_key_name)}`` of the global secondary indexes. Use a single
+          ``hash_key_name`` for hash only indexes.
+
+    Read methods accept an ``attributes`` list to only fetch some attributes.
+    Other attributes of the returned objects get their default value and are
+    never written: :py:meth:`save` falls back to a partial save of the loaded
+    attributes.
+
+    Large string, list or dict attributes may be stored compressed by wrapping
+    their schema type in :py:class:`~dynamodb2_mapper.compression.Compressed`.
+    They are decompressed on first access. See :py:meth:`size_report`.
 
     To redefine serialization/deserialization semantics (e.g. to have more
     complex schemas, like auto-serialized JSON data structures), override the
@@ -392,10 +688,21 @@ class DynamoDBModel(object):
     __range_key__ = None
     __schema__ = None
     __migrator__ = None
+    __json_engine__ = None
+    __json_sort_keys__ = True
+    __native_types__ = False
+    __lazy_load__ = False
+    __validate_dirty_only__ = False
+    __partial_save__ = False
+    __version_key__ = None
+    __batch_get_window__ = None
     __defaults__ = {}
     __indexes__ = {}
     __global_indexes__ = {}
 
+    # attribute names loaded by read methods called with ``attributes``
+    _projection = None
+
     def __init__(self, **kwargs):
         """Create an instance of the model. All fields defined in the schema
         are created. By order of priority its value will be loaded from:
@@ -431,23 +738,252 @@ class DynamoDBModel(object):
 
         # instanciate the migrator only once per model *after* initialization
         # as it assumes a fully initialized model
+        cls._get_migrator()
+
+    @classmethod
+    def _get_migrator(cls):
+        """Return the ``__migrator__`` instance of this model, if any. It is
+        instanciated on first call.
+        """
         if isinstance(cls.__migrator__, type):
             cls.__migrator__ = cls.__migrator__(cls)
+        return cls.__migrator__
+
+    @classmethod
+    def _get_json_engine(cls):
+        """Return the JSON engine of this model: ``__json_engine__`` if defined
+        otherwise the one set with :py:meth:`ConnectionBorg.set_json_engine`.
+        """
+        if cls.__json_engine__ is not None:
+            return get_json_engine(cls.__json_engine__)
+        return ConnectionBorg._shared_state.get("_json_engine") or DEFAULT_ENGINE
+
+    @classmethod
+    def _get_codecs(cls):
+        """Return the ``(decoders, encoders, json_engine)`` tables of this
+        model. Decoders and encoders are ``{attribute_name: closure}`` dicts
+        built from ``__schema__`` with :py:func:`_compile_decoder` and
+        :py:func:`_compile_encoder`.
+
+        Tables are compiled on first use and cached on the class itself so that
+        subclasses overriding ``__schema__`` get their own. They are compiled
+        again if the JSON engine changed in the mean time.
+
+        If ``__lazy_load__`` is set, :py:class:`_LazyAttribute` descriptors are
+        installed on the class along with the tables. :py:class:`Compressed`
+        attributes always get one, so they are only decompressed when read.
+        Their names are cached in ``cls._compressed_fields``.
+        """
+        json_engine = cls._get_json_engine()
+        codecs = cls.__dict__.get("_codecs")
+        if codecs is None or codecs[2] is not json_engine:
+            if cls.__version_key__ and cls.__version_key__ not in cls.__schema__:
+                raise SchemaError("__version_key__ {} is not in __schema__".format(
+                    cls.__version_key__), cls)
+            keys = (cls.__hash_key__, cls.__range_key__)
+            decoders = {}
+            encoders = {}
+            compressed_fields = []
+            for (name, type_) in cls.__schema__.iteritems():
+                if isinstance(type_, Compressed):
+                    if name in keys:
+                        raise SchemaError("Key {} can not be compressed".format(name), cls)
+                    compressed_fields.append(name)
+                decoders[name] = _compile_decoder(type_, json_engine)
+                if name in keys:
+                    # keys identify items: they must always be stored the same way
+                    encoders[name] = _compile_encoder(type_)
+                else:
+                    encoders[name] = _compile_encoder(
+                        type_, json_engine, cls.__json_sort_keys__,
+                        cls.__native_types__)
+            codecs = cls._codecs = (decoders, encoders, json_engine)
+            cls._compressed_fields = frozenset(compressed_fields)
+            if cls.__lazy_load__:
+                cls._install_lazy_attributes(decoders)
+            elif compressed_fields:
+                cls._install_lazy_attributes(
+                    {name: decoders[name] for name in compressed_fields})
+        return codecs
+
+    @classmethod
+    def _install_lazy_attributes(cls, decoders):
+        """Install a :py:class:`_LazyAttribute` for each schema attribute, unless
+        a regular class attribute of the same name would be hidden.
+        """
+        for (name, decode) in decoders.iteritems():
+            current = getattr(cls, name, None)
+            if current is None or isinstance(current, _LazyAttribute):
+                setattr(cls, name, _LazyAttribute(name, decode))
+
+    @classmethod
+    def compact_class(cls):
+        """Return the :py:class:`CompactRecord` class generated for this model.
+        It is built on first call and cached.
+
+        Read methods return instances of this class when called with
+        ``compact=True``.
+        """
+        compact_cls = cls.__dict__.get("_compact_class")
+        if compact_cls is None:
+            fields = tuple(sorted(cls.__schema__))
+            compact_cls = cls._compact_class = type(
+                cls.__name__ + "Compact",
+                (CompactRecord,),
+                {
+                    "__slots__": fields,
+                    "__model__": cls,
+                    "__fields__": fields,
+                    "__schema__": cls.__schema__,
+                    "__module__": cls.__module__,
+                })
+        return compact_cls
+
+    @classmethod
+    def _get_projection(cls, attributes):
+        """Return the ``frozenset`` of attribute names to load for the
+        ``attributes`` argument of the read methods, or ``None`` to load
+        everything. Keys and ``__version_key__`` are always loaded.
+
+        :raises SchemaError: when an attribute is not in ``__schema__``
+        """
+        if attributes is None:
+            return None
+        projection = set(attributes)
+        unknown = projection.difference(cls.__schema__)
+        if unknown:
+            raise SchemaError("Unknown attributes {}".format(sorted(unknown)), cls)
+        projection.add(cls.__hash_key__)
+        for name in (cls.__range_key__, cls.__version_key__):
+            if name:
+                projection.add(name)
+        return frozenset(projection)
 
-    def validate(self):
+    @classmethod
+    def _get_row_factory(cls, compact=False, projection=None, as_dict=False, raw=False):
+        """Return the callable building rows out of raw items for the read
+        methods.
+
+        :param compact: build :py:class:`CompactRecord` instead of model instances
+        :param projection: flag the rows as only holding these attributes, see
+            :py:meth:`_get_projection`
+        :param as_dict: build plain dicts of the decoded attributes, see
+            :py:meth:`_decode_db_dict`
+        :param raw: with ``as_dict``, build dicts of the stored values, as is
+        """
+        if as_dict:
+            if raw:
+                return dict
+            if projection is None:
+                return cls._decode_db_dict
+            return lambda raw_data: cls._decode_db_dict(raw_data, projection)
+        if compact:
+            from_db_dict = cls.compact_class()._from_db_dict
+        else:
+            from_db_dict = cls._from_db_dict
+        if projection is None:
+            return from_db_dict
+
+        def from_projected_db_dict(raw_data):
+            row = from_db_dict(raw_data)
+            row._projection = projection
+            return row
+        return from_projected_db_dict
+
+    def validate(self, dirty_only=False):
         """Return a ``dict`` of validated fields if validators passes. Otherwise
         ``InvalidList`` is raised.
+
+        :param dirty_only: only run the validators of the attributes which
+            changed since the object was loaded (see :py:meth:`_get_dirty_fields`).
+            Other attributes are returned as is. In this mode, ``Invalid`` is
+            raised by the first failing validator. Objects not coming from the
+            DB are fully validated.
+
+        Objects loaded with an ``attributes`` projection only validate the
+        loaded attributes, the same way.
         """
         # load schema
         schema = self.__schema__
-        validate = Schema(schema)
+        validate, field_validators = self._get_validators()
+
+        if dirty_only and self._raw_data:
+            checked = frozenset(self._get_dirty_fields())
+        else:
+            checked = self._projection
+
+        if checked is not None:
+            data = {}
+            for key in schema:
+                value = getattr(self, key)
+                if key in checked:
+                    value = field_validators[key](value)
+                data[str(key)] = value
+            return data
+
         # load schema data from self
         data = {str(key):getattr(self, str(key)) for key in schema}
         # return validated data (or raise)
         return validate(data)
 
     @classmethod
-    def get(cls, hash_key_value, range_key_value=None, consistent_read=False):
+    def _get_validators(cls):
+        """Return the ``(validator, field_validators)`` of this model where
+        ``validator`` is the compiled ``Schema`` of the whole ``__schema__`` and
+        ``field_validators`` a ``{attribute_name: Schema}`` dict.
+
+        Validators are compiled on first use and cached on the class.
+        """
+        validators = cls.__dict__.get("_validators")
+        if validators is None:
+            schema = cls.__schema__
+            validators = cls._validators = (
+                Schema(schema),
+                {name: Schema(type_) for (name, type_) in schema.iteritems()},
+            )
+        return validators
+
+    def _get_dirty_fields(self):
+        """Return the names of the attributes whose DB representation differs
+        from ``self._raw_data``, that is the attributes which changed since the
+        object was loaded or last saved. All attributes are dirty for objects not
+        coming from the DB.
+
+        Attributes of ``__lazy_load__`` objects which were never accessed are
+        only dirty if the migrator changed them. Attributes outside of the
+        ``attributes`` projection the object was loaded with are never dirty.
+        """
+        raw_data = self._raw_data
+        encoders = self._get_codecs()[1]
+        if not raw_data:
+            return list(encoders)
+        instance_dict = self.__dict__
+        lazy_data = instance_dict.get("_lazy_data")
+        projection = self._projection
+        dirty = []
+
+        for (name, encode) in encoders.iteritems():
+            if projection is not None and name not in projection:
+                continue
+            raw_value = raw_data.get(name)
+            if lazy_data is not None and name not in instance_dict:
+                if lazy_data.get(name) != raw_value:
+                    dirty.append(name)
+                continue
+            value = getattr(self, name)
+            try:
+                # empty values are stored as missing attributes, see _to_db_dict
+                if (encode(value) if value or value == 0 else None) == raw_value:
+                    continue
+            except (TypeError, ValueError):
+                # can not even be serialized, validation will tell why
+                pass
+            dirty.append(name)
+
+        return dirty
+
+    @classmethod
+    def get(cls, hash_key_value, range_key_value=None, consistent_read=False, attributes=None):
         """Retrieve a single object from DynamoDB according to its primary key.
 
         Note that this is not a query method -- it will only return the object
@@ -465,26 +1001,120 @@ class DynamoDBModel(object):
 
         :param consistent_read: If False (default), an eventually consistent
             read is performed. Set to True for strongly consistent reads.
+
+        :param attributes: only load these attributes. Keys and
+            ``__version_key__`` are always loaded. See the class documentation.
+
+        Within a :py:class:`~dynamodb2_mapper.session.Session`, objects it
+        holds are returned without any request, unless ``consistent_read``
+        or ``attributes`` are set.
         """
-        table = ConnectionBorg().get_table(cls.__table__)
-        # Convert the keys to DynamoDB values.
-        h_value = _python_to_dynamodb(hash_key_value)
-        if cls.__range_key__:
-            r_value = _python_to_dynamodb(range_key_value)
+        identity = cls._get_identity(hash_key_value, range_key_value)
+        _, h_value, r_value = identity
+
+        projection = cls._get_projection(attributes)
+        session = get_session() if projection is None else None
+        if session is not None and not consistent_read:
+            instance = session.get(cls, identity)
+            if instance is not None:
+                return instance
+
+        if cls.__batch_get_window__ is not None and not consistent_read and projection is None:
+            item = cls._get_batch_loader().load((h_value, r_value))
+            if item is None:
+                raise DynamoDBKeyNotFoundError(
+                    "Key ({}, {}) not found in table {}".format(h_value, r_value, cls.__table__))
         else:
-            r_value = None
+            table = ConnectionBorg().get_table(cls.__table__)
+            kwargs = {}
+            if projection is not None:
+                kwargs["attributes_to_get"] = sorted(projection)
 
-        item = table.get_item(
-                    hash_key=h_value,
-                    range_key=r_value,
-                    consistent_read=consistent_read)
+            item = table.get_item(
+                        hash_key=h_value,
+                        range_key=r_value,
+                        consistent_read=consistent_read,
+                        **kwargs)
 
         dblog.debug("Got item (%s, %s) from table %s", h_value, r_value, cls.__table__)
 
-        return cls._from_db_dict(item)
+        instance = cls._get_row_factory(projection=projection)(item)
+        if session is not None:
+            session.add(identity, instance)
+        return instance
+
+    @classmethod
+    def _get_batch_loader(cls):
+        """Return the :py:class:`~dynamodb2_mapper.loader.BatchLoader` of the
+        model, created on first use. See ``__batch_get_window__``.
+        """
+        loader = cls.__dict__.get("_batch_loader")
+        if loader is None:
+            with _batch_loaders_lock:
+                loader = cls.__dict__.get("_batch_loader")
+                if loader is None:
+                    loader = BatchLoader(cls._load_items, cls.__batch_get_window__)
+                    cls._batch_loader = loader
+        return loader
+
+    @classmethod
+    def _load_items(cls, keys):
+        """Get the items of ``keys``, ``(hash_key, range_key)`` DynamoDB
+        values, with a ``BatchGetItem``. Runs in the threads of
+        :py:meth:`get` for the :py:meth:`_get_batch_loader`.
+
+        :return: ``{key: item}`` of the items found
+        """
+        hash_key = cls.__hash_key__
+        range_key = cls.__range_key__
+        if range_key:
+            dynamo_keys = [{hash_key: h, range_key: r} for (h, r) in keys]
+        else:
+            dynamo_keys = [{hash_key: h} for (h, _) in keys]
+        items = batch_get_chunk(ConnectionBorg()._get_connection(), cls.__table__, dynamo_keys)
+
+        dblog.debug("Sent a batch get of %d keys on table %s", len(keys), cls.__table__)
+        return {(item[hash_key], item[range_key] if range_key else None): item
+                for item in items}
 
     @classmethod
-    def get_batch(cls, keys):
+    def _get_identity(cls, hash_key_value, range_key_value=None):
+        """Return the ``(table, hash_key, range_key)`` identity of an object in
+        a :py:class:`~dynamodb2_mapper.session.Session`. Keys are converted to
+        DynamoDB values, which are hashable.
+        """
+        encoders = cls._get_codecs()[1]
+        h_value = encoders[cls.__hash_key__](hash_key_value)
+        if cls.__range_key__:
+            r_value = encoders[cls.__range_key__](range_key_value)
+        else:
+            r_value = None
+        return cls.__table__, h_value, r_value
+
+    def _get_instance_identity(self):
+        """Return the session identity of this object, see :py:meth:`_get_identity`"""
+        cls = type(self)
+        range_key = cls.__range_key__
+        return cls._get_identity(
+            getattr(self, cls.__hash_key__),
+            getattr(self, range_key) if range_key else None)
+
+    def _update_session(self, deleted=False):
+        """Keep the active :py:class:`~dynamodb2_mapper.session.Session`, if
+        any, in sync with a successful write of this object.
+        """
+        session = get_session()
+        if session is None:
+            return
+        identity = self._get_instance_identity()
+        if deleted or self._projection is not None:
+            # a partially loaded object must not be served to readers
+            session.discard(identity)
+        else:
+            session.add(identity, self)
+
+    @classmethod
+    def get_batch(cls, keys, compact=False, max_workers=DEFAULT_MAX_WORKERS, ordered=False, attributes=None, as_dict=False, raw=False):
         """Retrieve multiple objects according to their primary keys.
 
         Like get, this isn't a query method -- you need to provide the exact
@@ -499,38 +1129,276 @@ class DynamoDBModel(object):
         get_batch *always* performs eventually consistent reads.
 
         Objects loaded by this method are marked as coming from the DB. Hence
-        their initial state is saved in ``self._raw_data``.
+        their initial state is saved in ``self._raw_data``. Keys of missing
+        objects are silently skipped.
+
+        Keys are sent in chunks of :py:data:`~.batch.MAX_BATCH_GET` keys,
+        ``max_workers`` chunks at a time. Keys left unprocessed by DynamoDB
+        (throttling) are requested again with an exponential backoff. See
+        :py:meth:`get_batch_iter` to process the objects while the next chunks
+        are being fetched.
 
         :param keys: iterable of keys. ex ``[(hash1, range1), (hash2, range2)]``
 
+        :param compact: return memory compact :py:class:`CompactRecord` instead
+            of model instances (see :py:meth:`compact_class`)
+
+        :param max_workers: maximum number of concurrent requests. ``1`` sends
+            them one after the other from the calling thread.
+
+        :param ordered: return the objects in ``keys`` order. Otherwise, the
+            order is undefined.
+
+        :param attributes: only load these attributes. See :py:meth:`get`.
+
+        :param as_dict: return plain ``{name: value}`` dicts of the decoded
+            attributes rather than objects. Building objects costs much more
+            than decoding the values, skip it when the values are all that is
+            needed (to dump them as JSON for example). ``compact`` is then
+            ignored.
+
+        :param raw: with ``as_dict``, return the values as stored in DynamoDB,
+            without decoding (nor migrating) them.
+
+        Within a :py:class:`~dynamodb2_mapper.session.Session`, only the keys
+        of the objects it does not hold are requested, unless ``compact``,
+        ``attributes`` or ``as_dict`` are set.
+
+        :raises MaxRetriesExceededError: when keys are still unprocessed after
+            :py:data:`~.batch.MAX_BATCH_RETRIES` attempts
         """
-        table = ConnectionBorg().get_table(cls.__table__)
+        return list(cls.get_batch_iter(keys, compact, max_workers, ordered, attributes,
+                                       as_dict, raw))
+
+    @classmethod
+    def get_batch_iter(cls, keys, compact=False, max_workers=DEFAULT_MAX_WORKERS, ordered=False, attributes=None, as_dict=False, raw=False):
+        """Same as :py:meth:`get_batch` but return a generator yielding the
+        objects chunk by chunk, as soon as they are received.
+
+        ``keys`` is consumed lazily. Closing the generator cancels the chunks
+        not sent yet. Within a session, ``keys`` is consumed at once to find
+        the objects to request.
+        """
+        session = get_session()
+        if session is not None and not (compact or as_dict) and attributes is None:
+            return cls._get_batch_from_session(session, keys, max_workers, ordered)
+        return cls._fetch_batch(keys, compact, max_workers, ordered, attributes, as_dict, raw)
+
+    @classmethod
+    def _get_batch_from_session(cls, session, keys, max_workers, ordered):
+        """:py:meth:`get_batch_iter` serving the objects held by ``session``
+        from memory and adding the others to it.
+        """
+        range_key = cls.__range_key__
+        identities = []
+        found = {}
+        missing_keys = []
+        for key in keys:
+            identity = cls._get_identity(*key) if range_key else cls._get_identity(key)
+            identities.append(identity)
+            instance = session.get(cls, identity)
+            if instance is None:
+                missing_keys.append(key)
+            else:
+                found[identity] = instance
+
+        if not ordered:
+            for instance in found.itervalues():
+                yield instance
+
+        if missing_keys:
+            for instance in cls._fetch_batch(missing_keys, False, max_workers, False, None):
+                identity = instance._get_instance_identity()
+                session.add(identity, instance)
+                if ordered:
+                    found[identity] = instance
+                else:
+                    yield instance
+
+        if ordered:
+            for identity in identities:
+                if identity in found:
+                    yield found[identity]
+
+    @classmethod
+    def _fetch_batch(cls, keys, compact, max_workers, ordered, attributes, as_dict=False,
+                     raw=False):
+        """Request the objects of ``keys``, see :py:meth:`get_batch_iter`"""
+        encoders = cls._get_codecs()[1]
+        hash_key = cls.__hash_key__
+        range_key = cls.__range_key__
+        encode_hash = encoders[hash_key]
 
         # Convert all the keys to DynamoDB values.
-        if cls.__range_key__:
-            dynamo_keys = [
-                (
-                    _python_to_dynamodb(h),
-                    _python_to_dynamodb(r)
-                ) for (h, r) in keys
-            ]
+        if range_key:
+            encode_range = encoders[range_key]
+            dynamo_keys = (
+                {hash_key: encode_hash(h), range_key: encode_range(r)}
+                for (h, r) in keys
+            )
         else:
-            dynamo_keys = map(_python_to_dynamodb, keys)
+            dynamo_keys = ({hash_key: encode_hash(h)} for h in keys)
+
+        connection = ConnectionBorg()._get_connection()
+        table_name = cls.__table__
+        projection = cls._get_projection(attributes)
+        attributes_to_get = sorted(projection) if projection is not None else None
+
+        def get_chunk(chunk_keys):
+            dblog.debug("Sent a batch get of %d keys on table %s", len(chunk_keys), table_name)
+            return batch_get_chunk(connection, table_name, chunk_keys,
+                                   ordered=ordered, attributes=attributes_to_get)
+
+        from_db_dict = cls._get_row_factory(compact, projection, as_dict, raw)
+        for items in imap(get_chunk, chunks(dynamo_keys, MAX_BATCH_GET), max_workers, ordered):
+            for item in items:
+                yield from_db_dict(item)
+
+    @classmethod
+    def save_batch(cls, instances, max_workers=DEFAULT_MAX_WORKERS):
+        """Save ``instances`` with ``BatchWriteItem`` requests rather than one
+        ``PutItem`` request per object.
+
+        Objects are validated, then sent in chunks of
+        :py:data:`~.batch.MAX_BATCH_WRITE` objects, ``max_workers`` chunks at
+        a time. Writes left unprocessed by DynamoDB (throttling) are sent again
+        with an exponential backoff. The ``_raw_data`` of the objects of each
+        chunk is updated once the chunk is written, as by :py:meth:`save`.
+
+        .. warning:: There is no conditional check in this mode: objects are
+            always fully overwritten, as with ``save(raise_on_conflict=False)``.
+            ``__version_key__`` attributes are still bumped but not checked.
+
+        :param instances: iterable of objects of this model, with distinct keys.
+            It is consumed lazily.
+
+        :param max_workers: maximum number of concurrent requests
+
+        :raises SchemaError: when an ``autoincrement_int`` hash key is not set:
+            keys can not be allocated in batches
+        :raises ProjectionError: when an object was loaded with an
+            ``attributes`` projection: a full write would wipe the attributes
+            which were not loaded
+        :raises MaxRetriesExceededError: when writes are still unprocessed
+            after :py:data:`~.batch.MAX_BATCH_RETRIES` attempts. Objects of
+            the chunks written so far are up to date.
+        """
+        hash_key = cls.__hash_key__
+        version_key = cls.__version_key__
+        autoincrement = cls.__schema__[hash_key] == autoincrement_int
+
+        def prepare(instance):
+            hash_key_value = getattr(instance, hash_key)
+            if autoincrement and hash_key_value in (None, MAGIC_KEY):
+                raise SchemaError(
+                    "save_batch can not allocate autoincrement_int keys nor write "
+                    "index {}".format(MAGIC_KEY), cls)
+            if instance._projection is not None:
+                raise ProjectionError(
+                    "Objects loaded with attributes {} can not be saved in "
+                    "batches".format(sorted(instance._projection)))
+            if not version_key:
+                return instance, instance._to_db_dict()
+            # serialize the bumped version, kept once written
+            previous_version = getattr(instance, version_key)
+            setattr(instance, version_key, int(instance._raw_data.get(version_key) or 0) + 1)
+            try:
+                return instance, instance._to_db_dict()
+            finally:
+                setattr(instance, version_key, previous_version)
+
+        connection = ConnectionBorg()._get_connection()
+        table_name = cls.__table__
+
+        def write_chunk(chunk):
+            dblog.debug("Sent a batch write of %d items on table %s", len(chunk), table_name)
+            batch_write_chunk(connection, table_name, items=[data for (_, data) in chunk])
+            return chunk
+
+        prepared = (prepare(instance) for instance in instances)
+        for chunk in imap(write_chunk, chunks(prepared, MAX_BATCH_WRITE), max_workers,
+                          ordered=False):
+            for (instance, item_data) in chunk:
+                if version_key:
+                    setattr(instance, version_key, item_data[version_key])
+                instance._raw_data = item_data
+                instance._update_session()
+
+    @classmethod
+    def delete_batch(cls, instances_or_keys, max_workers=DEFAULT_MAX_WORKERS):
+        """Delete objects with ``BatchWriteItem`` requests rather than one
+        ``DeleteItem`` request per object. Chunks and retries are handled as
+        by :py:meth:`save_batch`.
+
+        Deleted objects are marked as new, as by :py:meth:`delete`, and
+        dropped from the active :py:class:`~dynamodb2_mapper.session.Session`.
+
+        .. warning:: There is no conditional check in this mode: objects are
+            deleted whatever their current state in the DB, as with
+            ``delete(raise_on_conflict=False)``. Deleting a missing object is
+            not an error.
 
-        res = table.batch_get_item(dynamo_keys)
+        :param instances_or_keys: iterable of objects of this model or of keys,
+            as accepted by :py:meth:`get_batch`, all distinct. It is consumed
+            lazily.
+
+        :param max_workers: maximum number of concurrent requests
+
+        :raises MaxRetriesExceededError: when deletes are still unprocessed
+            after :py:data:`~.batch.MAX_BATCH_RETRIES` attempts
+        """
+        hash_key = cls.__hash_key__
+        range_key = cls.__range_key__
+
+        def prepare(instance_or_key):
+            if isinstance(instance_or_key, cls):
+                instance = instance_or_key
+                identity = instance._get_instance_identity()
+            else:
+                instance = None
+                if range_key:
+                    identity = cls._get_identity(*instance_or_key)
+                else:
+                    identity = cls._get_identity(instance_or_key)
+            key = {hash_key: identity[1]}
+            if range_key:
+                key[range_key] = identity[2]
+            return instance, identity, key
 
-        dblog.debug("Sent a batch get on table %s", cls.__table__)
+        connection = ConnectionBorg()._get_connection()
+        table_name = cls.__table__
 
-        return [cls._from_db_dict(d) for d in res]
+        def delete_chunk(chunk):
+            dblog.debug("Sent a batch delete of %d keys on table %s", len(chunk), table_name)
+            batch_write_chunk(connection, table_name, keys=[key for (_, _, key) in chunk])
+            return chunk
+
+        prepared = (prepare(instance_or_key) for instance_or_key in instances_or_keys)
+        for chunk in imap(delete_chunk, chunks(prepared, MAX_BATCH_WRITE), max_workers,
+                          ordered=False):
+            session = get_session()
+            for (instance, identity, _) in chunk:
+                if instance is not None:
+                    # any further save will be considered as *insertion*
+                    instance._raw_data = {}
+                if session is not None:
+                    session.discard(identity)
 
     @classmethod
-    def query(cls, hash_key_value, range_key_condition=None, consistent_read=False, reverse=False, limit=None):
+    def query(cls, hash_key_value=None, range_key_condition=None, consistent_read=False, reverse=False, limit=None, compact=False, attributes=None, index=None, as_dict=False, raw=False, prefetch=0, **conditions):
         """Query DynamoDB for items matching the requested key criteria.
 
         You need to supply an exact hash key value, and optionally, conditions
         on the range key. If no such conditions are supplied, all items matching
         the hash key value will be returned.
 
+        Key criteria may also be given as keyword conditions, which is the way
+        to query the secondary indexes declared in ``__indexes__`` and
+        ``__global_indexes__``::
+
+            User.query(index="by_email", email__eq=u"doomguy@uac.mars",
+                       created__gte=datetime(2015, 1, 1, tzinfo=utc_tz))
+
         This method can only be used on tables with composite (hash + range)
         primary keys -- since the exact hash key value is mandatory, on tables
         with hash-only primary keys, cls.get(k) does the same thing cls.query(k)
@@ -562,26 +1430,149 @@ class DynamoDBModel(object):
         :param limit: Specify the maximum number of items to read from the table.
             Even though Boto returns a generator, it works by batchs of 1MB.
             using this option may help to spare some read credits. Defaults to
-            ``None``
+            ``None``. With keyword conditions filtering non key attributes, it
+            is the maximum number of items returned: filtered out items do not
+            count.
+
+        :param compact: yield memory compact :py:class:`CompactRecord` instead
+            of model instances (see :py:meth:`compact_class`)
+
+        :param attributes: only load these attributes. See :py:meth:`get`.
+
+        :param index: name of the secondary index to query. ``hash_key_value``
+            and ``range_key_condition`` then apply to the keys of the index.
+
+        :param as_dict: yield plain dicts rather than objects. See
+            :py:meth:`get_batch`.
+
+        :param raw: with ``as_dict``, yield the values as stored. See
+            :py:meth:`get_batch`.
+
+        :param prefetch: number of pages (up to 1MB each) fetched ahead by a
+            background thread while the caller processes the current one.
+            See :py:func:`~.pages.prefetch_pages`. ``0`` fetches each page
+            once the previous one is consumed.
+
+        :param conditions: ``<attribute>__<operator>=value`` conditions.
+            Conditions on the keys of the queried table or index select the
+            items to read, with operators from
+            :py:data:`~dynamodb2_mapper.types.QUERY_OPERATORS`. Conditions on
+            other attributes filter them server side, with operators from
+            :py:data:`~dynamodb2_mapper.types.FILTER_OPERATORS`: filtered
+            out items are never transferred, but are still billed as read.
+            Values are encoded according to the schema. ``between`` expects
+            a ``(low, high)`` pair, ``in`` a list of values.
+
+        :raises QueryError: when the conditions do not fit the keys of the
+            queried table or index
 
         :rtype: generator
         """
+        if index is not None or conditions or hash_key_value is None or prefetch:
+            return cls._query_index(hash_key_value, range_key_condition, consistent_read,
+                                    reverse, limit, compact, attributes, index, conditions,
+                                    as_dict, raw, prefetch)
+
         table = ConnectionBorg().get_table(cls.__table__)
-        h_value = _python_to_dynamodb(hash_key_value)
+        h_value = cls._get_codecs()[1][cls.__hash_key__](hash_key_value)
+        projection = cls._get_projection(attributes)
+        kwargs = {}
+        if projection is not None:
+            kwargs["attributes_to_get"] = sorted(projection)
 
         res = table.query(
                 h_value,
                 range_key_condition,
                 consistent_read=consistent_read,
                 scan_index_forward=not reverse,
-                max_results=limit)
+                max_results=limit,
+                **kwargs)
 
         dblog.debug("Queried (%s, %s) on table %s", h_value, range_key_condition, cls.__table__)
 
-        return (cls._from_db_dict(d) for d in res)
+        from_db_dict = cls._get_row_factory(compact, projection, as_dict, raw)
+        return (from_db_dict(d) for d in res)
+
+    @classmethod
+    def _query_index(cls, hash_key_value, range_key_condition, consistent_read, reverse, limit,
+                     compact, attributes, index, conditions, as_dict=False, raw=False,
+                     prefetch=0):
+        """Low level :py:meth:`query`, for indexes, keyword conditions and
+        prefetch
+        """
+        key_conditions, query_filter = cls._get_query_conditions(
+            hash_key_value, range_key_condition, index, conditions)
+        projection = cls._get_projection(attributes)
+        pages = query_pages(
+            ConnectionBorg()._get_connection(),
+            cls.__table__,
+            key_conditions,
+            consistent_read=consistent_read,
+            reverse=reverse,
+            attributes=sorted(projection) if projection is not None else None,
+            limit=limit,
+            index=index,
+            query_filter=query_filter)
+        if prefetch:
+            pages = prefetch_pages(pages, prefetch)
+
+        dblog.debug("Queried %s on index %s of table %s with filter %s",
+                    key_conditions, index, cls.__table__, query_filter)
+
+        from_db_dict = cls._get_row_factory(compact, projection, as_dict, raw)
+        return (from_db_dict(item) for page in pages for item in page)
+
+    @classmethod
+    def query_columns(cls, fields, hash_key_value=None, range_key_condition=None, consistent_read=False, reverse=False, limit=None, index=None, **conditions):
+        """Query DynamoDB like :py:meth:`query` and return the ``fields`` of
+        the items as NumPy arrays, without building any object. See
+        :py:mod:`~dynamodb2_mapper.columns` for the types of the arrays.
+
+        Items are read as stored: ``__migrator__`` is not applied.
+
+        :param fields: names of the attributes to read
+
+        :return: ``{field: numpy.ndarray}`` dict, all arrays of the same
+            length, in the order of the query
+
+        :raises SchemaError: when a field is not in ``__schema__``
+        :raises QueryError: on invalid conditions
+        :raises ImportError: when NumPy is not installed
+        """
+        fields = cls._get_column_fields(fields)
+        key_conditions, query_filter = cls._get_query_conditions(
+            hash_key_value, range_key_condition, index, conditions)
+        pages = query_pages(
+            ConnectionBorg()._get_connection(),
+            cls.__table__,
+            key_conditions,
+            consistent_read=consistent_read,
+            reverse=reverse,
+            attributes=sorted(fields),
+            limit=limit,
+            index=index,
+            query_filter=query_filter)
+
+        dblog.debug("Queried columns %s with %s on index %s of table %s with filter %s",
+                    fields, key_conditions, index, cls.__table__, query_filter)
+
+        return read_columns(pages, cls.__schema__, cls._get_codecs()[0], fields)
 
     @classmethod
-    def scan(cls, scan_filter=None):
+    def _get_column_fields(cls, fields):
+        """Check the ``fields`` of :py:meth:`query_columns` and
+        :py:meth:`scan_columns`.
+
+        :raises SchemaError: when a field is not in ``__schema__``
+        """
+        fields = list(fields)
+        unknown = set(fields).difference(cls.__schema__)
+        if unknown:
+            raise SchemaError("Unknown attributes {}".format(sorted(unknown)), cls)
+        return fields
+
+    @classmethod
+    def scan(cls, scan_filter=None, compact=False, segments=None, max_workers=None, processes=False, attributes=None, as_dict=False, raw=False, prefetch=0, read_ratio=None, **filters):
         """Scan DynamoDB for items matching the requested criteria.
 
         You can scan based on any attribute and any criteria (including multiple
@@ -596,21 +1587,423 @@ class DynamoDBModel(object):
         :param scan_filter: A ``{attribute_name: condition}`` dict, where
             condition is a condition instance from ``boto.dynamodb.condition``.
 
+        :param compact: yield memory compact :py:class:`CompactRecord` instead
+            of model instances (see :py:meth:`compact_class`)
+
+        :param segments: split the scan in this many segments, scanned in
+            parallel (DynamoDB's ``Segment``/``TotalSegments``). The objects of
+            all the segments are yielded as soon as they are decoded, in no
+            particular order. Each worker decodes the rows of its own segments.
+
+        :param max_workers: number of segments scanned at the same time.
+            Defaults to ``segments``.
+
+        :param processes: scan segments in processes rather than threads. Rows
+            are then decoded out of the GIL, but pickled back to the calling
+            process. Models must be importable by the workers.
+
+        :param attributes: only load these attributes. See :py:meth:`get`.
+
+        :param as_dict: yield plain dicts rather than objects. See
+            :py:meth:`get_batch`.
+
+        :param raw: with ``as_dict``, yield the values as stored. See
+            :py:meth:`get_batch`.
+
+        :param prefetch: number of pages fetched ahead by a background thread,
+            see :py:meth:`query`. Segmented scans already fetch pages ahead,
+            up to ``2 * max_workers``.
+
+        :param read_ratio: fraction (``0 < read_ratio <= 1``) of the table's
+            provisioned read capacity the scan may consume, leaving the rest
+            to the live traffic. Pages are then paced by a
+            :py:class:`~dynamodb2_mapper.throttle.Throttle`, and requests
+            rejected for exceeding the throughput are retried with a backoff.
+            Segments share the capacity evenly.
+
+        :param filters: ``<attribute>__<operator>=value`` filters, with
+            operators from :py:data:`~dynamodb2_mapper.types.FILTER_OPERATORS`,
+            for example ``status__in=[u"active", u"banned"], score__gt=10``.
+            Values are encoded according to the schema. They are combined
+            with ``scan_filter`` and applied server side.
+
+        :raises QueryError: on invalid filters
+
+        :raises ValueError: on an invalid ``read_ratio`` or when the table has
+            no provisioned read capacity
+
         :rtype: generator
         """
-        table = ConnectionBorg().get_table(cls.__table__)
-        hash_key_name = table.schema.hash_key_name
+        projection = cls._get_projection(attributes)
+        scan_filter = cls._get_filter(scan_filter, filters)
+        read_rate = cls._get_read_rate(read_ratio) if read_ratio is not None else None
+        hash_key_name = cls.__hash_key__
+        if segments:
+            return cls._parallel_scan(
+                scan_filter, compact, segments, max_workers or segments, processes,
+                projection, as_dict, raw, read_rate)
+
+        if filters or prefetch or read_rate:
+            # keyword filters are low level conditions, boto's Table can not
+            # send them. It does not expose pages nor consumed capacity either.
+            pages = scan_pages(
+                ConnectionBorg()._get_connection(),
+                cls.__table__,
+                scan_filter,
+                attributes=sorted(projection) if projection is not None else None,
+                throttle=Throttle(read_rate) if read_rate else None)
+            if prefetch:
+                pages = prefetch_pages(pages, prefetch)
+            res = (item for page in pages for item in page)
+        else:
+            table = ConnectionBorg().get_table(cls.__table__)
+            kwargs = {}
+            if projection is not None:
+                kwargs["attributes_to_get"] = sorted(projection)
 
-        res = table.scan(scan_filter)
+            res = table.scan(scan_filter, **kwargs)
 
         dblog.debug("Scanned table %s with filter %s", cls.__table__, scan_filter)
 
+        from_db_dict = cls._get_row_factory(compact, projection, as_dict, raw)
+
+        # the autoincrement counter only lives in autoincrement_int tables
+        if cls.__schema__[hash_key_name] != autoincrement_int:
+            return (from_db_dict(d) for d in res)
+
         return (
-            cls._from_db_dict(d)
+            from_db_dict(d)
             for d in res
-            if d[hash_key_name] != MAGIC_KEY or cls.__schema__[hash_key_name] != autoincrement_int
+            if d[hash_key_name] != MAGIC_KEY
         )
 
+    @classmethod
+    def _parallel_scan(cls, scan_filter, compact, segments, max_workers, processes, projection,
+                       as_dict=False, raw=False, read_rate=None):
+        """Segmented :py:meth:`scan`, see :py:func:`~.pages.parallel_pages`"""
+        dblog.debug("Scanning table %s in %d segments with filter %s",
+                    cls.__table__, segments, scan_filter)
+        # segments do not share their throttle: it may live in another process
+        segment_rate = float(read_rate) / segments if read_rate else None
+        pages = parallel_pages(
+            _scan_segment,
+            [(cls, scan_filter, segment, segments, compact, projection, as_dict, raw,
+              segment_rate)
+             for segment in xrange(segments)],
+            max_workers,
+            processes=processes,
+            initializer=_reset_connection if processes else None)
+        return (row for page in pages for row in page)
+
+    @classmethod
+    def scan_columns(cls, fields, scan_filter=None, read_ratio=None, **filters):
+        """Scan DynamoDB like :py:meth:`scan` and return the ``fields`` of the
+        items as NumPy arrays, without building any object. See
+        :py:mod:`~dynamodb2_mapper.columns` for the types of the arrays.
+
+        Items are read as stored: ``__migrator__`` is not applied.
+
+        :param fields: names of the attributes to read
+
+        :return: ``{field: numpy.ndarray}`` dict, all arrays of the same length
+
+        :raises SchemaError: when a field is not in ``__schema__``
+        :raises QueryError: on invalid filters
+        :raises ImportError: when NumPy is not installed
+        """
+        fields = cls._get_column_fields(fields)
+        scan_filter = cls._get_filter(scan_filter, filters)
+        attributes = set(fields)
+        skip = None
+        hash_key = cls.__hash_key__
+        # the autoincrement counter only lives in autoincrement_int tables
+        if cls.__schema__[hash_key] == autoincrement_int:
+            attributes.add(hash_key)
+            skip = lambda item: item[hash_key] == MAGIC_KEY
+        read_rate = cls._get_read_rate(read_ratio) if read_ratio is not None else None
+        pages = scan_pages(
+            ConnectionBorg()._get_connection(),
+            cls.__table__,
+            scan_filter,
+            attributes=sorted(attributes),
+            throttle=Throttle(read_rate) if read_rate else None)
+
+        dblog.debug("Scanning columns %s of table %s with filter %s",
+                    fields, cls.__table__, scan_filter)
+
+        return read_columns(pages, cls.__schema__, cls._get_codecs()[0], fields, skip)
+
+    @classmethod
+    def _get_read_rate(cls, read_ratio):
+        """Return ``read_ratio`` of the provisioned read capacity of the
+        table, in capacity units per second.
+
+        :raises ValueError: when ``read_ratio`` is not in ``]0, 1]`` or the
+            table has no provisioned read capacity (on demand tables)
+        """
+        if not 0 < read_ratio <= 1:
+            raise ValueError("read_ratio must be in ]0, 1], got {!r}".format(read_ratio))
+        description = ConnectionBorg()._get_connection().describe_table(cls.__table__)
+        throughput = description["Table"].get("ProvisionedThroughput", {})
+        capacity = throughput.get("ReadCapacityUnits", 0)
+        if not capacity:
+            raise ValueError(
+                "Table {} has no provisioned read capacity".format(cls.__table__))
+        return capacity * read_ratio
+
+    @classmethod
+    def _get_index_keys(cls, index=None):
+        """Return the ``(hash_key, range_key)`` names of ``index``, of the
+        table itself if ``None``. ``range_key`` is ``None`` for hash only
+        keys.
+
+        :raises QueryError: when ``index`` is not declared by the model
+        """
+        if index is None:
+            return cls.__hash_key__, cls.__range_key__
+        if index in cls.__indexes__:
+            return cls.__hash_key__, cls.__indexes__[index]
+        if index in cls.__global_indexes__:
+            keys = cls.__global_indexes__[index]
+            if isinstance(keys, basestring):
+                return keys, None
+            return tuple(keys)
+        raise QueryError("Unknown index {!r} on model {}".format(index, cls.__name__))
+
+    @classmethod
+    def _get_key_conditions(cls, hash_key_value=None, range_key_condition=None, index=None,
+                            conditions=None):
+        """Return the low level ``KeyConditions`` of a query. See
+        :py:meth:`query` for the parameters.
+
+        :raises QueryError: when the conditions do not fit the keys of the
+            queried index
+        """
+        hash_key, range_key = cls._get_index_keys(index)
+        encoders = cls._get_codecs()[1]
+        key_conditions = _build_conditions(encoders, conditions or {}, QUERY_OPERATORS)
+
+        for name in key_conditions:
+            if name not in (hash_key, range_key):
+                raise QueryError("{!r} is not a key of {}".format(
+                    name, "index " + index if index else "table " + cls.__table__))
+
+        if hash_key_value is not None:
+            if hash_key in key_conditions:
+                raise QueryError("Hash key {!r} has several conditions".format(hash_key))
+            key_conditions[hash_key] = {
+                "AttributeValueList": [_dynamizer.encode(encoders[hash_key](hash_key_value))],
+                "ComparisonOperator": "EQ",
+            }
+        elif key_conditions.get(hash_key, {}).get("ComparisonOperator") != "EQ":
+            raise QueryError("Queries need the exact value of hash key {!r} ({}__eq)".format(
+                hash_key, hash_key))
+
+        if range_key_condition is not None:
+            if range_key is None or range_key in key_conditions:
+                raise QueryError("Unexpected range key condition {!r}".format(range_key_condition))
+            key_conditions[range_key] = range_key_condition.to_dict()
+        return key_conditions
+
+    @classmethod
+    def _get_query_conditions(cls, hash_key_value=None, range_key_condition=None, index=None,
+                              conditions=None):
+        """Split keyword ``conditions`` between the key conditions and the
+        filter of a query.
+
+        :return: ``(key_conditions, query_filter)``, low level conditions
+        """
+        key_names = cls._get_index_keys(index)
+        key_kwargs = {}
+        filter_kwargs = {}
+        for (keyword, value) in (conditions or {}).iteritems():
+            if keyword.rpartition("__")[0] in key_names:
+                key_kwargs[keyword] = value
+            else:
+                filter_kwargs[keyword] = value
+        return (cls._get_key_conditions(hash_key_value, range_key_condition, index, key_kwargs),
+                cls._get_filter(None, filter_kwargs))
+
+    @classmethod
+    def _get_filter(cls, scan_filter=None, filters=None):
+        """Add keyword ``filters``, compiled to low level conditions, to
+        ``scan_filter``. See :py:meth:`scan`.
+
+        :raises QueryError: on invalid filters, or when an attribute is
+            filtered in both
+        """
+        if not filters:
+            return scan_filter
+        low_level = _build_conditions(cls._get_codecs()[1], filters, FILTER_OPERATORS)
+        merged = dict(scan_filter or {})
+        for name in low_level:
+            if name in merged:
+                raise QueryError("Several conditions on attribute {!r}".format(name))
+        merged.update(low_level)
+        return merged
+
+    @classmethod
+    def query_page(cls, hash_key_value=None, range_key_condition=None, consistent_read=False,
+                   reverse=False, limit=None, cursor=None, compact=False, attributes=None,
+                   index=None, as_dict=False, raw=False, **conditions):
+        """Same as :py:meth:`query` but send a single request and return its
+        :py:class:`~.pages.Page` of objects. ``page.cursor`` is an opaque string
+        to pass back as ``cursor``, with the same query parameters, to get the
+        next page. It is ``None`` once the query is over::
+
+            cursor = load_cursor()
+            while True:
+                page = Model.query_page(hash_key_value, cursor=cursor)
+                process(page)
+                cursor = page.cursor
+                if cursor is None:
+                    break
+                store_cursor(cursor)
+
+        :param limit: maximum number of items read by the request. DynamoDB
+            also stops after reading 1MB.
+
+        :param cursor: ``cursor`` of the previous page, ``None`` to start
+            from the beginning
+
+        See :py:meth:`query` for the other parameters, ``index`` and keyword
+        conditions included.
+
+        :raises ValueError: when ``cursor`` is invalid
+        """
+        projection = cls._get_projection(attributes)
+        exclusive_start_key = decode_cursor(cursor)
+        key_conditions, query_filter = cls._get_query_conditions(
+            hash_key_value, range_key_condition, index, conditions)
+        items, last_key = fetch_query_page(
+            ConnectionBorg()._get_connection(),
+            cls.__table__,
+            key_conditions,
+            consistent_read=consistent_read,
+            reverse=reverse,
+            attributes=sorted(projection) if projection is not None else None,
+            limit=limit,
+            exclusive_start_key=exclusive_start_key,
+            index=index,
+            query_filter=query_filter)
+
+        dblog.debug("Queried a page of %s on index %s of table %s with filter %s",
+                    key_conditions, index, cls.__table__, query_filter)
+
+        from_db_dict = cls._get_row_factory(compact, projection, as_dict, raw)
+        return Page([from_db_dict(item) for item in items], encode_cursor(last_key))
+
+    @classmethod
+    def scan_page(cls, scan_filter=None, limit=None, cursor=None, compact=False,
+                  attributes=None, segment=None, total_segments=None, as_dict=False, raw=False,
+                  **filters):
+        """Same as :py:meth:`scan` but send a single request and return its
+        :py:class:`~.pages.Page` of objects. See :py:meth:`query_page` to
+        resume from ``page.cursor``.
+
+        :param segment: segment to scan, from 0 to ``total_segments - 1``, to
+            split a scan between independent jobs. Cursors are only valid for
+            their own segment.
+
+        :param total_segments: number of segments
+
+        :raises ValueError: when ``cursor`` is invalid
+        """
+        projection = cls._get_projection(attributes)
+        exclusive_start_key = decode_cursor(cursor)
+        scan_filter = cls._get_filter(scan_filter, filters)
+        items, last_key = fetch_scan_page(
+            ConnectionBorg()._get_connection(),
+            cls.__table__,
+            scan_filter,
+            segment,
+            total_segments,
+            attributes=sorted(projection) if projection is not None else None,
+            limit=limit,
+            exclusive_start_key=exclusive_start_key)
+
+        dblog.debug("Scanned a page of table %s with filter %s", cls.__table__, scan_filter)
+
+        hash_key = cls.__hash_key__
+        if cls.__schema__[hash_key] == autoincrement_int:
+            items = [item for item in items if item[hash_key] != MAGIC_KEY]
+        from_db_dict = cls._get_row_factory(compact, projection, as_dict, raw)
+        return Page([from_db_dict(item) for item in items], encode_cursor(last_key))
+
+    @classmethod
+    def query_count(cls, hash_key_value=None, range_key_condition=None, consistent_read=False,
+                    index=None, **conditions):
+        """Count the objects :py:meth:`query` would return, without
+        transferring nor decoding them (``Select=COUNT``).
+
+        See :py:meth:`query` for the parameters.
+
+        :rtype: :py:class:`~.pages.Count`, an ``int`` also holding the
+            ``consumed_capacity``
+        """
+        key_conditions, query_filter = cls._get_query_conditions(
+            hash_key_value, range_key_condition, index, conditions)
+        count = count_query(
+            ConnectionBorg()._get_connection(),
+            cls.__table__,
+            key_conditions,
+            consistent_read,
+            index,
+            query_filter)
+
+        dblog.debug("Counted %d items of %s on index %s of table %s",
+                    count, key_conditions, index, cls.__table__)
+        return count
+
+    @classmethod
+    def scan_count(cls, scan_filter=None, segments=None, max_workers=None, **filters):
+        """Count the objects :py:meth:`scan` would return, without
+        transferring nor decoding them (``Select=COUNT``). The autoincrement
+        counter item is not counted.
+
+        See :py:meth:`scan` for the parameters. Segments are counted by
+        threads.
+
+        :rtype: :py:class:`~.pages.Count`, an ``int`` also holding the
+            ``consumed_capacity``
+        """
+        scan_filter = cls._get_filter(scan_filter, filters)
+        hash_key = cls.__hash_key__
+        if cls.__schema__[hash_key] == autoincrement_int:
+            scan_filter = dict(scan_filter or {})
+            scan_filter.setdefault(hash_key, condition.NE(MAGIC_KEY))
+
+        connection = ConnectionBorg()._get_connection()
+        table_name = cls.__table__
+        if segments:
+            def count_segment(segment):
+                return count_scan(connection, table_name, scan_filter, segment, segments)
+            count = Count.sum(imap(count_segment, xrange(segments), max_workers or segments))
+        else:
+            count = count_scan(connection, table_name, scan_filter)
+
+        dblog.debug("Counted %d items on table %s with filter %s", count, table_name, scan_filter)
+        return count
+
+    @classmethod
+    def _decode_db_dict(cls, raw_data, names=None):
+        """Return a plain ``{name: value}`` dict of the attributes of a raw DB
+        dict, decoded according to the schema and migrated if needed. This is
+        what read methods return with ``as_dict=True``: no instance is built.
+
+        :param raw_data: Raw db dict
+        :param names: only decode these attributes, all the schema by default
+        """
+        migrator = cls._get_migrator()
+        if migrator is not None:
+            raw_data = migrator(raw_data)
+
+        decoders = cls._get_codecs()[0]
+        get = raw_data.get
+        if names is None:
+            return {name: decode(get(name)) for (name, decode) in decoders.iteritems()}
+        return {name: decoders[name](get(name)) for name in names}
+
     @classmethod
     def _from_db_dict(cls, raw_data):
         """Build an instance from a dict-like mapping, according to the class's
@@ -637,11 +2030,31 @@ class DynamoDBModel(object):
         if cls.__migrator__ is not None:
            raw_data = cls.__migrator__(raw_data)
 
+        decoders = cls._get_codecs()[0]
+
+        if cls.__lazy_load__:
+            # drop the values set by __init__ so that the lazy descriptors
+            # decode raw_data on access
+            instance_dict = instance.__dict__
+            for name in decoders:
+                instance_dict.pop(name, None)
+            instance._lazy_data = raw_data
+            return instance
+
         # de-serialize data
-        for (name, type_) in cls.__schema__.iteritems():
+        compressed_fields = cls._compressed_fields
+        for (name, decode) in decoders.iteritems():
+            if name in compressed_fields:
+                continue
             # Set the value if we got one from DynamoDB. Otherwise, stick with the default
-            value = _dynamodb_to_python(type_, raw_data.get(name)) # de-serialize
-            setattr(instance, name, value)
+            setattr(instance, name, decode(raw_data.get(name)))
+
+        if compressed_fields:
+            # decompressed on access, like __lazy_load__ attributes
+            instance_dict = instance.__dict__
+            for name in compressed_fields:
+                instance_dict.pop(name, None)
+            instance._lazy_data = raw_data
 
         return instance
 
@@ -654,8 +2067,52 @@ class DynamoDBModel(object):
 
         Overload this method if you need a special serialization semantic
         """
-        data = self.validate()
-        return {key: _python_to_dynamodb(val) for key, val in data.iteritems() if val or val == 0}
+        data = self.validate(dirty_only=self.__validate_dirty_only__)
+        encoders = self._get_codecs()[1]
+        return {key: encoders[key](val) for key, val in data.iteritems() if val or val == 0}
+
+    def size_report(self):
+        """Return the size, in bytes, of the item as it would be stored in
+        DynamoDB, to see where capacity goes and what :py:class:`Compressed`
+        attributes save. The report looks like::
+
+            {
+                "size": 1234,
+                "uncompressed_size": 6789,
+                "attributes": {
+                    "name": {"size": 12, "uncompressed_size": 12},
+                    "body": {"size": 1212, "uncompressed_size": 6767},
+                },
+            }
+
+        Sizes include attribute names, as billed by DynamoDB. The
+        ``uncompressed_size`` of compressed attributes is the size of their
+        value stored as a string. Number sizes are approximations. The object
+        is validated, like on save.
+        """
+        schema = self.__schema__
+        attributes = {}
+        size = uncompressed_size = 0
+        for (name, value) in self._to_db_dict().iteritems():
+            name_size = len(name.encode("utf-8"))
+            attribute_size = name_size + get_attribute_size(value)
+            schema_entry = schema[name]
+            if isinstance(schema_entry, Compressed):
+                attribute_uncompressed_size = name_size + get_attribute_size(
+                    schema_entry.decompress(value))
+            else:
+                attribute_uncompressed_size = attribute_size
+            attributes[name] = {
+                "size": attribute_size,
+                "uncompressed_size": attribute_uncompressed_size,
+            }
+            size += attribute_size
+            uncompressed_size += attribute_uncompressed_size
+        return {
+            "size": size,
+            "uncompressed_size": uncompressed_size,
+            "attributes": attributes,
+        }
 
     def to_json_dict(self):
         """Return a dict representation of the object, suitable for JSON
@@ -667,18 +2124,7 @@ class DynamoDBModel(object):
 
         Note that this method is never used for interaction with the database.
         """
-        out = {}
-        for name in self.__schema__:
-            value = getattr(self, name)
-            if isinstance(value, (set, frozenset)):
-                out[name] = sorted(value)
-            elif isinstance(value, datetime):
-                # Using strftime instead of str or isoformat to get the right
-                # separator ('T') and time offset notation (with ':')
-                out[name] = value.astimezone(utc_tz).isoformat()
-            else:
-                out[name] = value
-        return out
+        return {name: _to_json_value(getattr(self, name)) for name in self.__schema__}
 
     def _save_autoincrement_hash_key(self):
         """Compute an autoincremented hash_key for an item and save it to the DB.
@@ -719,7 +2165,7 @@ class DynamoDBModel(object):
         # This table auto-incr has been screwed up...
         raise MaxRetriesExceededError()
 
-    def save(self, raise_on_conflict=False):
+    def save(self, raise_on_conflict=False, partial=None):
         """Save the object to the database.
 
         This method may be used both to insert a new object in the DB, or to
@@ -735,14 +2181,29 @@ class DynamoDBModel(object):
         - **new object with autoinc**: flag has no effect
         - **(accidentally) editing keys**: Use ``self._raw_dict`` to generate ``expected_values``, will catch overwrites and insertion to empty location
 
+        With ``partial=True``, objects coming from the DB are saved with an
+        ``UpdateItem`` request writing only the attributes which changed since
+        they were loaded. ``raise_on_conflict`` then only checks the original
+        values of these attributes. New objects and objects whose keys changed
+        are always fully written.
+
+        Objects loaded with an ``attributes`` projection are always partially
+        saved: attributes which were not loaded are neither written nor
+        checked.
+
         :param raise_on_conflict: flag to toggle overwrite protection -- if any
             one of the original values doesn't match what is in the database
             (i.e. someone went ahead and modified the object in the DB behind
             your back), the operation fails and raises
             :class:`ConflictError` or ``OverwriteError``.
 
+        :param partial: write changed attributes only. Defaults to the model's
+            ``__partial_save__``.
+
         :raise ConflictError: Target object has changed between read and write operation
         :raise OverwriteError: A new Item overwrites an existing one and ``raise_on_conflict=True``. Note: this exception inherits from ConflictError
+        :raise ProjectionError: the object was loaded with an ``attributes``
+            projection and ``partial=False`` was requested or its keys changed
         """
 
         cls = type(self)
@@ -762,43 +2223,163 @@ class DynamoDBModel(object):
             return self._save_autoincrement_hash_key()
 
 
-        item_data = self._to_db_dict()
-        item = Item(table, attrs=item_data)
+        raw_data = self._raw_data
+        version_key = cls.__version_key__
+        if version_key:
+            # bump the version, restored if anything fails
+            previous_version = getattr(self, version_key)
+            setattr(self, version_key, int(raw_data.get(version_key) or 0) + 1)
 
-        # Regular save
-        if raise_on_conflict:
-            if self._raw_data:
-                expected_values = self._raw_data
-                # Empty strings/sets must be represented as missing values
-                for name in schema.iterkeys():
-                    if name not in expected_values:
-                        expected_values[name] = False
-            else:
-                # Forbid overwrites: do a conditional write on
-                # "this hash_key doesn't exist"
-                allow_overwrite = False
-                expected_values = {hash_key: False}
-                if range_key:
-                    expected_values[range_key] = False
         try:
-            item.put(expected_values)
-        except DynamoDBResponseError as e:
-            if e.error_code == "ConditionalCheckFailedException":
-                if allow_overwrite:
-                    # Conflict detected
-                    raise ConflictError(item)
-                # Forbidden overwrite
-                raise OverwriteError(item)
-            # Unhandled exception
+            item_data = self._to_db_dict()
+
+            projection = self._projection
+            if partial is None:
+                partial = cls.__partial_save__ or projection is not None
+            same_keys = (
+                item_data.get(hash_key) == raw_data.get(hash_key)
+                and (not range_key or item_data.get(range_key) == raw_data.get(range_key)))
+            if partial and raw_data and same_keys:
+                self._partial_save(item_data, raise_on_conflict)
+                self._update_session()
+                return
+            if projection is not None:
+                # a full write would wipe the attributes which were not loaded
+                raise ProjectionError(
+                    "Objects loaded with attributes {} can only be partially saved "
+                    "under their original keys".format(sorted(projection)))
+
+            item = Item(table, attrs=item_data)
+
+            # Regular save
+            if raise_on_conflict:
+                if raw_data:
+                    expected_values = self._get_expected_values()
+                else:
+                    # Forbid overwrites: do a conditional write on
+                    # "this hash_key doesn't exist"
+                    allow_overwrite = False
+                    expected_values = {hash_key: False}
+                    if range_key:
+                        expected_values[range_key] = False
+            try:
+                item.put(expected_values)
+            except DynamoDBResponseError as e:
+                if e.error_code == "ConditionalCheckFailedException":
+                    if allow_overwrite:
+                        # Conflict detected
+                        raise ConflictError(item)
+                    # Forbidden overwrite
+                    raise OverwriteError(item)
+                # Unhandled exception
+                raise
+        except Exception:
+            if version_key:
+                setattr(self, version_key, previous_version)
             raise
 
         # Update Raw_data to reflect DB state on success
         self._raw_data = item_data
+        self._update_session()
 
         hash_key_value = getattr(self, hash_key)
         range_key_value = getattr(self, range_key, None) if range_key else None
         dblog.debug("Saved (%s, %s) in table %s raise_on_conflict=%s", hash_key_value, range_key_value, cls.__table__, raise_on_conflict)
 
+    def _partial_save(self, item_data, raise_on_conflict):
+        """Write the attributes of ``item_data`` which differ from
+        ``self._raw_data`` with a single ``UpdateItem`` request. See
+        :py:meth:`save`.
+
+        :param item_data: the object, as returned by :py:meth:`_to_db_dict`
+        :param raise_on_conflict: only write if the changed attributes (or
+            the ``__version_key__`` if defined) still have their original value
+            in the DB
+        """
+        cls = type(self)
+        hash_key = cls.__hash_key__
+        range_key = cls.__range_key__
+        raw_data = self._raw_data
+        encode = _dynamizer.encode
+        projection = self._projection
+        if projection is not None:
+            # attributes which were not loaded are left untouched
+            item_data = {name: value for (name, value) in item_data.iteritems()
+                         if name in projection}
+
+        key = {hash_key: encode(item_data[hash_key])}
+        if range_key:
+            key[range_key] = encode(item_data[range_key])
+
+        updates = {}
+        expected = {}
+        for name in projection or cls.__schema__:
+            value = item_data.get(name)
+            raw_value = raw_data.get(name)
+            if value == raw_value:
+                continue
+            if value is None:
+                updates[name] = {"Action": "DELETE"}
+            else:
+                updates[name] = {"Action": "PUT", "Value": encode(value)}
+            if raw_value is None:
+                expected[name] = {"Exists": False}
+            else:
+                expected[name] = {"Value": encode(raw_value)}
+
+        version_key = cls.__version_key__
+        if version_key:
+            raw_version = raw_data.get(version_key)
+            if raw_version is None:
+                expected = {version_key: {"Exists": False}}
+            else:
+                expected = {version_key: {"Value": encode(raw_version)}}
+
+        if updates:
+            kwargs = {"expected": expected} if raise_on_conflict else {}
+            try:
+                ConnectionBorg()._get_connection().update_item(
+                    cls.__table__, key, updates, **kwargs)
+            except ConditionalCheckFailedException as e:
+                raise ConflictError(e)
+
+        # Update Raw_data to reflect DB state on success
+        self._raw_data = item_data
+
+        dblog.debug("Partially saved (%s, %s) in table %s attributes=%s raise_on_conflict=%s",
+                    item_data.get(hash_key), item_data.get(range_key), cls.__table__,
+                    sorted(updates), raise_on_conflict)
+
+    def _get_expected_values(self):
+        """Return the ``expected_values`` ensuring nobody changed this object in
+        the DB since it was loaded, for conditional writes.
+
+        If the model defines a ``__version_key__``, only the version is expected.
+        Otherwise, all of ``self._raw_data`` is, missing attributes being
+        expected as ``False``. Native ``BOOL`` values are expected with an
+        explicit low level ``{"Value": {"BOOL": value}}``, so that a stored
+        ``False`` is not mistaken for a missing attribute. Only loaded
+        attributes are expected for objects loaded with an ``attributes``
+        projection.
+        """
+        cls = type(self)
+        raw_data = self._raw_data
+        version_key = cls.__version_key__
+        if version_key:
+            return {version_key: raw_data.get(version_key, False)}
+
+        expected_values = {}
+        for (name, value) in raw_data.iteritems():
+            if isinstance(value, bool):
+                # bare True/False mean "attribute exists"/"attribute is missing"
+                value = {"Value": {"BOOL": value}}
+            expected_values[name] = value
+        # Empty strings/sets must be represented as missing values
+        for name in self._projection or cls.__schema__.iterkeys():
+            if name not in expected_values:
+                expected_values[name] = False
+        return expected_values
+
     def delete(self, raise_on_conflict=False):
         """Delete the current object from the database.
 
@@ -812,37 +2393,178 @@ class DynamoDBModel(object):
             :class:`ConflictError`.
 
         :raise ConflictError: Target object has changed between read and write operation
+        :raise ProjectionError: ``raise_on_conflict=True`` on an object loaded
+            with an ``attributes`` projection, unless the model has a
+            ``__version_key__``: attributes which were not loaded can not be
+            checked.
         """
         cls = type(self)
-        schema = cls.__schema__
         expected_values = None
+        encoders = cls._get_codecs()[1]
         hash_key_value = getattr(self, cls.__hash_key__)
-        h_value = _python_to_dynamodb(hash_key_value)
+        h_value = encoders[cls.__hash_key__](hash_key_value)
 
         if raise_on_conflict:
+            if self._projection is not None and not cls.__version_key__:
+                raise ProjectionError(
+                    "Objects loaded with attributes {} can not be deleted with "
+                    "raise_on_conflict=True".format(sorted(self._projection)))
             if self._raw_data:
-                expected_values = self._raw_data
-                # Empty strings/sets must be represented as missing values
-                for name in schema.iterkeys():
-                    if name not in expected_values:
-                        expected_values[name] = False
+                expected_values = self._get_expected_values()
             else: #shortcut :D
                 raise ConflictError("Attempts to delete an object which has not yet been persited with raise_on_conflict=True")
 
         # Range key is only present in composite primary keys
         if cls.__range_key__:
             range_key_value = getattr(self, cls.__range_key__)
-            r_value = _python_to_dynamodb(range_key_value)
+            r_value = encoders[cls.__range_key__](range_key_value)
         else:
             r_value = None
 
         try:
             table = ConnectionBorg().get_table(cls.__table__)
             Item(table, h_value, r_value).delete(expected_values)
-        except ConditionalCheckFailedError, e:
+        except ConditionalCheckFailedException as e:
             raise ConflictError(e)
 
         # Make sure any further save will be considered as *insertion*
         self._raw_data = {}
+        self._update_session(deleted=True)
 
         dblog.debug("Deleted (%s, %s) from table %s", h_value, r_value, cls.__table__)
+
+
+def _scan_segment(model, scan_filter, segment, total_segments, compact, projection,
+                  as_dict=False, raw=False, read_rate=None):
+    """Yield the pages of decoded rows of a scan segment. Runs in the workers
+    of :py:meth:`DynamoDBModel.scan`.
+    """
+    connection = ConnectionBorg()._get_connection()
+    hash_key = model.__hash_key__
+    from_db_dict = model._get_row_factory(compact, projection, as_dict, raw)
+    # the autoincrement counter only lives in autoincrement_int tables
+    skip_magic_key = model.__schema__[hash_key] == autoincrement_int
+    attributes = sorted(projection) if projection is not None else None
+    throttle = Throttle(read_rate) if read_rate else None
+
+    for items in scan_pages(connection, model.__table__, scan_filter,
+                            segment, total_segments, attributes, throttle):
+        yield [from_db_dict(item) for item in items
+               if not (skip_magic_key and item[hash_key] == MAGIC_KEY)]
+
+
+def _reset_connection():
+    """Drop the connection inherited from the parent process: sockets can
+    not be shared.
+    """
+    ConnectionBorg._shared_state.update(_connection=None, _tables_cache={})
+
+
+def _unpickle_compact_record(model, values, raw_values, projection):
+    compact_cls = model.compact_class()
+    record = compact_cls.__new__(compact_cls)
+    for (name, value) in zip(compact_cls.__fields__, values):
+        setattr(record, name, value)
+    record._raw_values = raw_values
+    record._projection = projection
+    return record
+
+
+class CompactRecord(object):
+    """Base class of the memory compact record classes generated by
+    :py:meth:`DynamoDBModel.compact_class`.
+
+    Records hold the same decoded attributes as model instances but in
+    ``__slots__`` instead of a ``__dict__``, and their raw DB snapshot is a
+    tuple in ``__fields__`` order (sorted attribute names) instead of a dict.
+    This saves a few hundred bytes per row, which matters when holding a large
+    ``scan`` or ``get_batch`` result in memory. Run ``benchmarks/bench_memory.py``
+    to measure it on your own models.
+
+    Records are meant to be read. :py:meth:`save` and :py:meth:`delete` go
+    through a temporary model instance (see :py:meth:`to_model`). Compared to
+    model instances:
+
+      - attributes are always decoded eagerly (``__lazy_load__`` is ignored)
+      - raw attributes not declared in the schema are not kept, hence not
+        checked by ``raise_on_conflict``
+    """
+    __slots__ = ("_raw_values", "_projection")
+    __model__ = None
+    __fields__ = ()
+    __schema__ = None
+
+    @classmethod
+    def _from_db_dict(cls, raw_data):
+        """Build a record from a raw DB dict. See
+        :py:meth:`DynamoDBModel._from_db_dict`.
+
+        :param raw_data: Raw db dict
+        """
+        model = cls.__model__
+        record = cls.__new__(cls)
+        record._raw_values = tuple([raw_data.get(name) for name in cls.__fields__])
+        record._projection = None
+
+        migrator = model._get_migrator()
+        if migrator is not None:
+            raw_data = migrator(raw_data)
+
+        decoders = model._get_codecs()[0]
+        for name in cls.__fields__:
+            setattr(record, name, decoders[name](raw_data.get(name)))
+        return record
+
+    def __reduce__(self):
+        # generated classes can not be pickled by reference
+        return (_unpickle_compact_record, (
+            self.__model__,
+            tuple([getattr(self, name) for name in self.__fields__]),
+            self._raw_values,
+            self._projection,
+        ))
+
+    @property
+    def _raw_data(self):
+        """Raw DB snapshot as a dict, like ``DynamoDBModel._raw_data``"""
+        return {name: value
+                for (name, value) in zip(self.__fields__, self._raw_values)
+                if value is not None}
+
+    def to_model(self):
+        """Return a full model instance with the same attributes and raw DB
+        snapshot.
+        """
+        instance = self.__model__()
+        instance._raw_data = self._raw_data
+        if self._projection is not None:
+            instance._projection = self._projection
+        for name in self.__fields__:
+            setattr(instance, name, getattr(self, name))
+        return instance
+
+    def _update_from_model(self, instance):
+        for name in self.__fields__:
+            setattr(self, name, getattr(instance, name))
+        raw_data = instance._raw_data
+        self._raw_values = tuple([raw_data.get(name) for name in self.__fields__])
+
+    def to_json_dict(self):
+        """See :py:meth:`DynamoDBModel.to_json_dict`"""
+        return {name: _to_json_value(getattr(self, name)) for name in self.__fields__}
+
+    def save(self, raise_on_conflict=False, partial=None):
+        """Save the record through a temporary model instance. See
+        :py:meth:`DynamoDBModel.save`.
+        """
+        instance = self.to_model()
+        instance.save(raise_on_conflict=raise_on_conflict, partial=partial)
+        self._update_from_model(instance)
+
+    def delete(self, raise_on_conflict=False):
+        """Delete the record through a temporary model instance. See
+        :py:meth:`DynamoDBModel.delete`.
+        """
+        instance = self.to_model()
+        instance.delete(raise_on_conflict=raise_on_conflict)
+        self._update_from_model(instance)
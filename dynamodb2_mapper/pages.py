@@ -0,0 +1,440 @@
+"""Low level page iteration for :py:class:`~dynamodb2_mapper.model.DynamoDBModel`
+read operations.
+
+``Scan`` (and ``Query``) results come in pages of at most 1MB. The helpers
+here send the requests through the low level connection, page after page, so
+that the mapper controls what ``boto``'s high level result sets do not expose:
+parallel scan segments, resumable cursors, background prefetch...
+
+Items handled here are dicts of DynamoDB values (as stored), models take care
+of the conversion to Python objects.
+"""
+from __future__ import absolute_import
+
+import json
+import logging
+import pickle
+import threading
+import multiprocessing
+from base64 import urlsafe_b64encode, urlsafe_b64decode
+from Queue import Queue, Full
+
+from dynamodb2_mapper.batch import decode_item
+
+
+log = logging.getLogger(__name__)
+
+# Kinds of the messages sent by the workers of parallel_pages
+_PAGE, _ERROR, _DONE = range(3)
+
+# Seconds between 2 checks of the stop event by blocked workers
+_STOP_POLL_INTERVAL = 0.1
+
+
+class Page(object):
+    """A page of results of :py:meth:`~.DynamoDBModel.query_page` or
+    :py:meth:`~.DynamoDBModel.scan_page`. Iterate over it to get its objects.
+
+    ``cursor`` is an opaque ASCII string which can be stored (database, URL...)
+    and passed back to continue reading after this page, even from another
+    process. It is ``None`` on the last page. Note that a page may be empty
+    while its cursor is not: DynamoDB stops after reading 1MB or ``limit``
+    items, before filtering.
+    """
+    __slots__ = ("items", "cursor")
+
+    def __init__(self, items, cursor):
+        self.items = items
+        self.cursor = cursor
+
+    def __iter__(self):
+        return iter(self.items)
+
+    def __len__(self):
+        return len(self.items)
+
+    def __repr__(self):
+        return "<Page of {} items, cursor={!r}>".format(len(self.items), self.cursor)
+
+
+class Count(int):
+    """Result of :py:meth:`~.DynamoDBModel.query_count` and
+    :py:meth:`~.DynamoDBModel.scan_count`: the number of matching items.
+
+    :ivar scanned_count: number of items read, before filtering
+    :ivar consumed_capacity: read capacity units consumed by the count, or
+        ``None`` if DynamoDB did not report it
+    """
+    def __new__(cls, count, scanned_count=0, consumed_capacity=None):
+        self = super(Count, cls).__new__(cls, count)
+        self.scanned_count = scanned_count
+        self.consumed_capacity = consumed_capacity
+        return self
+
+    @classmethod
+    def sum(cls, counts):
+        """Add up ``counts``, of segments for example, in a single
+        :py:class:`Count`.
+        """
+        counts = list(counts)
+        capacities = [count.consumed_capacity for count in counts
+                      if count.consumed_capacity is not None]
+        return cls(
+            sum(counts),
+            sum(count.scanned_count for count in counts),
+            sum(capacities) if capacities else None)
+
+    def __repr__(self):
+        return "Count({}, scanned_count={}, consumed_capacity={})".format(
+            int(self), self.scanned_count, self.consumed_capacity)
+
+
+def encode_cursor(last_evaluated_key):
+    """Return the cursor of a low level ``LastEvaluatedKey``, ``None`` if
+    there is none.
+    """
+    if not last_evaluated_key:
+        return None
+    data = json.dumps(last_evaluated_key, sort_keys=True, separators=(",", ":"))
+    return urlsafe_b64encode(data.encode("utf-8")).rstrip("=")
+
+
+def decode_cursor(cursor):
+    """Return the low level ``ExclusiveStartKey`` of ``cursor``, as returned by
+    :py:func:`encode_cursor`, ``None`` if ``cursor`` is ``None``.
+
+    :raises ValueError: when ``cursor`` is not a valid cursor
+    """
+    if cursor is None:
+        return None
+    try:
+        cursor = str(cursor)
+        data = urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        key = json.loads(data.decode("utf-8"))
+    except (TypeError, ValueError, UnicodeError):
+        raise ValueError("Invalid cursor {!r}".format(cursor))
+    if not isinstance(key, dict):
+        raise ValueError("Invalid cursor {!r}".format(cursor))
+    return key
+
+
+def _get_scan_filter(scan_filter):
+    # ``{name: boto.dynamodb.condition}`` => low level conditions. Conditions
+    # built from keyword filters by the models are low level already.
+    return {name: condition if isinstance(condition, dict) else condition.to_dict()
+            for (name, condition) in scan_filter.iteritems()}
+
+
+def fetch_scan_page(connection, table_name, scan_filter=None, segment=None,
+                    total_segments=None, attributes=None, limit=None,
+                    exclusive_start_key=None, throttle=None):
+    """Send a single ``Scan`` request.
+
+    :param connection: low level DynamoDB connection
+    :param table_name: name of the table
+    :param scan_filter: ``{attribute_name: condition}`` dict, where condition
+        is a condition instance from ``boto.dynamodb.condition`` or a low
+        level condition dict.
+    :param segment: when scanning in parallel, segment to scan, starting at 0
+    :param total_segments: when scanning in parallel, number of segments
+    :param attributes: only get these attributes
+    :param limit: maximum number of items to read
+    :param exclusive_start_key: low level key to start after
+    :param throttle: :py:class:`~dynamodb2_mapper.throttle.Throttle` pacing
+        the request
+
+    :return: ``(items, last_evaluated_key)`` where items are dicts of
+        DynamoDB values and ``last_evaluated_key`` is ``None`` on the last page
+    """
+    kwargs = {}
+    if scan_filter:
+        kwargs["scan_filter"] = _get_scan_filter(scan_filter)
+    if total_segments is not None:
+        kwargs["segment"] = segment
+        kwargs["total_segments"] = total_segments
+    if attributes is not None:
+        kwargs["attributes_to_get"] = attributes
+    if limit is not None:
+        kwargs["limit"] = limit
+
+    if throttle is not None:
+        response = throttle.request(
+            connection.scan, table_name, exclusive_start_key=exclusive_start_key, **kwargs)
+    else:
+        response = connection.scan(
+            table_name, exclusive_start_key=exclusive_start_key, **kwargs)
+    items = [decode_item(raw_item) for raw_item in response.get("Items", [])]
+    return items, response.get("LastEvaluatedKey") or None
+
+
+def scan_pages(connection, table_name, scan_filter=None, segment=None, total_segments=None,
+               attributes=None, throttle=None):
+    """Scan ``table_name`` and yield the pages of items as they are received.
+    See :py:func:`fetch_scan_page` for the parameters.
+
+    :return: generator of lists of items, as dicts of DynamoDB values
+    """
+    exclusive_start_key = None
+    while True:
+        items, exclusive_start_key = fetch_scan_page(
+            connection, table_name, scan_filter, segment, total_segments, attributes,
+            exclusive_start_key=exclusive_start_key, throttle=throttle)
+        yield items
+        if exclusive_start_key is None:
+            return
+
+
+def fetch_query_page(connection, table_name, key_conditions, consistent_read=False,
+                     reverse=False, attributes=None, limit=None,
+                     exclusive_start_key=None, index=None, query_filter=None):
+    """Send a single ``Query`` request.
+
+    :param key_conditions: low level ``KeyConditions``
+    :param consistent_read: use strongly consistent reads
+    :param reverse: read the range key in descending order
+    :param index: name of the secondary index to query, ``None`` to query
+        the table
+    :param query_filter: conditions on non key attributes, applied by
+        DynamoDB after reading the items. Same format as ``scan_filter``.
+
+    See :py:func:`fetch_scan_page` for the other parameters and the returned
+    value.
+    """
+    kwargs = {}
+    if consistent_read:
+        kwargs["consistent_read"] = True
+    if reverse:
+        kwargs["scan_index_forward"] = False
+    if attributes is not None:
+        kwargs["attributes_to_get"] = attributes
+    if limit is not None:
+        kwargs["limit"] = limit
+    if index is not None:
+        kwargs["index_name"] = index
+    if query_filter:
+        kwargs["query_filter"] = _get_scan_filter(query_filter)
+
+    response = connection.query(
+        table_name, key_conditions, exclusive_start_key=exclusive_start_key, **kwargs)
+    items = [decode_item(raw_item) for raw_item in response.get("Items", [])]
+    return items, response.get("LastEvaluatedKey") or None
+
+
+def query_pages(connection, table_name, key_conditions, consistent_read=False,
+                reverse=False, attributes=None, limit=None, index=None, query_filter=None):
+    """Query ``table_name`` and yield the pages of items as they are received.
+    See :py:func:`fetch_query_page` for the parameters.
+
+    :param limit: maximum number of items to yield, over all the pages. Items
+        filtered out by ``query_filter`` do not count.
+
+    :return: generator of lists of items, as dicts of DynamoDB values
+    """
+    exclusive_start_key = None
+    while True:
+        # DynamoDB's Limit counts the items read before filtering: with a
+        # filter, it would cut the pages short without bounding the results
+        items, exclusive_start_key = fetch_query_page(
+            connection, table_name, key_conditions, consistent_read, reverse, attributes,
+            limit=None if query_filter else limit,
+            exclusive_start_key=exclusive_start_key, index=index,
+            query_filter=query_filter)
+        if limit is not None:
+            items = items[:limit]
+            limit -= len(items)
+        yield items
+        if limit is not None and limit <= 0:
+            return
+        if exclusive_start_key is None:
+            return
+
+
+def _count_pages(request, table_name, **kwargs):
+    # send ``request`` with Select=COUNT, page after page
+    counts = []
+    exclusive_start_key = None
+    while True:
+        response = request(
+            table_name, select="COUNT", return_consumed_capacity="TOTAL",
+            exclusive_start_key=exclusive_start_key, **kwargs)
+        capacity = response.get("ConsumedCapacity")
+        counts.append(Count(
+            response.get("Count", 0),
+            response.get("ScannedCount", 0),
+            capacity.get("CapacityUnits") if capacity else None))
+
+        exclusive_start_key = response.get("LastEvaluatedKey")
+        if not exclusive_start_key:
+            return Count.sum(counts)
+
+
+def count_scan(connection, table_name, scan_filter=None, segment=None, total_segments=None):
+    """Count the items of a scan with ``Select=COUNT`` requests: items are
+    neither transferred nor decoded. See :py:func:`fetch_scan_page` for the
+    parameters.
+
+    :rtype: :py:class:`Count`
+    """
+    kwargs = {}
+    if scan_filter:
+        kwargs["scan_filter"] = _get_scan_filter(scan_filter)
+    if total_segments is not None:
+        kwargs["segment"] = segment
+        kwargs["total_segments"] = total_segments
+    return _count_pages(connection.scan, table_name, **kwargs)
+
+
+def count_query(connection, table_name, key_conditions, consistent_read=False, index=None,
+                query_filter=None):
+    """Count the items of a query with ``Select=COUNT`` requests. See
+    :py:func:`fetch_query_page` for the parameters.
+
+    :rtype: :py:class:`Count`
+    """
+    kwargs = {}
+    if consistent_read:
+        kwargs["consistent_read"] = True
+    if index is not None:
+        kwargs["index_name"] = index
+    if query_filter:
+        kwargs["query_filter"] = _get_scan_filter(query_filter)
+    return _count_pages(connection.query, table_name, key_conditions=key_conditions, **kwargs)
+
+
+def _put(results, message, stop):
+    # block until there is room in ``results``, unless asked to stop
+    while not stop.is_set():
+        try:
+            results.put(message, timeout=_STOP_POLL_INTERVAL)
+            return True
+        except Full:
+            pass
+    return False
+
+
+def _run_worker(function, tasks, results, stop, initializer, processes):
+    if initializer is not None:
+        initializer()
+    try:
+        while not stop.is_set():
+            args = tasks.get()
+            if args is None:
+                break
+            for page in function(*args):
+                if not _put(results, (_PAGE, page), stop):
+                    return
+    except Exception as e:
+        if processes:
+            # unpicklable errors would be silently dropped by the queue
+            try:
+                pickle.dumps(e, pickle.HIGHEST_PROTOCOL)
+            except Exception:
+                e = Exception(repr(e))
+        _put(results, (_ERROR, e), stop)
+    finally:
+        _put(results, (_DONE, None), stop)
+
+
+def _prefetch_worker(pages, results, stop):
+    try:
+        for page in pages:
+            if not _put(results, (_PAGE, page), stop):
+                return
+    except Exception as e:
+        _put(results, (_ERROR, e), stop)
+    finally:
+        _put(results, (_DONE, None), stop)
+
+
+def prefetch_pages(pages, depth):
+    """Yield the pages of ``pages``, an iterator of pages such as
+    :py:func:`query_pages`, while a background thread fetches up to
+    ``depth`` pages ahead. Requests thus overlap with the processing of the
+    pages by the caller.
+
+    The thread starts on the first iteration. Once ``depth`` pages are
+    waiting, it blocks until the caller consumes one. Closing the generator
+    stops the thread once it has received its current page.
+
+    :raises: the exception raised by ``pages``, when its page would have been
+        yielded
+    """
+    results = Queue(depth)
+    stop = threading.Event()
+    thread = threading.Thread(target=_prefetch_worker, args=(pages, results, stop))
+    thread.daemon = True
+    thread.start()
+    try:
+        while True:
+            kind, value = results.get()
+            if kind == _PAGE:
+                yield value
+            elif kind == _ERROR:
+                raise value
+            else:
+                return
+    finally:
+        stop.set()
+
+
+def parallel_pages(function, tasks, max_workers, processes=False, initializer=None):
+    """Run ``function(*args)``, a generator of pages, for each ``args`` of
+    ``tasks`` on up to ``max_workers`` workers and yield the pages as they are
+    produced.
+
+    Workers are threads, or processes if ``processes`` is set. Processes do
+    not share the GIL, which matters when ``function`` decodes the rows it
+    yields, but pages must then be pickled back to the calling process.
+
+    At most ``2 * max_workers`` pages are waiting to be yielded. Closing the
+    generator stops the workers once they have received their current page.
+
+    :param initializer: called by each worker before its first task, to reset
+        state not meant to be shared with processes (connections...)
+
+    :raises: the first exception raised by a worker
+    """
+    tasks = list(tasks)
+    max_workers = max(1, min(max_workers, len(tasks)))
+
+    if processes:
+        task_queue = multiprocessing.Queue()
+        results = multiprocessing.Queue(2 * max_workers)
+        stop = multiprocessing.Event()
+        worker_class = multiprocessing.Process
+    else:
+        task_queue = Queue()
+        results = Queue(2 * max_workers)
+        stop = threading.Event()
+        worker_class = threading.Thread
+
+    for args in tasks:
+        task_queue.put(args)
+    # one end marker per worker
+    for _ in xrange(max_workers):
+        task_queue.put(None)
+
+    workers = [
+        worker_class(target=_run_worker,
+                     args=(function, task_queue, results, stop, initializer, processes))
+        for _ in xrange(max_workers)
+    ]
+    for worker in workers:
+        worker.daemon = True
+        worker.start()
+
+    running = len(workers)
+    try:
+        while running:
+            kind, value = results.get()
+            if kind == _PAGE:
+                yield value
+            elif kind == _ERROR:
+                raise value
+            else:
+                running -= 1
+    finally:
+        stop.set()
+        if processes:
+            for worker in workers:
+                worker.terminate()
@@ -0,0 +1,96 @@
+"""Identity map of the objects read and written during a unit of work (a web
+request, a :py:meth:`~dynamodb2_mapper.transactions.Transaction._setup`...).
+
+Sessions are opt-in. While a :py:class:`Session` is active in a thread,
+:py:meth:`~.DynamoDBModel.get` and :py:meth:`~.DynamoDBModel.get_batch` serve
+the objects it already holds from memory, without any request::
+
+    with Session() as session:
+        player = Player.get(42)
+        ...
+        Player.get(42) is player  # True, no round trip
+        log.debug("%d hits, %d misses", session.hits, session.misses)
+
+Objects are shared: changes made to an object are visible to every later
+reader of the session, saved or not. :py:meth:`~.DynamoDBModel.save` and
+:py:meth:`~.DynamoDBModel.delete` keep the session up to date. Writes made
+outside of the session (other processes, low level requests...) are not seen
+until the session ends; use ``consistent_read=True`` to bypass it.
+
+Only full model instances are held. Reads with ``attributes`` or ``compact``
+bypass the session.
+"""
+from __future__ import absolute_import
+
+import threading
+
+
+# Stacks of the active sessions, per thread
+_local = threading.local()
+
+
+def get_session():
+    """Return the innermost active :py:class:`Session` of the calling thread,
+    ``None`` if there is none.
+    """
+    sessions = getattr(_local, "sessions", None)
+    return sessions[-1] if sessions else None
+
+
+class Session(object):
+    """Identity map of model instances, keyed by ``(table, hash_key,
+    range_key)``. Use it as a context manager. Sessions may be nested, the
+    innermost one is used.
+
+    :ivar hits: number of lookups served from memory
+    :ivar misses: number of lookups which needed a request
+    """
+    def __init__(self):
+        self.hits = 0
+        self.misses = 0
+        self._instances = {}
+
+    def __enter__(self):
+        sessions = getattr(_local, "sessions", None)
+        if sessions is None:
+            sessions = _local.sessions = []
+        sessions.append(self)
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        _local.sessions.remove(self)
+
+    def get(self, model, identity):
+        """Return the ``model`` instance held for ``identity``, ``None`` if
+        there is none. Counts a hit or a miss.
+
+        :param model: expected model class. Models sharing a table do not
+            share instances.
+        :param identity: ``(table, hash_key, range_key)`` with keys as
+            serialized by the model
+        """
+        instance = self._instances.get(identity)
+        if instance is None or type(instance) is not model:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return instance
+
+    def add(self, identity, instance):
+        """Hold ``instance`` for ``identity``, replacing any previous one."""
+        self._instances[identity] = instance
+
+    def discard(self, identity):
+        """Forget the instance held for ``identity``, if any."""
+        self._instances.pop(identity, None)
+
+    def clear(self):
+        """Forget all the instances. Counters are kept."""
+        self._instances.clear()
+
+    def __len__(self):
+        return len(self._instances)
+
+    def __repr__(self):
+        return "<Session of {} objects, {} hits, {} misses>".format(
+            len(self._instances), self.hits, self.misses)
@@ -0,0 +1,114 @@
+from __future__ import absolute_import
+
+import unittest
+import mock
+from decimal import Decimal
+
+from dynamodb2_mapper.batch import (chunks, backoff, imap, batch_get_chunk,
+    batch_write_chunk, BACKOFF_MAX, MAX_BATCH_RETRIES)
+from dynamodb2_mapper.exceptions import MaxRetriesExceededError
+
+
+class TestChunks(unittest.TestCase):
+    def test_chunks(self):
+        self.assertEqual([[0, 1, 2], [3, 4, 5], [6]], list(chunks(xrange(7), 3)))
+        self.assertEqual([], list(chunks([], 3)))
+
+    def test_lazy(self):
+        consumed = []
+        def keys():
+            for i in xrange(10):
+                consumed.append(i)
+                yield i
+        next(chunks(keys(), 3))
+        self.assertEqual([0, 1, 2], consumed)
+
+
+class TestBackoff(unittest.TestCase):
+    @mock.patch("dynamodb2_mapper.batch.time.sleep")
+    def test_backoff(self, m_sleep):
+        for attempt in xrange(20):
+            backoff(attempt)
+        delays = [c[0][0] for c in m_sleep.call_args_list]
+        self.assertTrue(all(0 <= delay <= BACKOFF_MAX for delay in delays))
+
+
+class TestBatchGetChunk(unittest.TestCase):
+    def test_ordered(self):
+        m_connection = mock.Mock()
+        # DynamoDB does not keep the keys order and normalizes numbers
+        m_connection.batch_get_item.return_value = {"Responses": {"player": [
+            {"id": {"N": "2"}, "name": {"S": u"duke"}},
+            {"id": {"N": "1.5"}, "name": {"S": u"doomguy"}},
+        ]}}
+
+        items = batch_get_chunk(m_connection, "player",
+                                [{"id": Decimal("1.50")}, {"id": 2}], ordered=True)
+
+        m_connection.batch_get_item.assert_called_once_with(request_items={"player": {
+            "Keys": [{"id": {"N": "1.50"}}, {"id": {"N": "2"}}]}})
+        self.assertEqual([u"doomguy", u"duke"], [item["name"] for item in items])
+        self.assertEqual(Decimal("1.5"), items[0]["id"])
+
+
+class TestBatchWriteChunk(unittest.TestCase):
+    @mock.patch("dynamodb2_mapper.batch.backoff")
+    def test_write(self, m_backoff):
+        m_connection = mock.Mock()
+        put = {"PutRequest": {"Item": {"id": {"N": "1"}, "tags": {"SS": [u"a"]}}}}
+        delete = {"DeleteRequest": {"Key": {"id": {"N": "2"}}}}
+        m_connection.batch_write_item.side_effect = [
+            {"UnprocessedItems": {"player": [delete]}},
+            {"UnprocessedItems": {}},
+        ]
+
+        batch_write_chunk(m_connection, "player",
+                          items=[{"id": 1, "tags": set([u"a"]), "name": None}],
+                          keys=[{"id": 2}])
+
+        self.assertEqual([mock.call(request_items={"player": [put, delete]}),
+                          mock.call(request_items={"player": [delete]})],
+                         m_connection.batch_write_item.call_args_list)
+        m_backoff.assert_called_once_with(0)
+
+    @mock.patch("dynamodb2_mapper.batch.backoff")
+    def test_max_retries(self, m_backoff):
+        m_connection = mock.Mock()
+        def batch_write_item(request_items):
+            return {"UnprocessedItems": request_items}
+        m_connection.batch_write_item.side_effect = batch_write_item
+
+        self.assertRaises(MaxRetriesExceededError, batch_write_chunk,
+                          m_connection, "player", keys=[{"id": 1}])
+        self.assertEqual(MAX_BATCH_RETRIES, m_connection.batch_write_item.call_count)
+
+
+class TestImap(unittest.TestCase):
+    def test_ordered(self):
+        self.assertEqual(range(0, 200, 2), list(imap(lambda x: 2 * x, xrange(100), 4)))
+
+    def test_unordered(self):
+        self.assertEqual(range(0, 200, 2),
+                         sorted(imap(lambda x: 2 * x, xrange(100), 4, ordered=False)))
+
+    def test_single_worker(self):
+        self.assertEqual([0, 2, 4], list(imap(lambda x: 2 * x, xrange(3), 1)))
+
+    def test_error(self):
+        def fail(x):
+            if x == 42:
+                raise KeyError(x)
+            return x
+        for ordered in (True, False):
+            self.assertRaises(KeyError, list, imap(fail, xrange(100), 4, ordered))
+
+    def test_bounded(self):
+        consumed = []
+        def items():
+            for i in xrange(1000):
+                consumed.append(i)
+                yield i
+        results = imap(lambda x: x, items(), 2)
+        next(results)
+        results.close()
+        self.assertLessEqual(len(consumed), 5)
@@ -0,0 +1,74 @@
+from __future__ import absolute_import
+
+import unittest
+from datetime import datetime
+from decimal import Decimal
+
+from dynamodb2_mapper.columns import numpy, ColumnBuffer, read_columns
+from dynamodb2_mapper.dates import parse_datetime
+
+
+def _decode_set(value):
+    return set(value) if value is not None else set()
+
+
+@unittest.skipIf(numpy is None, "NumPy is not installed")
+class TestColumns(unittest.TestCase):
+    def test_buffer_growth(self):
+        column = ColumnBuffer("int64", capacity=2)
+        column.extend([1, 2, 3])
+        column.extend([])
+        column.extend(range(4, 10))
+
+        array = column.to_array()
+
+        self.assertEqual(9, len(array))
+        self.assertEqual(numpy.dtype("int64"), array.dtype)
+        self.assertEqual(list(range(1, 10)), array.tolist())
+
+    def test_buffer_object(self):
+        column = ColumnBuffer(object)
+        column.extend([[1, 2], set([u"bfg"])])
+
+        array = column.to_array()
+
+        self.assertEqual((2,), array.shape)
+        self.assertEqual([1, 2], array[0])
+
+    def test_read_columns(self):
+        schema = {"id": int, "score": float, "alive": bool, "seen": datetime,
+                  "weapons": set}
+        decoders = {"id": int, "score": float, "alive": bool,
+                    "seen": parse_datetime, "weapons": _decode_set}
+        pages = [
+            [{"id": Decimal(1), "score": Decimal("1.5"), "alive": Decimal(1),
+              "seen": u"2012-05-31T14:00:00.000042+02:00", "weapons": set([u"bfg"])},
+             {"id": Decimal(0)}],
+            [],
+            [{"id": Decimal(2), "score": Decimal(3), "alive": Decimal(0),
+              "seen": u"2012-05-31T12:00:00.000000Z"}],
+        ]
+
+        columns = read_columns(pages, schema, decoders,
+                               ["id", "score", "alive", "seen", "weapons"],
+                               skip=lambda item: item["id"] == 0)
+
+        self.assertEqual([1, 2], columns["id"].tolist())
+        self.assertEqual(numpy.dtype("int64"), columns["id"].dtype)
+        self.assertEqual([1.5, 3.0], columns["score"].tolist())
+        self.assertEqual([True, False], columns["alive"].tolist())
+        self.assertEqual(numpy.dtype("datetime64[us]"), columns["seen"].dtype)
+        self.assertEqual(
+            [datetime(2012, 5, 31, 12, 0, 0, 42), datetime(2012, 5, 31, 12, 0, 0)],
+            columns["seen"].tolist())
+        self.assertEqual([set([u"bfg"]), set()], columns["weapons"].tolist())
+
+    def test_read_columns_missing(self):
+        schema = {"id": int, "score": float, "seen": datetime}
+        decoders = {"id": int, "score": float, "seen": parse_datetime}
+
+        columns = read_columns([[{}]], schema, decoders, ["id", "score", "seen"])
+
+        self.assertEqual([0], columns["id"].tolist())
+        self.assertTrue(numpy.isnan(columns["score"][0]))
+        self.assertTrue(numpy.isnat(columns["seen"][0]))
@@ -0,0 +1,75 @@
+# -*- coding: utf-8 -*-
+from __future__ import absolute_import
+
+import os
+import unittest
+from decimal import Decimal
+
+from boto.dynamodb.types import Binary
+
+from dynamodb2_mapper.compression import (Compressed, CODECS,
+    get_attribute_type, get_attribute_size)
+
+
+LONG_TEXT = u"Knee-deep in the Dead é" * 100
+
+
+class TestCompressed(unittest.TestCase):
+    def test_unknown_codec(self):
+        self.assertRaises(ValueError, Compressed, unicode, codec="snappy")
+
+    def test_small_value_stored_raw(self):
+        c = Compressed(unicode)
+        self.assertEqual(Binary(b"\x00Hangar"), c.compress(u"Hangar"))
+        self.assertEqual(u"Hangar", c.decompress(Binary(b"\x00Hangar")))
+
+    def test_roundtrip(self):
+        for codec in CODECS:
+            c = Compressed(unicode, codec=codec)
+            stored = c.compress(LONG_TEXT)
+            self.assertEqual(CODECS[codec][0], stored.value[:1])
+            self.assertLess(len(stored.value), len(LONG_TEXT) // 5)
+            self.assertEqual(LONG_TEXT, c.decompress(stored))
+
+    def test_any_codec_reads(self):
+        stored = Compressed(unicode, codec="bz2").compress(LONG_TEXT)
+        self.assertEqual(LONG_TEXT, Compressed(unicode).decompress(stored))
+
+    def test_stable(self):
+        c = Compressed(unicode)
+        self.assertEqual(c.compress(LONG_TEXT), c.compress(LONG_TEXT))
+
+    def test_incompressible_stored_raw(self):
+        data = os.urandom(2000)
+        c = Compressed(str, threshold=0)
+        stored = c.compress(data)
+        self.assertEqual(b"\x00", stored.value[:1])
+        self.assertEqual(data, c.decompress(stored))
+
+    def test_unknown_marker(self):
+        self.assertRaises(ValueError, Compressed().decompress, Binary(b"\xffdata"))
+
+    def test_validate(self):
+        self.assertEqual({"a": 1}, Compressed(dict)({"a": 1}))
+
+
+class TestAttributeSize(unittest.TestCase):
+    def test_type(self):
+        self.assertEqual("S", get_attribute_type(u"e1m1"))
+        self.assertEqual("B", get_attribute_type(Binary(b"e1m1")))
+        self.assertEqual("N", get_attribute_type(Decimal("4.2")))
+        self.assertEqual("SS", get_attribute_type(set([u"a"])))
+        self.assertEqual("NS", get_attribute_type(set([1])))
+        self.assertEqual("BOOL", get_attribute_type(True))
+        self.assertEqual("M", get_attribute_type({}))
+        self.assertRaises(TypeError, get_attribute_type, object())
+
+    def test_size(self):
+        self.assertEqual(6, get_attribute_size(u"ée1m1"))
+        self.assertEqual(4, get_attribute_size(Binary(b"e1m1")))
+        self.assertEqual(2, get_attribute_size(1))
+        self.assertEqual(4, get_attribute_size(Decimal("-100.25")))
+        self.assertEqual(1, get_attribute_size(False))
+        self.assertEqual(2, get_attribute_size(set([u"a", u"b"])))
+        self.assertEqual(3 + 3 + 2, get_attribute_size([1, True]))
+        self.assertEqual(3 + 1 + 1 + 1, get_attribute_size({u"a": u"b"}))
@@ -0,0 +1,96 @@
+from __future__ import absolute_import
+
+import pickle
+import unittest
+from datetime import datetime, timedelta
+
+from dynamodb2_mapper.dates import (utc_tz, get_fixed_offset, parse_datetime,
+    format_datetime)
+
+
+class TestFixedOffset(unittest.TestCase):
+    def test_shared_instances(self):
+        self.assertIs(utc_tz, get_fixed_offset(0))
+        self.assertIs(get_fixed_offset(90), get_fixed_offset(90))
+
+    def test_offset(self):
+        tz = get_fixed_offset(-330)
+        self.assertEqual(timedelta(minutes=-330), tz.utcoffset(None))
+        self.assertEqual("-05:30", tz.tzname(None))
+        self.assertEqual(timedelta(0), tz.dst(None))
+
+    def test_pickle(self):
+        d = datetime(2012, 5, 31, 12, 0, 0, tzinfo=get_fixed_offset(-330))
+        for protocol in xrange(pickle.HIGHEST_PROTOCOL + 1):
+            copy = pickle.loads(pickle.dumps(d, protocol))
+            self.assertEqual(d, copy)
+            self.assertIs(get_fixed_offset(-330), copy.tzinfo)
+
+
+class TestParseDatetime(unittest.TestCase):
+    def test_utc(self):
+        self.assertEqual(
+            datetime(2012, 5, 31, 12, 0, 0, 42, tzinfo=utc_tz),
+            parse_datetime("2012-05-31T12:00:00.000042+00:00"))
+        self.assertIs(utc_tz, parse_datetime("2012-05-31T12:00:00.000042+00:00").tzinfo)
+
+    def test_zulu(self):
+        self.assertEqual(
+            datetime(2010, 11, 1, 4, 0, 0, 13, tzinfo=utc_tz),
+            parse_datetime("2010-11-01T04:00:00.000013Z"))
+
+    def test_offsets(self):
+        d = parse_datetime("2012-05-31T12:00:00.000000+02:00")
+        self.assertEqual(datetime(2012, 5, 31, 10, 0, 0, tzinfo=utc_tz), d)
+        self.assertEqual(timedelta(hours=2), d.utcoffset())
+
+        d = parse_datetime("2012-05-31T12:00:00.000000-05:30")
+        self.assertEqual(datetime(2012, 5, 31, 17, 30, 0, tzinfo=utc_tz), d)
+
+    def test_short_fractions(self):
+        self.assertEqual(
+            datetime(2012, 5, 31, 12, 0, 0, tzinfo=utc_tz),
+            parse_datetime("2012-05-31T12:00:00.000Z"))
+        self.assertEqual(
+            datetime(2012, 5, 31, 12, 0, 0, 500000, tzinfo=utc_tz),
+            parse_datetime("2012-05-31T12:00:00.5+00:00"))
+        self.assertEqual(
+            datetime(2012, 5, 31, 12, 0, 0, 123000, tzinfo=utc_tz),
+            parse_datetime("2012-05-31T14:00:00.123+02:00"))
+
+    def test_no_fraction(self):
+        self.assertEqual(
+            datetime(2012, 5, 31, 12, 0, 0, tzinfo=utc_tz),
+            parse_datetime("2012-05-31T12:00:00+00:00"))
+        self.assertEqual(
+            datetime(2012, 5, 31, 12, 0, 0, tzinfo=utc_tz),
+            parse_datetime("2012-05-31T12:00:00Z"))
+
+    def test_invalid(self):
+        for value in ["2012-05-31T12:00:00.000000",
+                      "2012-05-31 12:00:00.000000+00:00",
+                      "2012-05-31T12:00:00.+00:00",
+                      "2012-05-31T12:00:00.0000001+00:00",
+                      "2012-05-31T12:00:00.000000+0000",
+                      "2012-05-31T12:00",
+                      "2012-13-31T12:00:00.000000+00:00",
+                      None]:
+            self.assertRaises(ValueError, parse_datetime, value)
+
+
+class TestFormatDatetime(unittest.TestCase):
+    def test_utc(self):
+        self.assertEqual(
+            "2012-05-31T12:00:00.000042+00:00",
+            format_datetime(datetime(2012, 5, 31, 12, 0, 0, 42, tzinfo=utc_tz)))
+
+    def test_converts_to_utc(self):
+        d = datetime(2012, 5, 31, 12, 0, 0, tzinfo=get_fixed_offset(-330))
+        self.assertEqual("2012-05-31T17:30:00.000000+00:00", format_datetime(d))
+
+    def test_round_trip(self):
+        d = datetime(1999, 12, 31, 23, 59, 59, 999999, tzinfo=get_fixed_offset(60))
+        self.assertEqual(d, parse_datetime(format_datetime(d)))
+
+    def test_naive(self):
+        self.assertRaises(ValueError, format_datetime, datetime(2012, 5, 31))
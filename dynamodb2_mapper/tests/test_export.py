@@ -0,0 +1,132 @@
+from __future__ import absolute_import
+
+import csv
+import gzip
+import json
+import os
+import shutil
+import tempfile
+import unittest
+from datetime import datetime
+
+import mock
+
+from dynamodb2_mapper.dates import utc_tz
+from dynamodb2_mapper.export import export_table, segment_path
+from dynamodb2_mapper.model import DynamoDBModel
+from dynamodb2_mapper.pages import Page
+
+
+class Player(DynamoDBModel):
+    __table__ = "player"
+    __hash_key__ = "id"
+    __schema__ = {
+        "id": int,
+        "name": unicode,
+        "weapons": set,
+        "seen": datetime,
+    }
+
+
+def _player(id):
+    return {"id": id, "name": u"Player %d" % id, "weapons": set([u"bfg", u"axe"]),
+            "seen": datetime(2012, 5, 31, 12, 0, 0, tzinfo=utc_tz)}
+
+
+# 3 pages per segment, cursors are page numbers
+def _scan_page(scan_filter, cursor=None, attributes=None, segment=None, total_segments=None,
+               as_dict=False):
+    page = int(cursor or 0)
+    segment = segment or 0
+    items = [_player(100 * segment + 10 * page + i) for i in xrange(2)]
+    return Page(items, str(page + 1) if page < 2 else None)
+
+
+class TestExport(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory)
+        self.path = os.path.join(self.directory, "players.jsonl")
+        self.checkpoint = os.path.join(self.directory, "players.checkpoint")
+        patcher = mock.patch.object(Player, "scan_page", side_effect=_scan_page)
+        self.m_scan_page = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def _read_jsonl(self, path, opener=open):
+        with opener(path, "rb") as f:
+            return [json.loads(line) for line in f]
+
+    def test_segment_path(self):
+        self.assertEqual("out.jsonl.gz", segment_path("out.jsonl.gz", None, None))
+        self.assertEqual(os.path.join("data", "out-0003.jsonl.gz"),
+                         segment_path(os.path.join("data", "out.jsonl.gz"), 3, 4))
+
+    def test_export_jsonl(self):
+        self.assertEqual(6, export_table(Player, self.path, checkpoint=self.checkpoint))
+
+        rows = self._read_jsonl(self.path)
+        self.assertEqual([0, 1, 10, 11, 20, 21], [row["id"] for row in rows])
+        self.assertEqual({"id": 0, "name": u"Player 0", "weapons": [u"axe", u"bfg"],
+                          "seen": u"2012-05-31T12:00:00+00:00"}, rows[0])
+        self.assertFalse(os.path.exists(self.checkpoint))
+
+    def test_export_csv_segments_gzip(self):
+        path = os.path.join(self.directory, "players.csv.gz")
+
+        self.assertEqual(12, export_table(Player, path, format="csv", compress=True,
+                                          segments=2, attributes=["name"]))
+
+        with gzip.open(os.path.join(self.directory, "players-0001.csv.gz"), "rb") as f:
+            lines = list(csv.reader(f))
+        self.assertEqual([["id", "name"], ["100", "Player 100"]], lines[:2])
+        self.assertEqual(7, len(lines))
+        self.assertEqual(["id", "name"], self.m_scan_page.call_args[1]["attributes"])
+
+    def test_resume(self):
+        error = IOError("killed")
+        self.m_scan_page.side_effect = [_scan_page(None), _scan_page(None, "1"), error]
+
+        self.assertRaises(IOError, export_table, Player, self.path, compress=True,
+                          checkpoint=self.checkpoint, checkpoint_every=1)
+
+        with open(self.checkpoint) as f:
+            saved = json.load(f)
+        self.assertEqual({"cursor": "2", "offset": os.path.getsize(self.path), "rows": 4,
+                          "done": False}, saved["segments"][0])
+
+        # rows written after the checkpoint are dropped
+        with open(self.path, "ab") as f:
+            f.write("garbage")
+        self.m_scan_page.side_effect = _scan_page
+
+        self.assertEqual(6, export_table(Player, self.path, compress=True,
+                                         checkpoint=self.checkpoint, checkpoint_every=1))
+
+        self.assertEqual("2", self.m_scan_page.call_args[1]["cursor"])
+        rows = self._read_jsonl(self.path, gzip.open)
+        self.assertEqual([0, 1, 10, 11, 20, 21], [row["id"] for row in rows])
+        self.assertFalse(os.path.exists(self.checkpoint))
+
+    def test_errors(self):
+        self.assertRaises(ValueError, export_table, Player, self.path, format="xml")
+
+        with open(self.checkpoint, "wb") as f:
+            json.dump({"table": "player", "format": "csv", "compress": False,
+                       "total_segments": None, "attributes": None, "scan_filter": None,
+                       "segments": []}, f)
+        self.assertRaises(ValueError, export_table, Player, self.path,
+                          checkpoint=self.checkpoint)
+
+    def test_resume_other_filter(self):
+        self.m_scan_page.side_effect = [_scan_page(None), IOError("killed")]
+        self.assertRaises(IOError, export_table, Player, self.path,
+                          checkpoint=self.checkpoint, checkpoint_every=1, name__ne=u"duke")
+        self.m_scan_page.side_effect = _scan_page
+
+        self.assertRaises(ValueError, export_table, Player, self.path,
+                          checkpoint=self.checkpoint, name__ne=u"doomguy")
+        self.assertRaises(ValueError, export_table, Player, self.path,
+                          checkpoint=self.checkpoint)
+        self.assertEqual(6, export_table(Player, self.path, checkpoint=self.checkpoint,
+                                         name__ne=u"duke"))
+        self.assertEqual("1", self.m_scan_page.call_args_list[-2][1]["cursor"])
@@ -0,0 +1,68 @@
+from __future__ import absolute_import
+
+import json
+import unittest
+from decimal import Decimal
+
+from dynamodb2_mapper import json_engines
+from dynamodb2_mapper.json_engines import (DEFAULT_ENGINE, STDLIB_ENGINE,
+    get_json_engine)
+
+
+DOCUMENT = {
+    "cacodemon": [
+        {"x": 10, "y": 20},
+        {"x": 10, "y": 30}
+    ],
+    "imp": [],
+    "cyberdemon": [],
+}
+
+
+class TestGetJsonEngine(unittest.TestCase):
+    def test_default(self):
+        self.assertIs(DEFAULT_ENGINE, get_json_engine(None))
+
+    def test_by_name(self):
+        self.assertIs(STDLIB_ENGINE, get_json_engine("json"))
+
+    def test_instance(self):
+        self.assertIs(STDLIB_ENGINE, get_json_engine(STDLIB_ENGINE))
+
+    def test_auto(self):
+        engine = get_json_engine("auto")
+        for name in json_engines.AUTO_PREFERENCE:
+            if name in json_engines._engines:
+                self.assertEqual(name, engine.name)
+                break
+
+    def test_unknown(self):
+        self.assertRaises(ValueError, get_json_engine, "yaml")
+
+
+class TestJsonEngines(unittest.TestCase):
+    def test_default_engine_is_canonical(self):
+        # key attributes rely on this exact representation
+        self.assertEqual(
+            json.dumps(DOCUMENT, sort_keys=True),
+            DEFAULT_ENGINE.dumps(DOCUMENT, sort_keys=True))
+
+    def test_round_trip_all_engines(self):
+        for engine in json_engines._engines.values():
+            self.assertEqual(DOCUMENT, engine.loads(engine.dumps(DOCUMENT, True)))
+            self.assertEqual(DOCUMENT, engine.loads(engine.dumps(DOCUMENT, False)))
+            # all engines read each other's output
+            self.assertEqual(DOCUMENT, engine.loads(DEFAULT_ENGINE.dumps(DOCUMENT, True)))
+
+    def test_sorted_output_all_engines(self):
+        for engine in json_engines._engines.values():
+            dumped = engine.dumps({"b": 1, "a": 2}, True)
+            self.assertTrue(dumped.index('"a"') < dumped.index('"b"'), engine)
+
+    @unittest.skipIf(DEFAULT_ENGINE is STDLIB_ENGINE, "simplejson is not installed")
+    def test_fallback(self):
+        # Neither ujson nor orjson natively support Decimal
+        for name in ("ujson", "orjson"):
+            engine = json_engines._engines.get(name)
+            if engine is not None:
+                self.assertEqual("[1.5]", engine.dumps([Decimal("1.5")], True))
@@ -0,0 +1,73 @@
+from __future__ import absolute_import
+
+import threading
+import time
+import unittest
+
+from dynamodb2_mapper.loader import BatchLoader
+
+
+def _wait_for(predicate, timeout=5):
+    deadline = time.time() + timeout
+    while not predicate():
+        if time.time() > deadline:
+            raise AssertionError("timed out")
+        time.sleep(0.001)
+
+
+class TestBatchLoader(unittest.TestCase):
+    def _load_all(self, loader, keys, results=None):
+        if results is None:
+            results = {}
+        def load(key):
+            try:
+                results.setdefault(key, []).append(loader.load(key))
+            except Exception as e:
+                results.setdefault(key, []).append(e)
+        threads = [threading.Thread(target=load, args=(key,)) for key in keys]
+        for thread in threads:
+            thread.start()
+        return threads, results
+
+    def test_single_key(self):
+        loader = BatchLoader(lambda keys: {key: key * 2 for key in keys}, window=0)
+        self.assertEqual(4, loader.load(2))
+        self.assertEqual(1, loader.batches)
+
+    def test_batching_and_coalescing(self):
+        fetched = []
+        release = threading.Event()
+        def fetch(keys):
+            fetched.append(sorted(keys))
+            release.wait()
+            return {key: key * 2 for key in keys if key != 3}
+        # the window only closes when the batch is full
+        loader = BatchLoader(fetch, window=60, max_batch=3)
+
+        threads, results = self._load_all(loader, [1, 2, 3])
+        _wait_for(lambda: fetched)
+        # the batch is being fetched, the same key is not requested again
+        more_threads, _ = self._load_all(loader, [1], results)
+        _wait_for(lambda: loader.coalesced)
+        release.set()
+        for thread in threads + more_threads:
+            thread.join()
+
+        self.assertEqual([[1, 2, 3]], fetched)
+        self.assertEqual({1: [2, 2], 2: [4], 3: [None]}, results)
+        self.assertEqual(4, loader.loads)
+        self.assertEqual(1, loader.batches)
+
+    def test_error(self):
+        def fetch(keys):
+            raise KeyError(keys[0])
+        loader = BatchLoader(fetch, window=60, max_batch=2)
+
+        threads, results = self._load_all(loader, [1, 2])
+        for thread in threads:
+            thread.join()
+
+        self.assertIsInstance(results[1][0], KeyError)
+        self.assertIs(results[1][0], results[2][0])
+        # nothing left in flight
+        self.assertEqual({}, loader._calls)
@@ -3,7 +3,7 @@ from __future__ import absolute_import
 import unittest
 
 from dynamodb_mapper.model import DynamoDBModel
-from dynamodb_mapper.migration import Migration, VersionError
+from dynamodb_mapper.migration import Migration, VersionError, NativeTypesMigration
 
 # test case: field rename rename
 class UserMigration(Migration):
@@ -48,6 +48,18 @@ class User(DynamoDBModel):
         "email": unicode
     }
 
+class Monster(DynamoDBModel):
+    __table__ = "monster"
+    __hash_key__ = "id"
+    __native_types__ = True
+    __migrator__ = NativeTypesMigration
+    __schema__ = {
+        "id": unicode,
+        "attacks": list,
+        "stats": dict,
+        "boss": bool,
+    }
+
 class TestMigration(unittest.TestCase):
     def test_init(self):
         # check migrator list + natural order sort
@@ -146,3 +158,57 @@ class TestMigration(unittest.TestCase):
         self.assertEquals(user._to_db_dict(), raw_data_version_11)
         # check the migrator engine is persisted (cache)
         assert isinstance(User.__migrator__, UserMigration)
+
+
+class TestNativeTypesMigration(unittest.TestCase):
+    raw_data_legacy = {
+        u"id": u"imp",
+        u"attacks": u'["fireball", "scratch"]',
+        u"stats": u'{"hp": 60}',
+        u"boss": 0,
+    }
+
+    raw_data_native = {
+        u"id": u"imp",
+        u"attacks": [u"fireball", u"scratch"],
+        u"stats": {u"hp": 60},
+        u"boss": False,
+    }
+
+    def test_version_detection(self):
+        m = NativeTypesMigration(Monster)
+        self.assertEquals(m._detect_version(self.raw_data_legacy), 1)
+        self.assertEquals(m._detect_version(self.raw_data_native), 2)
+        # missing attributes do not need any migration
+        self.assertEquals(m._detect_version({u"id": u"imp"}), 2)
+
+    def test_migration(self):
+        m = NativeTypesMigration(Monster)
+        raw_data = dict(self.raw_data_legacy)
+        self.assertEquals(m(raw_data), self.raw_data_native)
+        # input is left untouched for conflict detection
+        self.assertEquals(raw_data, self.raw_data_legacy)
+
+    def test_migrators_gathered_per_class(self):
+        class MonsterMigration(NativeTypesMigration):
+            def check_3(self, raw_data):
+                return False
+
+        NativeTypesMigration(Monster)
+        m = MonsterMigration(Monster)
+        self.assertEquals(m._detectors, ['check_3', 'check_2', 'check_1'])
+
+    def test_real_model_migration(self):
+        monster = Monster._from_db_dict(self.raw_data_legacy)
+        self.assertEquals(monster._raw_data, self.raw_data_legacy)
+        self.assertEquals(monster.attacks, [u"fireball", u"scratch"])
+        self.assertEquals(monster.stats, {u"hp": 60})
+        self.assertEquals(monster.boss, False)
+
+        monster.boss = True
+        self.assertEquals(monster._to_db_dict(), {
+            u"id": u"imp",
+            u"attacks": [u"fireball", u"scratch"],
+            u"stats": {u"hp": 60},
+            u"boss": True,
+        })
@@ -3,9 +3,17 @@ import unittest, mock
 from dynamodb_mapper.model import (ConnectionBorg, DynamoDBModel,
     autoincrement_int, MaxRetriesExceededError, MAX_RETRIES,
     ConflictError, _python_to_dynamodb, _dynamodb_to_python, UTC, utc_tz,
-    SchemaError, MAGIC_KEY, OverwriteError, InvalidRegionError,)
+    SchemaError, MAGIC_KEY, OverwriteError, InvalidRegionError,
+    _compile_decoder, _compile_encoder, _LazyAttribute, CompactRecord,)
+from dynamodb_mapper.json_engines import DEFAULT_ENGINE, STDLIB_ENGINE
+from dynamodb_mapper.compression import Compressed
+from dynamodb_mapper.exceptions import ProjectionError
+from dynamodb_mapper.session import Session
 from boto.exception import DynamoDBResponseError
-from boto.dynamodb.exceptions import DynamoDBConditionalCheckFailedError
+from boto.dynamodb.types import Binary
+from boto.dynamodb.exceptions import (DynamoDBConditionalCheckFailedError,
+                                      DynamoDBKeyNotFoundError)
+from boto.dynamodb2.exceptions import ConditionalCheckFailedException, QueryError
 from onctuous.validators import InRange, All, Length, Coerce
 from onctuous.errors import Invalid
 
@@ -89,6 +97,85 @@ class DoomMonsterMap(DynamoDBModel):
     }
 
 
+# unsorted json dict attribute
+class DoomMonsterMapUnsorted(DynamoDBModel):
+    __table__ = "doom_monster_map"
+    __hash_key__ = "map_id"
+    __json_engine__ = "json"
+    __json_sort_keys__ = False
+    __schema__ = {
+        "map_id": int,
+        "monsters": dict,
+    }
+
+
+# lazy loaded attributes
+class DoomMonsterMapLazy(DynamoDBModel):
+    __table__ = "doom_monster_map"
+    __hash_key__ = "map_id"
+    __lazy_load__ = True
+    __schema__ = {
+        "map_id": int,
+        "name": unicode,
+        "monsters": dict,
+    }
+
+
+# projections
+class DoomPlayer(DynamoDBModel):
+    __table__ = "doom_player"
+    __hash_key__ = "id"
+    __schema__ = {
+        "id": int,
+        "name": unicode,
+        "score": int,
+        "weapons": set,
+    }
+
+
+# compressed attributes
+class DoomReport(DynamoDBModel):
+    __table__ = "doom_report"
+    __hash_key__ = "id"
+    __schema__ = {
+        "id": int,
+        "title": unicode,
+        "body": Compressed(unicode, threshold=16),
+        "stats": Compressed(dict, threshold=16),
+    }
+
+
+# version key
+class DoomCampaignVersioned(DynamoDBModel):
+    __table__ = "doom_campaign"
+    __hash_key__ = "id"
+    __version_key__ = "version"
+    __schema__ = {
+        "id": int,
+        "name": unicode,
+        "version": int,
+    }
+
+
+# secondary indexes
+class DoomScore(DynamoDBModel):
+    __table__ = "doom_score"
+    __hash_key__ = "player_id"
+    __range_key__ = "date"
+    __indexes__ = {"by_score": "score"}
+    __global_indexes__ = {
+        "by_map": ("map_name", "score"),
+        "by_day": "day",
+    }
+    __schema__ = {
+        "player_id": int,
+        "date": datetime.datetime,
+        "day": unicode,
+        "map_name": unicode,
+        "score": int,
+    }
+
+
 # datetime.datetime hash key
 class Patch(DynamoDBModel):
     __table__ = "patch"
@@ -638,6 +725,10 @@ class TestTypeConversions(unittest.TestCase):
             datetime.datetime(2010, 11, 1, 4, 0, 0, 13, tzinfo=utc_tz),
             _dynamodb_to_python(datetime.datetime,
                                 "2010-11-01T04:00:00.000013Z"))
+        self.assertEqual(
+            datetime.datetime(2012, 05, 31, 10, 0, 0, 42, tzinfo=utc_tz),
+            _dynamodb_to_python(datetime.datetime,
+                                "2012-05-31T12:00:00.000042+02:00"))
 
     @mock.patch("dynamodb_mapper.model.datetime")
     def test_dynamodb_to_python_default(self, m_datetime):
@@ -660,6 +751,28 @@ class TestTypeConversions(unittest.TestCase):
             ValueError,
             _python_to_dynamodb, datetime.datetime(2012, 05, 31, 12, 0, 0))
 
+    def test_compiled_codecs_match_generic(self):
+        values = [
+            (int, 42),
+            (unicode, u"hello"),
+            (unicode, u""),
+            (set, set([1, 2])),
+            (bool, True),
+            (list, [1, {"a": 2}]),
+            (dict, {"b": [], "a": 1}),
+            (datetime.datetime, datetime.datetime(2012, 5, 31, 12, 0, 0, tzinfo=utc_tz)),
+        ]
+        for (schema_entry, value) in values:
+            encoded = _compile_encoder(schema_entry)(value)
+            self.assertEqual(_python_to_dynamodb(value), encoded)
+            if encoded is not None:
+                self.assertEqual(value, _compile_decoder(schema_entry)(encoded))
+
+    def test_compile_decoder_bad_schema(self):
+        # errors are deferred to load time, like the generic version
+        decode = _compile_decoder(set([1, 2, 3]))
+        self.assertRaises(SchemaError, decode, u"foo")
+
 
 class TestDynamoDBModel(unittest.TestCase):
     def setUp(self):
@@ -708,6 +821,308 @@ class TestDynamoDBModel(unittest.TestCase):
         self.assertEqual(d_dict["id"], d.id)
         self.assertEqual(d_dict["name"], d.name)
 
+    def test_codecs_compiled_once_per_class(self):
+        codecs = DoomEpisode._get_codecs()
+        self.assertIs(codecs, DoomEpisode._get_codecs())
+        self.assertEqual(set(DoomEpisode.__schema__), set(codecs[0]))
+        self.assertEqual(set(DoomEpisode.__schema__), set(codecs[1]))
+
+        # subclasses overriding the schema get their own tables
+        class DoomEpisodeExtra(DoomEpisode):
+            __schema__ = {
+                "id": int,
+                "name": unicode,
+                "extra": list,
+            }
+        self.assertIn("extra", DoomEpisodeExtra._get_codecs()[0])
+        self.assertNotIn("extra", DoomEpisode._get_codecs()[0])
+
+    def test_codecs_json_engine(self):
+        m_engine = mock.Mock()
+        m_engine.dumps.return_value = "{}"
+
+        e = DoomMonsterMapUnsorted(map_id=1, monsters={"imp": []})
+        self.assertIs(STDLIB_ENGINE, DoomMonsterMapUnsorted._get_codecs()[2])
+
+        with mock.patch.object(DoomMonsterMapUnsorted, "__json_engine__", m_engine):
+            # engine changed: tables are compiled again
+            self.assertIs(m_engine, DoomMonsterMapUnsorted._get_codecs()[2])
+            e._to_db_dict()
+
+        m_engine.dumps.assert_called_once_with({"imp": []}, False)
+
+    def test_codecs_json_engine_borg(self):
+        ConnectionBorg().set_json_engine("json")
+        try:
+            self.assertIs(STDLIB_ENGINE, DoomMonsterMap._get_codecs()[2])
+        finally:
+            ConnectionBorg().set_json_engine(None)
+        self.assertIs(DEFAULT_ENGINE, DoomMonsterMap._get_codecs()[2])
+
+    def test_codecs_json_keys_always_sorted(self):
+        class GameReportUnsorted(GameReport):
+            __json_sort_keys__ = False
+            __json_engine__ = "json"
+
+        players = [{"name": "duke", "id": 1}]
+        encoded = GameReportUnsorted._get_codecs()[1]["player_ids"](players)
+        self.assertEqual(json.dumps(players, sort_keys=True), encoded)
+
+    def test_codecs_native_types(self):
+        class DoomMonsterNative(DoomMonster):
+            __native_types__ = True
+
+        attacks = [{'name': 'fireball', 'damage': 10}]
+        m = DoomMonsterNative(id=1, attacks=attacks)
+        self.assertEqual({"id": 1, "attacks": attacks}, m._to_db_dict())
+
+        # both native and legacy representations are loaded
+        self.assertEqual(
+            attacks, DoomMonsterNative._from_db_dict({"id": 1, "attacks": attacks}).attacks)
+        self.assertEqual(
+            attacks, DoomMonsterNative._from_db_dict(
+                {"id": 1, "attacks": json.dumps(attacks)}).attacks)
+
+    def test_codecs_native_types_bool(self):
+        class DoomCampaignStatusNative(DoomCampaignStatus):
+            __native_types__ = True
+
+        encoders = DoomCampaignStatusNative._get_codecs()[1]
+        self.assertIs(True, encoders["completed"](True))
+        self.assertIs(False, encoders["completed"](False))
+        self.assertEqual(1, DoomCampaignStatus._get_codecs()[1]["completed"](True))
+
+    @mock.patch("dynamodb_mapper.model.ConnectionBorg.get_table")
+    @mock.patch("dynamodb_mapper.model.Item")
+    def test_native_types_bool_raise_on_conflict(self, m_item, m_get_table):
+        class DoomCampaignStatusNative(DoomCampaignStatus):
+            __native_types__ = True
+
+        c = DoomCampaignStatusNative._from_db_dict({"id": 1, "completed": False})
+        expected = {"id": 1, "completed": {"Value": {"BOOL": False}}, "name": False}
+
+        c.name = u"Knee-deep in the Dead"
+        c.save(raise_on_conflict=True)
+        m_item.return_value.put.assert_called_once_with(expected)
+
+        c = DoomCampaignStatusNative._from_db_dict({"id": 1, "completed": False})
+        c.delete(raise_on_conflict=True)
+        m_item.return_value.delete.assert_called_once_with(expected)
+        self.assertEqual({}, c._raw_data)
+
+    def test_codecs_native_types_keys(self):
+        class GameReportNative(GameReport):
+            __native_types__ = True
+
+        players = ["duke", "doomguy"]
+        encoded = GameReportNative._get_codecs()[1]["player_ids"](players)
+        self.assertEqual(json.dumps(players, sort_keys=True), encoded)
+
+    def test_build_from_db_dict_lazy(self):
+        monsters = {"imp": [{"x": 10, "y": 20}]}
+        raw_data = {"map_id": 1, "monsters": json.dumps(monsters)}
+
+        e = DoomMonsterMapLazy._from_db_dict(raw_data)
+        self.assertEqual(raw_data, e._raw_data)
+        # nothing decoded yet
+        self.assertNotIn("monsters", e.__dict__)
+        self.assertNotIn("name", e.__dict__)
+
+        self.assertEqual(monsters, e.monsters)
+        self.assertEqual(monsters, e.__dict__["monsters"])
+        self.assertIs(e.monsters, e.monsters) # decoded once
+        self.assertEqual(u"", e.name)
+        self.assertEqual(1, e.map_id)
+
+        e.name = u"Hell"
+        self.assertEqual(u"Hell", e.name)
+        self.assertEqual(
+            {"map_id": 1, "name": u"Hell", "monsters": json.dumps(monsters, sort_keys=True)},
+            e._to_db_dict())
+
+    def test_build_from_db_dict_lazy_decode_on_access_only(self):
+        m_decode = mock.Mock(return_value={})
+        DoomMonsterMapLazy._get_codecs()
+        with mock.patch.object(DoomMonsterMapLazy, "monsters",
+                               _LazyAttribute("monsters", m_decode)):
+            e = DoomMonsterMapLazy._from_db_dict({"map_id": 1, "monsters": "{}"})
+            e.map_id
+            self.assertFalse(m_decode.called)
+            e.monsters
+            m_decode.assert_called_once_with("{}")
+
+    def test_init_lazy(self):
+        # instances not loaded from the DB are unaffected
+        e = DoomMonsterMapLazy(map_id=1)
+        self.assertEqual(1, e.map_id)
+        self.assertIsNone(e.monsters)
+
+    def test_compressed_roundtrip(self):
+        stats = {"kills": range(100)}
+        body = u"Hangar " * 100
+        r = DoomReport(id=1, title=u"E1M1", body=body, stats=stats)
+
+        raw_data = r._to_db_dict()
+        self.assertIsInstance(raw_data["body"], Binary)
+        self.assertEqual(b"\x01", raw_data["body"].value[:1])
+        self.assertLess(len(raw_data["body"].value), len(body))
+        self.assertEqual(u"E1M1", raw_data["title"])
+
+        r2 = DoomReport._from_db_dict(raw_data)
+        # compressed attributes are decompressed on access only
+        self.assertEqual(u"E1M1", r2.title)
+        self.assertNotIn("body", r2.__dict__)
+        self.assertEqual([], r2._get_dirty_fields())
+        self.assertEqual(body, r2.body)
+        self.assertEqual(stats, r2.stats)
+        self.assertEqual([], r2._get_dirty_fields())
+
+        r2.body = u"Nuclear Plant"
+        self.assertEqual(["body"], r2._get_dirty_fields())
+
+    def test_compressed_empty(self):
+        r = DoomReport(id=1, title=u"", body=u"", stats={})
+        self.assertNotIn("body", r._to_db_dict())
+        self.assertNotIn("stats", r._to_db_dict())
+
+        r2 = DoomReport._from_db_dict({"id": 1})
+        self.assertEqual(u"", r2.body)
+        self.assertEqual({}, r2.stats)
+
+    def test_compressed_legacy_value(self):
+        # stored before the attributes were compressed
+        r = DoomReport._from_db_dict({"id": 1, "body": u"Hangar", "stats": '{"kills": 1}'})
+        self.assertEqual(u"Hangar", r.body)
+        self.assertEqual({"kills": 1}, r.stats)
+        self.assertEqual(set(["body", "stats"]), set(r._get_dirty_fields()))
+
+    def test_compressed_key(self):
+        class BadReport(DoomReport):
+            __schema__ = {"id": Compressed(unicode)}
+
+        self.assertRaises(SchemaError, BadReport._get_codecs)
+
+    def test_size_report(self):
+        body = u"Hangar " * 100
+        r = DoomReport(id=1, title=u"E1M1", body=body, stats={})
+        report = r.size_report()
+
+        self.assertEqual({"size": 2 + 2, "uncompressed_size": 2 + 2},
+                         report["attributes"]["id"])
+        self.assertEqual({"size": 5 + 4, "uncompressed_size": 5 + 4},
+                         report["attributes"]["title"])
+        self.assertEqual(4 + len(body), report["attributes"]["body"]["uncompressed_size"])
+        self.assertLess(report["attributes"]["body"]["size"], 100)
+        self.assertNotIn("stats", report["attributes"])
+        self.assertEqual(
+            sum(a["size"] for a in report["attributes"].values()), report["size"])
+        self.assertEqual(
+            sum(a["uncompressed_size"] for a in report["attributes"].values()),
+            report["uncompressed_size"])
+
+    def test_compact_class(self):
+        compact_cls = DoomCampaign.compact_class()
+        self.assertIs(compact_cls, DoomCampaign.compact_class())
+        self.assertTrue(issubclass(compact_cls, CompactRecord))
+        self.assertEqual(("cheats", "id", "name"), compact_cls.__fields__)
+        self.assertIs(DoomCampaign, compact_cls.__model__)
+
+    def test_compact_from_db_dict(self):
+        raw_data = {"id": 1, "cheats": set(["iddqd"])}
+        c = DoomCampaign.compact_class()._from_db_dict(raw_data)
+
+        self.assertFalse(hasattr(c, "__dict__"))
+        self.assertEqual((set(["iddqd"]), 1, None), c._raw_values)
+        self.assertEqual(raw_data, c._raw_data)
+        self.assertEqual(1, c.id)
+        self.assertEqual(u"", c.name)
+        self.assertEqual(set(["iddqd"]), c.cheats)
+        self.assertEqual({"id": 1, "name": u"", "cheats": ["iddqd"]}, c.to_json_dict())
+
+    def test_compact_to_model(self):
+        raw_data = {"id": 1, "name": u"Knee-deep in the Dead"}
+        c = DoomCampaign.compact_class()._from_db_dict(raw_data)
+        c.name = u"The Shores of Hell"
+
+        d = c.to_model()
+        self.assertIsInstance(d, DoomCampaign)
+        self.assertEqual(raw_data, d._raw_data)
+        self.assertEqual(u"The Shores of Hell", d.name)
+        self.assertEqual(set(), d.cheats)
+
+    def test_compact_save(self):
+        def save(instance, raise_on_conflict=False, partial=None):
+            instance._raw_data = instance._to_db_dict()
+
+        c = DoomCampaign.compact_class()._from_db_dict({"id": 1})
+        c.name = u"The Shores of Hell"
+
+        with mock.patch.object(DoomCampaign, "save", autospec=True) as m_save:
+            m_save.side_effect = save
+            c.save(raise_on_conflict=True)
+
+        self.assertEqual(1, m_save.call_count)
+        self.assertEqual({"id": 1, "name": u"The Shores of Hell"}, c._raw_data)
+
+    @mock.patch("dynamodb_mapper.model.ConnectionBorg._get_connection")
+    def test_get_batch_compact(self, m_get_connection):
+        m_get_connection.return_value.batch_get_item.return_value = {
+            "Responses": {"doom_episode": [{"id": {"N": "1"}, "name": {"S": u"Hangar"}}]}}
+
+        res = DoomEpisode.get_batch([1], compact=True)
+        self.assertIsInstance(res[0], DoomEpisode.compact_class())
+        self.assertEqual(u"Hangar", res[0].name)
+
+    def test_validators_cached(self):
+        validators = SchemaValidators._get_validators()
+        self.assertIs(validators, SchemaValidators._get_validators())
+        self.assertEqual(set(SchemaValidators.__schema__), set(validators[1]))
+
+    def test_dirty_fields(self):
+        e = SchemaValidators._from_db_dict({
+            "name": u"Jean-Tiare",
+            "age": 22,
+            "scores": json.dumps([1, 2], sort_keys=True),
+        })
+        self.assertEqual([], e._get_dirty_fields())
+
+        e.age = 23
+        e.scores.append(3)
+        self.assertEqual(["age", "scores"], sorted(e._get_dirty_fields()))
+
+        # new objects are all dirty
+        self.assertEqual(
+            sorted(SchemaValidators.__schema__),
+            sorted(SchemaValidators()._get_dirty_fields()))
+
+    def test_dirty_fields_lazy(self):
+        e = DoomMonsterMapLazy._from_db_dict({"map_id": 1, "monsters": "{}"})
+        self.assertEqual([], e._get_dirty_fields())
+        # untouched attributes were not decoded
+        self.assertNotIn("monsters", e.__dict__)
+
+        e.name = u"Hell"
+        self.assertEqual(["name"], e._get_dirty_fields())
+
+    def test_validate_dirty_only(self):
+        e = SchemaValidators._from_db_dict({
+            "name": u"Jean-Tiare",
+            "age": 22,
+        })
+        e.age = 23
+
+        m_validator = mock.Mock(return_value=23)
+        field_validators = dict(SchemaValidators._get_validators()[1], age=m_validator)
+        with mock.patch.object(SchemaValidators, "_get_validators",
+                               return_value=(None, field_validators)):
+            data = e.validate(dirty_only=True)
+
+        m_validator.assert_called_once_with(23)
+        self.assertEqual({"name": u"Jean-Tiare", "age": 23, "scores": []}, data)
+
+        e.age = -1
+        self.assertRaises(Invalid, e.validate, dirty_only=True)
+
     def test_build_from_db_dict_autoinc(self):
         d_dict = {"id": 1, "text": "toto"}
         d = LogEntry._from_db_dict(d_dict)
@@ -916,6 +1331,153 @@ class TestDynamoDBModel(unittest.TestCase):
         m_table.get_item.assert_called_once_with(
             hash_key=1, range_key="Knee-deep in the dead", consistent_read=False)
 
+    @mock.patch("dynamodb_mapper.model.ConnectionBorg.get_table")
+    def test_get_attributes(self, m_get_table):
+        m_table = m_get_table.return_value
+        m_table.get_item.return_value = {"id": 1, "score": 42}
+
+        p = DoomPlayer.get(1, attributes=["score"])
+
+        m_table.get_item.assert_called_once_with(
+            hash_key=1, range_key=None, consistent_read=False,
+            attributes_to_get=["id", "score"])
+        self.assertEqual(frozenset(["id", "score"]), p._projection)
+        self.assertEqual(42, p.score)
+        self.assertEqual(u"", p.name)
+
+    @mock.patch("dynamodb_mapper.model.ConnectionBorg.get_table")
+    def test_get_session(self, m_get_table):
+        m_table = m_get_table.return_value
+        m_table.get_item.side_effect = lambda **kwargs: {"id": kwargs["hash_key"], "name": u"Doom"}
+
+        with Session() as session:
+            p = DoomPlayer.get(1)
+            self.assertIs(p, DoomPlayer.get(1))
+            self.assertEqual(1, m_table.get_item.call_count)
+
+            # bypass the session
+            self.assertIsNot(p, DoomPlayer.get(1, attributes=["name"]))
+            fresh = DoomPlayer.get(1, consistent_read=True)
+            self.assertIsNot(p, fresh)
+            self.assertIs(fresh, DoomPlayer.get(1))
+            # other model, same keys
+            self.assertIsInstance(DoomEpisode.get(1), DoomEpisode)
+
+            self.assertEqual(4, m_table.get_item.call_count)
+            self.assertEqual(2, session.hits)
+            self.assertEqual(2, session.misses)
+
+        DoomPlayer.get(1)
+        self.assertEqual(5, m_table.get_item.call_count)
+
+    @mock.patch("dynamodb_mapper.model.ConnectionBorg._get_connection")
+    def test_get_batch_session(self, m_get_connection):
+        def batch_get_item(request_items):
+            keys = request_items["doom_map"]["Keys"]
+            return {"Responses": {"doom_map": keys[::-1]}}
+        m_batch_get_item = m_get_connection.return_value.batch_get_item
+        m_batch_get_item.side_effect = batch_get_item
+
+        with Session() as session:
+            first = DoomMap.get_batch([(1, u"Hangar")])
+            res = DoomMap.get_batch([(1, u"Nuclear Plant"), (1, u"Hangar"), (2, u"Deimos Lab")],
+                                    ordered=True)
+
+            self.assertEqual([u"Nuclear Plant", u"Hangar", u"Deimos Lab"], [m.name for m in res])
+            self.assertIs(first[0], res[1])
+            self.assertEqual(
+                [{"episode_id": {"N": "1"}, "name": {"S": u"Nuclear Plant"}},
+                 {"episode_id": {"N": "2"}, "name": {"S": u"Deimos Lab"}}],
+                m_batch_get_item.call_args[1]["request_items"]["doom_map"]["Keys"])
+
+            res = DoomMap.get_batch([(2, u"Deimos Lab"), (1, u"Hangar")])
+            self.assertEqual(set([u"Hangar", u"Deimos Lab"]), set(m.name for m in res))
+            self.assertEqual(2, m_batch_get_item.call_count)
+            self.assertEqual(3, session.hits)
+            self.assertEqual(3, session.misses)
+
+    @mock.patch("dynamodb_mapper.model.Item")
+    @mock.patch("dynamodb_mapper.model.ConnectionBorg.get_table")
+    def test_save_delete_session(self, m_get_table, m_item):
+        m_table = m_get_table.return_value
+        m_table.get_item.return_value = {"id": 1}
+
+        with Session() as session:
+            p = DoomPlayer(id=1, name=u"Doomguy", score=0, weapons=set([u"bfg"]))
+            p.save()
+            self.assertIs(p, DoomPlayer.get(1))
+            self.assertFalse(m_table.get_item.called)
+
+            p.delete()
+            self.assertEqual(0, len(session))
+            DoomPlayer.get(1)
+            self.assertTrue(m_table.get_item.called)
+
+    @mock.patch("dynamodb_mapper.model.ConnectionBorg.get_table")
+    @mock.patch("dynamodb_mapper.model.ConnectionBorg._get_connection")
+    def test_get_batch_window(self, m_get_connection, m_get_table):
+        class DoomMapBatched(DoomMap):
+            __batch_get_window__ = 0
+
+        m_batch_get_item = m_get_connection.return_value.batch_get_item
+        m_batch_get_item.return_value = {"Responses": {"doom_map": [
+            {"episode_id": {"N": "1"}, "name": {"S": u"Hangar"}, "world": {"S": u"Phobos"}}]}}
+
+        m = DoomMapBatched.get(1, u"Hangar")
+
+        self.assertEqual(u"Phobos", m.world)
+        m_batch_get_item.assert_called_once_with(request_items={"doom_map": {"Keys": [
+            {"episode_id": {"N": "1"}, "name": {"S": u"Hangar"}}]}})
+        self.assertEqual(1, DoomMapBatched._get_batch_loader().batches)
+        self.assertIsNone(DoomMap.__dict__.get("_batch_loader"))
+
+        self.assertRaises(DynamoDBKeyNotFoundError, DoomMapBatched.get, 1, u"Toxin Refinery")
+
+        DoomMapBatched.get(1, u"Hangar", consistent_read=True)
+        self.assertEqual(2, m_batch_get_item.call_count)
+        m_get_table.return_value.get_item.assert_called_once_with(
+            hash_key=1, range_key=u"Hangar", consistent_read=True)
+
+    @mock.patch("dynamodb_mapper.model.ConnectionBorg.get_table")
+    def test_query_scan_as_dict(self, m_get_table):
+        m_table = m_get_table.return_value
+        m_table.query.return_value = [{"id": 1, "weapons": set([u"bfg"])}]
+        m_table.scan.return_value = [{"id": 1, "name": u"Doomguy", "score": 42}]
+
+        res = list(DoomPlayer.query(1, as_dict=True))
+        self.assertEqual(
+            [{"id": 1, "name": u"", "score": 0, "weapons": set([u"bfg"])}], res)
+        self.assertIs(type(res[0]), dict)
+
+        res = list(DoomPlayer.scan(as_dict=True, attributes=["score"]))
+        self.assertEqual([{"id": 1, "score": 42}], res)
+
+        res = list(DoomPlayer.scan(as_dict=True, raw=True))
+        self.assertEqual([{"id": 1, "name": u"Doomguy", "score": 42}], res)
+
+    @mock.patch("dynamodb_mapper.model.ConnectionBorg._get_connection")
+    def test_get_batch_as_dict(self, m_get_connection):
+        m_get_connection.return_value.batch_get_item.return_value = {"Responses": {"doom_monster": [
+            {"id": {"N": "1"}, "attacks": {"S": u'["claw"]'}}]}}
+
+        self.assertEqual([{"id": 1, "attacks": [u"claw"]}],
+                         DoomMonster.get_batch([1], as_dict=True))
+        self.assertEqual([{"id": 1, "attacks": u'["claw"]'}],
+                         DoomMonster.get_batch([1], as_dict=True, raw=True))
+        # no model instance in the session
+        with Session() as session:
+            DoomMonster.get_batch([1], as_dict=True)
+            self.assertEqual(0, len(session))
+
+    def test_get_attributes_unknown(self):
+        self.assertRaises(SchemaError, DoomPlayer.get, 1, attributes=["frags"])
+
+    def test_projection_keys(self):
+        self.assertEqual(frozenset(["episode_id", "name"]), DoomMap._get_projection([]))
+        self.assertEqual(frozenset(["id", "version"]),
+                         DoomCampaignVersioned._get_projection(["version"]))
+        self.assertIsNone(DoomMap._get_projection(None))
+
     @mock.patch("dynamodb_mapper.model.ConnectionBorg.get_table")
     def test_get_by_hash_key_magic_types(self, m_get_table):
         m_table = m_get_table.return_value
@@ -1061,6 +1623,152 @@ class TestDynamoDBModel(unittest.TestCase):
         self.assertRaises(ConflictError, c.save, raise_on_conflict=True)
         m_item_instance.put.assert_called_with({"id": 1, "name": name, "cheats": False})
 
+    @mock.patch("dynamodb_mapper.model.Item")
+    @mock.patch("dynamodb_mapper.model.ConnectionBorg.get_table")
+    def test_save_raise_on_conflict_keeps_raw_data(self, m_get_table, m_item):
+        raw_data = {"id": 1, "name": u"Knee-deep in the Dead"}
+        c = DoomCampaign._from_db_dict(dict(raw_data))
+        c.save(raise_on_conflict=True)
+
+        m_item.return_value.put.assert_called_with(
+            {"id": 1, "name": u"Knee-deep in the Dead", "cheats": False})
+        self.assertEqual(raw_data, c._raw_data)
+
+    @mock.patch("dynamodb_mapper.model.Item")
+    @mock.patch("dynamodb_mapper.model.ConnectionBorg._get_connection")
+    def test_save_projection(self, m_get_connection, m_item):
+        m_update_item = m_get_connection.return_value.update_item
+        p = DoomPlayer._get_row_factory(projection=frozenset(["id", "name"]))(
+            {"id": 1, "name": u"doomguy"})
+        p.name = u"duke"
+
+        p.save(raise_on_conflict=True)
+
+        # score and weapons were not loaded: they are neither written nor expected
+        m_update_item.assert_called_once_with(
+            "doom_player",
+            {"id": {"N": "1"}},
+            {"name": {"Action": "PUT", "Value": {"S": u"duke"}}},
+            expected={"name": {"Value": {"S": u"doomguy"}}})
+        self.assertFalse(m_item.called)
+        self.assertEqual({"id": 1, "name": u"duke"}, p._raw_data)
+        self.assertEqual(["id", "name"], sorted(p._get_expected_values()))
+
+    @mock.patch("dynamodb_mapper.model.ConnectionBorg.get_table")
+    def test_save_projection_full(self, m_get_table):
+        p = DoomPlayer._get_row_factory(projection=frozenset(["id", "name"]))(
+            {"id": 1, "name": u"doomguy"})
+        self.assertRaises(ProjectionError, p.save, partial=False)
+
+        p.id = 2
+        self.assertRaises(ProjectionError, p.save)
+
+    @mock.patch("dynamodb_mapper.model.Item")
+    @mock.patch("dynamodb_mapper.model.ConnectionBorg.get_table")
+    def test_save_version_key(self, m_get_table, m_item):
+        c = DoomCampaignVersioned(id=1, name=u"Knee-deep in the Dead")
+        c.save(raise_on_conflict=True)
+        self.assertEqual(1, c.version)
+        m_item.return_value.put.assert_called_with({"id": False})
+
+        c.name = u"The Shores of Hell"
+        c.save(raise_on_conflict=True)
+        self.assertEqual(2, c.version)
+        m_item.assert_called_with(
+            mock.ANY, attrs={"id": 1, "name": u"The Shores of Hell", "version": 2})
+        m_item.return_value.put.assert_called_with({"version": 1})
+
+    @mock.patch("dynamodb_mapper.model.Item")
+    @mock.patch("dynamodb_mapper.model.ConnectionBorg.get_table")
+    def test_save_version_key_conflict(self, m_get_table, m_item):
+        m_item.return_value.put.side_effect = DynamoDBResponseError(
+            None, None, {"__type": "ConditionalCheckFailedException"})
+
+        c = DoomCampaignVersioned._from_db_dict({"id": 1, "version": 3})
+        self.assertRaises(ConflictError, c.save, raise_on_conflict=True)
+        m_item.return_value.put.assert_called_with({"version": 3})
+        # version is restored on failure
+        self.assertEqual(3, c.version)
+        self.assertEqual({"id": 1, "version": 3}, c._raw_data)
+
+    @mock.patch("dynamodb_mapper.model.ConnectionBorg._get_connection")
+    def test_save_partial_version_key(self, m_get_connection):
+        m_update_item = m_get_connection.return_value.update_item
+
+        c = DoomCampaignVersioned._from_db_dict({"id": 1, "version": 3})
+        c.name = u"The Shores of Hell"
+        c.save(raise_on_conflict=True, partial=True)
+
+        m_update_item.assert_called_once_with(
+            "doom_campaign",
+            {"id": {"N": "1"}},
+            {
+                "name": {"Action": "PUT", "Value": {"S": u"The Shores of Hell"}},
+                "version": {"Action": "PUT", "Value": {"N": "4"}},
+            },
+            expected={"version": {"Value": {"N": "3"}}})
+
+    def test_version_key_not_in_schema(self):
+        class BadVersion(DoomEpisode):
+            __version_key__ = "version"
+
+        self.assertRaises(SchemaError, BadVersion._get_codecs)
+
+    @mock.patch("dynamodb_mapper.model.Item")
+    @mock.patch("dynamodb_mapper.model.ConnectionBorg._get_connection")
+    def test_save_partial(self, m_get_connection, m_item):
+        m_update_item = m_get_connection.return_value.update_item
+
+        c = DoomCampaign._from_db_dict({"id": 1, "name": u"Knee-deep in the Dead"})
+        c.name = u"The Shores of Hell"
+        c.cheats = set(["iddqd"])
+        c.save(partial=True)
+
+        self.assertFalse(m_item.called)
+        m_update_item.assert_called_once_with(
+            "doom_campaign",
+            {"id": {"N": "1"}},
+            {
+                "name": {"Action": "PUT", "Value": {"S": u"The Shores of Hell"}},
+                "cheats": {"Action": "PUT", "Value": {"SS": [u"iddqd"]}},
+            })
+        self.assertEqual(
+            {"id": 1, "name": u"The Shores of Hell", "cheats": set(["iddqd"])},
+            c._raw_data)
+
+    @mock.patch("dynamodb_mapper.model.ConnectionBorg._get_connection")
+    def test_save_partial_raise_on_conflict(self, m_get_connection):
+        m_update_item = m_get_connection.return_value.update_item
+        m_update_item.side_effect = ConditionalCheckFailedException(400, "mock")
+
+        c = DoomCampaign._from_db_dict({"id": 1, "name": u"Knee-deep in the Dead"})
+        c.name = u""
+        c.cheats = set(["iddqd"])
+
+        self.assertRaises(ConflictError, c.save, raise_on_conflict=True, partial=True)
+        m_update_item.assert_called_once_with(
+            "doom_campaign",
+            {"id": {"N": "1"}},
+            {
+                "name": {"Action": "DELETE"},
+                "cheats": {"Action": "PUT", "Value": {"SS": [u"iddqd"]}},
+            },
+            expected={
+                "name": {"Value": {"S": u"Knee-deep in the Dead"}},
+                "cheats": {"Exists": False},
+            })
+        # still reflects the DB state
+        self.assertEqual({"id": 1, "name": u"Knee-deep in the Dead"}, c._raw_data)
+
+    @mock.patch("dynamodb_mapper.model.Item")
+    @mock.patch("dynamodb_mapper.model.ConnectionBorg._get_connection")
+    def test_save_partial_new_object(self, m_get_connection, m_item):
+        # nothing to compare with: full write
+        DoomCampaign(id=1, name=u"Knee-deep in the Dead", cheats=set([u"iddqd"])).save(partial=True)
+
+        self.assertFalse(m_get_connection.return_value.update_item.called)
+        m_item.return_value.put.assert_called_once_with({})
+
     @mock.patch("dynamodb_mapper.model.Item")
     @mock.patch("dynamodb_mapper.model.boto")
     def test_save_raise_on_conflict_boolean(self, m_boto, m_item):
@@ -1119,59 +1827,185 @@ class TestDynamoDBModel(unittest.TestCase):
 
         self.assertRaises(DynamoDBResponseError, c.save)
 
-    @mock.patch("dynamodb_mapper.model.boto")
-    def test_get_batch_hash_key(self, m_boto):
-        # paging function/generator is done by real db tests
+    @mock.patch("dynamodb_mapper.model.ConnectionBorg._get_connection")
+    def test_get_batch_hash_key(self, m_get_connection):
         KEYS = range(2)
         DATA = [{
-                    u"id": 0,
-                    u"name": u"The level with cute cats",
+                    u"id": {"N": "0"},
+                    u"name": {"S": u"The level with cute cats"},
                 },
                 {
-                    u"id": 1,
-                    u"name": u"The level with horrible monsters",
+                    u"id": {"N": "1"},
+                    u"name": {"S": u"The level with horrible monsters"},
                 }]
 
-        m_table = m_boto.connect_dynamodb.return_value.get_table.return_value
-        m_table.batch_get_item.return_value = DATA
+        m_batch_get_item = m_get_connection.return_value.batch_get_item
+        m_batch_get_item.return_value = {"Responses": {"doom_episode": DATA}}
 
-        res = DoomEpisode.get_batch(KEYS);
+        res = DoomEpisode.get_batch(KEYS, ordered=True)
 
-        m_table.batch_get_item.assert_called_with(KEYS)
+        m_batch_get_item.assert_called_with(request_items={
+            "doom_episode": {"Keys": [{"id": {"N": "0"}}, {"id": {"N": "1"}}]}})
         self.assertEqual(2, len(res))
-        self.assertEqual(DATA[0][u'id'], res[0].id)
-        self.assertEqual(DATA[0][u'name'], res[0].name)
-        self.assertEqual(DATA[1][u'id'], res[1].id)
-        self.assertEqual(DATA[1][u'name'], res[1].name)
+        self.assertEqual(0, res[0].id)
+        self.assertEqual(u"The level with cute cats", res[0].name)
+        self.assertEqual(1, res[1].id)
+        self.assertEqual(u"The level with horrible monsters", res[1].name)
 
     @mock.patch("dynamodb_mapper.model.ConnectionBorg")
     def test_get_batch_hash_range_key(self, m_borg):
         KEYS = [(1, u"The level with cute cats"),
                 (2, u"The level with horrible monsters")]
         DATA = [{
-                    u"episode_id": 1,
-                    u"name": u"The level with cute cats",
-                    u"world": u"Heaven",
+                    u"episode_id": {"N": "1"},
+                    u"name": {"S": u"The level with cute cats"},
+                    u"world": {"S": u"Heaven"},
                 },
                 {
-                    u"episode_id": 2,
-                    u"name": u"The level with horrible monsters",
-                    u"world": u"Hell",
+                    u"episode_id": {"N": "2"},
+                    u"name": {"S": u"The level with horrible monsters"},
+                    u"world": {"S": u"Hell"},
                 }]
 
-        m_table = m_borg.return_value.get_table.return_value
-        m_table.batch_get_item.return_value = DATA
+        m_batch_get_item = m_borg.return_value._get_connection.return_value.batch_get_item
+        # DynamoDB does not keep the keys order
+        m_batch_get_item.return_value = {"Responses": {"doom_map": DATA[::-1]}}
 
-        res = DoomMap.get_batch(KEYS)
+        res = DoomMap.get_batch(KEYS, ordered=True)
 
-        m_table.batch_get_item.assert_called_with(KEYS)
+        m_batch_get_item.assert_called_with(request_items={"doom_map": {"Keys": [
+            {"episode_id": {"N": "1"}, "name": {"S": u"The level with cute cats"}},
+            {"episode_id": {"N": "2"}, "name": {"S": u"The level with horrible monsters"}},
+        ]}})
         self.assertEqual(2, len(res))
-        self.assertEqual(DATA[0][u'episode_id'], res[0].episode_id)
-        self.assertEqual(DATA[0][u'name'], res[0].name)
-        self.assertEqual(DATA[0][u'world'], res[0].world)
-        self.assertEqual(DATA[1][u'episode_id'], res[1].episode_id)
-        self.assertEqual(DATA[1][u'name'], res[1].name)
-        self.assertEqual(DATA[1][u'world'], res[1].world)
+        self.assertEqual(1, res[0].episode_id)
+        self.assertEqual(u"The level with cute cats", res[0].name)
+        self.assertEqual(u"Heaven", res[0].world)
+        self.assertEqual(2, res[1].episode_id)
+        self.assertEqual(u"The level with horrible monsters", res[1].name)
+        self.assertEqual(u"Hell", res[1].world)
+
+    @mock.patch("dynamodb_mapper.batch.backoff")
+    @mock.patch("dynamodb_mapper.model.ConnectionBorg._get_connection")
+    def test_get_batch_chunks_and_retries(self, m_get_connection, m_backoff):
+        def batch_get_item(request_items):
+            keys = request_items["doom_episode"]["Keys"]
+            if len(keys) == 1:
+                return {"Responses": {"doom_episode": keys}}
+            # throttled: the first key is left unprocessed
+            return {
+                "Responses": {"doom_episode": keys[1:]},
+                "UnprocessedKeys": {"doom_episode": {"Keys": keys[:1]}},
+            }
+        m_batch_get_item = m_get_connection.return_value.batch_get_item
+        m_batch_get_item.side_effect = batch_get_item
+
+        res = list(DoomEpisode.get_batch_iter(xrange(250), max_workers=1))
+
+        self.assertEqual(range(250), sorted(e.id for e in res))
+        # 3 chunks, each of them retried once
+        self.assertEqual(6, m_batch_get_item.call_count)
+        self.assertEqual(3, m_backoff.call_count)
+        chunk_sizes = [len(c[1]["request_items"]["doom_episode"]["Keys"])
+                       for c in m_batch_get_item.call_args_list]
+        self.assertEqual([100, 1, 100, 1, 50, 1], chunk_sizes)
+
+    @mock.patch("dynamodb_mapper.batch.backoff")
+    @mock.patch("dynamodb_mapper.model.ConnectionBorg._get_connection")
+    def test_save_batch(self, m_get_connection, m_backoff):
+        def batch_write_item(request_items):
+            requests = request_items["doom_campaign"]
+            if len(requests) == 1:
+                return {}
+            # throttled: the first item is left unprocessed
+            return {"UnprocessedItems": {"doom_campaign": requests[:1]}}
+        m_batch_write_item = m_get_connection.return_value.batch_write_item
+        m_batch_write_item.side_effect = batch_write_item
+
+        campaigns = [DoomCampaignVersioned(id=i, name=u"Campaign %d" % i) for i in xrange(30)]
+        campaigns[0] = DoomCampaignVersioned._from_db_dict(
+            {"id": 0, "name": u"Knee-deep in the Dead", "version": 3})
+
+        with Session() as session:
+            DoomCampaignVersioned.save_batch(iter(campaigns), max_workers=1)
+
+            self.assertIs(campaigns[29], DoomCampaignVersioned.get(29))
+            self.assertEqual(30, len(session))
+
+        # 2 chunks, each of them retried once
+        chunk_sizes = [len(c[1]["request_items"]["doom_campaign"])
+                       for c in m_batch_write_item.call_args_list]
+        self.assertEqual([25, 1, 5, 1], chunk_sizes)
+        self.assertEqual(2, m_backoff.call_count)
+        self.assertEqual(
+            {"PutRequest": {"Item": {"id": {"N": "0"}, "name": {"S": u"Knee-deep in the Dead"},
+                                     "version": {"N": "4"}}}},
+            m_batch_write_item.call_args_list[0][1]["request_items"]["doom_campaign"][0])
+        # versions are bumped, but not checked
+        self.assertEqual([4, 1], [campaigns[0].version, campaigns[1].version])
+        self.assertEqual({"id": 1, "name": u"Campaign 1", "version": 1}, campaigns[1]._raw_data)
+        self.assertEqual([], campaigns[1]._get_dirty_fields())
+
+    @mock.patch("dynamodb_mapper.model.ConnectionBorg._get_connection")
+    def test_save_batch_errors(self, m_get_connection):
+        m_batch_write_item = m_get_connection.return_value.batch_write_item
+
+        self.assertRaises(SchemaError, LogEntry.save_batch, [LogEntry(text=u"Hangar")])
+        partial = DoomPlayer._get_row_factory(projection=frozenset(["id", "score"]))(
+            {"id": 1, "score": 42})
+        self.assertRaises(ProjectionError, DoomPlayer.save_batch, [partial])
+        self.assertFalse(m_batch_write_item.called)
+
+    @mock.patch("dynamodb_mapper.model.ConnectionBorg._get_connection")
+    def test_delete_batch(self, m_get_connection):
+        m_batch_write_item = m_get_connection.return_value.batch_write_item
+        m_batch_write_item.return_value = {}
+        hangar = DoomMap._from_db_dict({"episode_id": 1, "name": u"Hangar"})
+
+        with Session() as session:
+            session.add(hangar._get_instance_identity(), hangar)
+            DoomMap.delete_batch([hangar, (1, u"Nuclear Plant")])
+            self.assertEqual(0, len(session))
+
+        m_batch_write_item.assert_called_once_with(request_items={"doom_map": [
+            {"DeleteRequest": {"Key": {"episode_id": {"N": "1"}, "name": {"S": u"Hangar"}}}},
+            {"DeleteRequest": {"Key": {"episode_id": {"N": "1"},
+                                       "name": {"S": u"Nuclear Plant"}}}},
+        ]})
+        self.assertEqual({}, hangar._raw_data)
+
+    @mock.patch("dynamodb_mapper.model.ConnectionBorg._get_connection")
+    def test_get_batch_parallel_ordered(self, m_get_connection):
+        def batch_get_item(request_items):
+            keys = request_items["doom_episode"]["Keys"]
+            return {"Responses": {"doom_episode": keys[::-1]}}
+        m_get_connection.return_value.batch_get_item.side_effect = batch_get_item
+
+        res = DoomEpisode.get_batch(range(1000), max_workers=4, ordered=True)
+        self.assertEqual(range(1000), [e.id for e in res])
+
+    @mock.patch("dynamodb_mapper.model.ConnectionBorg._get_connection")
+    def test_get_batch_attributes(self, m_get_connection):
+        m_batch_get_item = m_get_connection.return_value.batch_get_item
+        m_batch_get_item.return_value = {"Responses": {"doom_player": [
+            {"id": {"N": "1"}, "score": {"N": "42"}}]}}
+
+        res = DoomPlayer.get_batch([1], attributes=["score"], compact=True)
+
+        m_batch_get_item.assert_called_once_with(request_items={"doom_player": {
+            "Keys": [{"id": {"N": "1"}}], "AttributesToGet": ["id", "score"]}})
+        self.assertEqual(42, res[0].score)
+        self.assertEqual(frozenset(["id", "score"]), res[0]._projection)
+        self.assertEqual(frozenset(["id", "score"]), res[0].to_model()._projection)
+
+    @mock.patch("dynamodb_mapper.batch.backoff")
+    @mock.patch("dynamodb_mapper.model.ConnectionBorg._get_connection")
+    def test_get_batch_max_retries(self, m_get_connection, m_backoff):
+        m_get_connection.return_value.batch_get_item.return_value = {
+            "Responses": {},
+            "UnprocessedKeys": {"doom_episode": {"Keys": [{"id": {"N": "1"}}]}},
+        }
+        self.assertRaises(MaxRetriesExceededError, DoomEpisode.get_batch, [1])
 
     @mock.patch("dynamodb_mapper.model.ConnectionBorg.get_table")
     def test_query(self, m_get_table):
@@ -1209,6 +2043,392 @@ class TestDynamoDBModel(unittest.TestCase):
 
         m_table.scan.assert_called_with(scan_filter)
 
+    @mock.patch("dynamodb_mapper.model.ConnectionBorg._get_connection")
+    def test_query_page(self, m_get_connection):
+        from boto.dynamodb import condition
+        m_query = m_get_connection.return_value.query
+        last_key = {"episode_id": {"N": "1"}, "name": {"S": u"Hangar"}}
+        m_query.side_effect = [
+            {"Items": [{"episode_id": {"N": "1"}, "name": {"S": u"Hangar"}}],
+             "LastEvaluatedKey": last_key},
+            {"Items": [{"episode_id": {"N": "1"}, "name": {"S": u"Nuclear Plant"}}]},
+        ]
+
+        page = DoomMap.query_page(1, condition.GT(u"A"), limit=1)
+        self.assertEqual([u"Hangar"], [m.name for m in page])
+        self.assertIsNotNone(page.cursor)
+
+        # resume, possibly in another process
+        page = DoomMap.query_page(1, condition.GT(u"A"), limit=1, cursor=str(page.cursor))
+        self.assertEqual([u"Nuclear Plant"], [m.name for m in page])
+        self.assertIsNone(page.cursor)
+
+        key_conditions = {
+            "episode_id": {"AttributeValueList": [{"N": "1"}], "ComparisonOperator": "EQ"},
+            "name": {"AttributeValueList": [{"S": u"A"}], "ComparisonOperator": "GT"},
+        }
+        self.assertEqual([
+            mock.call("doom_map", key_conditions, exclusive_start_key=None, limit=1),
+            mock.call("doom_map", key_conditions, exclusive_start_key=last_key, limit=1),
+        ], m_query.call_args_list)
+
+    @mock.patch("dynamodb_mapper.model.ConnectionBorg._get_connection")
+    def test_query_global_index(self, m_get_connection):
+        m_query = m_get_connection.return_value.query
+        last_key = {"player_id": {"N": "1"}, "map_name": {"S": u"E1M1"}}
+        m_query.side_effect = [
+            {"Items": [{"player_id": {"N": "1"}, "map_name": {"S": u"E1M1"}, "score": {"N": "120"}}],
+             "LastEvaluatedKey": last_key},
+            {"Items": [{"player_id": {"N": "2"}, "map_name": {"S": u"E1M1"}, "score": {"N": "100"}}]},
+        ]
+
+        res = list(DoomScore.query(index="by_map", map_name__eq=u"E1M1", score__gte=100,
+                                   reverse=True))
+
+        self.assertEqual([1, 2], [s.player_id for s in res])
+        self.assertEqual([120, 100], [s.score for s in res])
+        key_conditions = {
+            "map_name": {"AttributeValueList": [{"S": u"E1M1"}], "ComparisonOperator": "EQ"},
+            "score": {"AttributeValueList": [{"N": "100"}], "ComparisonOperator": "GE"},
+        }
+        self.assertEqual([
+            mock.call("doom_score", key_conditions, exclusive_start_key=None,
+                      scan_index_forward=False, index_name="by_map"),
+            mock.call("doom_score", key_conditions, exclusive_start_key=last_key,
+                      scan_index_forward=False, index_name="by_map"),
+        ], m_query.call_args_list)
+
+    @mock.patch("dynamodb_mapper.model.ConnectionBorg._get_connection")
+    def test_query_local_index_limit(self, m_get_connection):
+        m_query = m_get_connection.return_value.query
+        m_query.side_effect = [
+            {"Items": [{"player_id": {"N": "1"}, "score": {"N": "10"}},
+                       {"player_id": {"N": "1"}, "score": {"N": "20"}}],
+             "LastEvaluatedKey": {"player_id": {"N": "1"}, "score": {"N": "20"}}},
+            {"Items": [{"player_id": {"N": "1"}, "score": {"N": "30"}}],
+             "LastEvaluatedKey": {"player_id": {"N": "1"}, "score": {"N": "30"}}},
+        ]
+
+        res = list(DoomScore.query(1, index="by_score", score__between=(10, 50), limit=3))
+
+        self.assertEqual([10, 20, 30], [s.score for s in res])
+        self.assertEqual(2, m_query.call_count)
+        self.assertEqual(1, m_query.call_args[1]["limit"])
+        self.assertEqual({
+            "player_id": {"AttributeValueList": [{"N": "1"}], "ComparisonOperator": "EQ"},
+            "score": {"AttributeValueList": [{"N": "10"}, {"N": "50"}],
+                      "ComparisonOperator": "BETWEEN"},
+        }, m_query.call_args[0][1])
+
+    @mock.patch("dynamodb_mapper.model.ConnectionBorg._get_connection")
+    def test_query_conditions_encoding(self, m_get_connection):
+        m_query = m_get_connection.return_value.query
+        m_query.return_value = {"Items": []}
+        date = datetime.datetime(2015, 6, 1, 12, tzinfo=utc_tz)
+
+        self.assertEqual([], list(DoomScore.query(player_id__eq=1, date__lt=date)))
+
+        self.assertEqual(
+            {"AttributeValueList": [{"S": "2015-06-01T12:00:00.000000+00:00"}],
+             "ComparisonOperator": "LT"},
+            m_query.call_args[0][1]["date"])
+        self.assertNotIn("index_name", m_query.call_args[1])
+
+    def test_query_conditions_errors(self):
+        from boto.dynamodb import condition
+        self.assertRaises(QueryError, DoomScore.query, 1, index="unknown")
+        self.assertRaises(QueryError, DoomScore.query, player_id__lt=1)
+        self.assertRaises(QueryError, DoomScore.query, 1, index="by_score", score__ne=1)
+        self.assertRaises(QueryError, DoomScore.query, 1, date__ne=1)
+        self.assertRaises(QueryError, DoomScore.query, 1, unknown__eq=1)
+        self.assertRaises(QueryError, DoomScore.query, 1, player_id__eq=1)
+        self.assertRaises(QueryError, DoomScore.query, 1, score=1)
+        self.assertRaises(QueryError, DoomScore.query, 1, index="by_score", score__between=(1,))
+        self.assertRaises(QueryError, DoomScore.query, index="by_day", day__eq=u"monday",
+                          range_key_condition=condition.GT(1))
+
+    @mock.patch("dynamodb_mapper.model.ConnectionBorg._get_connection")
+    def test_query_scan_prefetch(self, m_get_connection):
+        m_query = m_get_connection.return_value.query
+        m_query.side_effect = [
+            {"Items": [{"episode_id": {"N": "1"}, "name": {"S": u"Hangar"}}],
+             "LastEvaluatedKey": {"episode_id": {"N": "1"}, "name": {"S": u"Hangar"}}},
+            {"Items": [{"episode_id": {"N": "1"}, "name": {"S": u"Nuclear Plant"}}]},
+        ]
+        m_scan = m_get_connection.return_value.scan
+        m_scan.return_value = {"Items": [{"id": {"N": str(MAGIC_KEY)}}, {"id": {"N": "2"}}]}
+
+        res = list(DoomMap.query(1, prefetch=2))
+
+        self.assertEqual([u"Hangar", u"Nuclear Plant"], [m.name for m in res])
+        self.assertEqual(2, m_query.call_count)
+        self.assertEqual([2], [e.id for e in LogEntry.scan(prefetch=1)])
+
+    @mock.patch("dynamodb_mapper.model.Throttle")
+    @mock.patch("dynamodb_mapper.model.ConnectionBorg._get_connection")
+    def test_scan_read_ratio(self, m_get_connection, m_throttle):
+        m_connection = m_get_connection.return_value
+        m_connection.describe_table.return_value = {
+            "Table": {"ProvisionedThroughput": {"ReadCapacityUnits": 100}}}
+        m_request = m_throttle.return_value.request
+        m_request.return_value = {"Items": [{"id": {"N": "1"}}]}
+
+        self.assertEqual([1], [e.id for e in DoomEpisode.scan(read_ratio=0.25)])
+        m_throttle.assert_called_once_with(25.0)
+        m_request.assert_called_once_with(
+            m_connection.scan, "doom_episode", exclusive_start_key=None)
+
+        # segments share the capacity
+        m_throttle.reset_mock()
+        self.assertEqual(4, len(list(DoomEpisode.scan(read_ratio=0.5, segments=4))))
+        self.assertEqual([mock.call(12.5)] * 4, m_throttle.call_args_list)
+
+        self.assertRaises(ValueError, DoomEpisode.scan, read_ratio=0)
+        self.assertRaises(ValueError, DoomEpisode.scan, read_ratio=1.5)
+        m_connection.describe_table.return_value = {
+            "Table": {"ProvisionedThroughput": {"ReadCapacityUnits": 0}}}
+        self.assertRaises(ValueError, DoomEpisode.scan, read_ratio=0.5)
+
+    @mock.patch("dynamodb_mapper.model.read_columns")
+    @mock.patch("dynamodb_mapper.model.ConnectionBorg._get_connection")
+    def test_query_scan_columns(self, m_get_connection, m_read_columns):
+        m_query = m_get_connection.return_value.query
+        m_query.return_value = {"Items": [{"score": {"N": "42"}}, {"score": {"N": "7"}}]}
+        m_scan = m_get_connection.return_value.scan
+        m_scan.return_value = {"Items": [
+            {"id": {"N": str(MAGIC_KEY)}},
+            {"id": {"N": "1"}, "text": {"S": u"Hangar"}},
+        ]}
+        def read_columns(pages, schema, decoders, fields, skip=None):
+            return [item for page in pages for item in page if not (skip and skip(item))]
+        m_read_columns.side_effect = read_columns
+
+        res = DoomScore.query_columns(["score"], 1, map_name__eq=u"E1M1", limit=1)
+
+        self.assertEqual([{"score": 42}], res)
+        self.assertEqual(["score"], m_query.call_args[1]["attributes_to_get"])
+        # map_name is filtered: the limit applies to the filtered items
+        self.assertNotIn("limit", m_query.call_args[1])
+        self.assertEqual(["score"], m_read_columns.call_args[0][3])
+
+        res = LogEntry.scan_columns(["text"])
+
+        self.assertEqual([{"id": 1, "text": u"Hangar"}], res)
+        self.assertEqual(["id", "text"], m_scan.call_args[1]["attributes_to_get"])
+        self.assertEqual(["text"], m_read_columns.call_args[0][3])
+
+        self.assertRaises(SchemaError, LogEntry.scan_columns, ["text", "nope"])
+
+    @mock.patch("dynamodb_mapper.model.ConnectionBorg._get_connection")
+    def test_query_filter(self, m_get_connection):
+        m_query = m_get_connection.return_value.query
+        m_query.return_value = {"Items": [{"player_id": {"N": "1"}, "map_name": {"S": u"E1M1"}}]}
+
+        res = list(DoomScore.query(1, map_name__in=[u"E1M1", u"E1M2"], score__gt=10))
+
+        self.assertEqual([u"E1M1"], [s.map_name for s in res])
+        m_query.assert_called_once_with(
+            "doom_score",
+            {"player_id": {"AttributeValueList": [{"N": "1"}], "ComparisonOperator": "EQ"}},
+            exclusive_start_key=None,
+            query_filter={
+                "map_name": {"AttributeValueList": [{"S": u"E1M1"}, {"S": u"E1M2"}],
+                             "ComparisonOperator": "IN"},
+                "score": {"AttributeValueList": [{"N": "10"}], "ComparisonOperator": "GT"},
+            })
+
+    @mock.patch("dynamodb_mapper.model.ConnectionBorg._get_connection")
+    def test_scan_filters(self, m_get_connection):
+        from boto.dynamodb import condition
+        m_scan = m_get_connection.return_value.scan
+        m_scan.return_value = {"Items": [{"id": {"N": "1"}, "weapons": {"SS": [u"bfg"]}}]}
+
+        res = list(DoomPlayer.scan({"score": condition.GT(10)}, weapons__contains=u"bfg",
+                                   name__null=False))
+
+        self.assertEqual([set([u"bfg"])], [p.weapons for p in res])
+        m_scan.assert_called_once_with("doom_player", exclusive_start_key=None, scan_filter={
+            "score": {"AttributeValueList": [{"N": "10"}], "ComparisonOperator": "GT"},
+            "weapons": {"AttributeValueList": [{"S": u"bfg"}], "ComparisonOperator": "CONTAINS"},
+            "name": {"ComparisonOperator": "NOT_NULL"},
+        })
+
+    @mock.patch("dynamodb_mapper.model.ConnectionBorg._get_connection")
+    def test_scan_filters_autoincrement(self, m_get_connection):
+        m_scan = m_get_connection.return_value.scan
+        m_scan.return_value = {"Items": [{"id": {"N": str(MAGIC_KEY)}},
+                                         {"id": {"N": "2"}, "text": {"S": u"BFG found"}}]}
+
+        res = list(LogEntry.scan(text__beginswith=u"BFG"))
+
+        self.assertEqual([2], [e.id for e in res])
+        self.assertEqual(
+            {"text": {"AttributeValueList": [{"S": u"BFG"}], "ComparisonOperator": "BEGINS_WITH"}},
+            m_scan.call_args[1]["scan_filter"])
+
+    @mock.patch("dynamodb_mapper.model.ConnectionBorg._get_connection")
+    def test_scan_page_count_filters(self, m_get_connection):
+        m_scan = m_get_connection.return_value.scan
+        m_scan.return_value = {"Items": [], "Count": 0, "ScannedCount": 5}
+        scan_filter = {"score": {"AttributeValueList": [{"N": "0"}], "ComparisonOperator": "NE"}}
+
+        self.assertEqual([], list(DoomPlayer.scan_page(score__ne=0)))
+        self.assertEqual(scan_filter, m_scan.call_args[1]["scan_filter"])
+
+        self.assertEqual(0, DoomPlayer.scan_count(score__ne=0, segments=2))
+        self.assertEqual(scan_filter, m_scan.call_args[1]["scan_filter"])
+
+    def test_filters_errors(self):
+        from boto.dynamodb import condition
+        self.assertRaises(QueryError, DoomPlayer.scan, name__eq=u"")
+        self.assertRaises(QueryError, DoomPlayer.scan, name__in=[])
+        self.assertRaises(QueryError, DoomPlayer.scan, name__like=u"doom%")
+        self.assertRaises(QueryError, DoomPlayer.scan, {"score": condition.GT(10)}, score__lt=100)
+
+    @mock.patch("dynamodb_mapper.model.ConnectionBorg._get_connection")
+    def test_query_index_page_count(self, m_get_connection):
+        m_query = m_get_connection.return_value.query
+        m_query.return_value = {"Items": [{"player_id": {"N": "1"}, "day": {"S": u"monday"}}],
+                                "Count": 1, "ScannedCount": 1}
+        key_conditions = {
+            "day": {"AttributeValueList": [{"S": u"monday"}], "ComparisonOperator": "EQ"}}
+
+        page = DoomScore.query_page(u"monday", index="by_day", limit=5)
+        self.assertEqual([1], [s.player_id for s in page])
+        m_query.assert_called_with("doom_score", key_conditions, exclusive_start_key=None,
+                                   limit=5, index_name="by_day")
+
+        self.assertEqual(1, DoomScore.query_count(index="by_day", day__eq=u"monday"))
+        m_query.assert_called_with(
+            "doom_score", select="COUNT", return_consumed_capacity="TOTAL",
+            exclusive_start_key=None, key_conditions=key_conditions, index_name="by_day")
+
+    @mock.patch("dynamodb_mapper.model.ConnectionBorg._get_connection")
+    def test_scan_page(self, m_get_connection):
+        m_scan = m_get_connection.return_value.scan
+        m_scan.return_value = {
+            "Items": [{"id": {"N": str(MAGIC_KEY)}}, {"id": {"N": "2"}}],
+            "LastEvaluatedKey": {"id": {"N": "2"}},
+        }
+
+        page = LogEntry.scan_page(limit=2, segment=1, total_segments=4)
+
+        self.assertEqual([2], [e.id for e in page])
+        m_scan.assert_called_once_with("log_entry", exclusive_start_key=None,
+                                       segment=1, total_segments=4, limit=2)
+
+        LogEntry.scan_page(cursor=page.cursor)
+        m_scan.assert_called_with("log_entry", exclusive_start_key={"id": {"N": "2"}})
+
+    @mock.patch("dynamodb_mapper.model.ConnectionBorg._get_connection")
+    def test_query_count(self, m_get_connection):
+        m_query = m_get_connection.return_value.query
+        m_query.return_value = {"Count": 42, "ScannedCount": 42,
+                                "ConsumedCapacity": {"CapacityUnits": 1.5}}
+
+        count = DoomMap.query_count(1)
+
+        self.assertEqual(42, count)
+        self.assertEqual(1.5, count.consumed_capacity)
+        m_query.assert_called_once_with(
+            "doom_map", select="COUNT", return_consumed_capacity="TOTAL",
+            exclusive_start_key=None, key_conditions={
+                "episode_id": {"AttributeValueList": [{"N": "1"}], "ComparisonOperator": "EQ"}})
+
+    @mock.patch("dynamodb_mapper.model.ConnectionBorg._get_connection")
+    def test_scan_count_segments(self, m_get_connection):
+        m_scan = m_get_connection.return_value.scan
+        m_scan.return_value = {"Count": 10, "ScannedCount": 12,
+                               "ConsumedCapacity": {"CapacityUnits": 1.0}}
+
+        count = DoomEpisode.scan_count(segments=4, max_workers=2)
+
+        self.assertEqual(40, count)
+        self.assertEqual(48, count.scanned_count)
+        self.assertEqual(4.0, count.consumed_capacity)
+        self.assertEqual([0, 1, 2, 3], sorted(c[1]["segment"] for c in m_scan.call_args_list))
+
+    @mock.patch("dynamodb_mapper.model.ConnectionBorg._get_connection")
+    def test_scan_count_autoincrement(self, m_get_connection):
+        m_scan = m_get_connection.return_value.scan
+        m_scan.return_value = {"Count": 1, "ScannedCount": 2}
+
+        self.assertEqual(1, LogEntry.scan_count())
+
+        self.assertEqual(
+            {"id": {"AttributeValueList": [{"N": str(MAGIC_KEY)}], "ComparisonOperator": "NE"}},
+            m_scan.call_args[1]["scan_filter"])
+
+    def test_page_invalid_cursor(self):
+        self.assertRaises(ValueError, DoomEpisode.scan_page, cursor="garbage")
+
+    @mock.patch("dynamodb_mapper.model.ConnectionBorg.get_table")
+    def test_query_scan_attributes(self, m_get_table):
+        m_table = m_get_table.return_value
+        m_table.query.return_value = [{"episode_id": 1, "name": u"Hangar"}]
+        m_table.scan.return_value = [{"episode_id": 1, "name": u"Hangar"}]
+
+        res = list(DoomMap.query(1, attributes=[]))
+        self.assertEqual(["episode_id", "name"], m_table.query.call_args[1]["attributes_to_get"])
+        self.assertEqual(frozenset(["episode_id", "name"]), res[0]._projection)
+
+        res = list(DoomMap.scan(attributes=["world"]))
+        m_table.scan.assert_called_with(None, attributes_to_get=["episode_id", "name", "world"])
+        self.assertEqual(frozenset(["episode_id", "name", "world"]), res[0]._projection)
+
+    @mock.patch("dynamodb_mapper.model.ConnectionBorg._get_connection")
+    def test_scan_segments(self, m_get_connection):
+        def scan(table_name, exclusive_start_key=None, segment=None, total_segments=None, **kwargs):
+            self.assertEqual(3, total_segments)
+            if exclusive_start_key is None:
+                return {
+                    "Items": [{"id": {"N": str(segment)}}],
+                    "LastEvaluatedKey": {"id": {"N": str(segment)}},
+                }
+            return {"Items": [{"id": {"N": str(10 + segment)}}]}
+        m_scan = m_get_connection.return_value.scan
+        m_scan.side_effect = scan
+
+        from boto.dynamodb import condition
+        res = list(DoomEpisode.scan(
+            {"name": condition.BEGINS_WITH(u"level")}, segments=3, max_workers=2))
+
+        self.assertEqual([0, 1, 2, 10, 11, 12], sorted(e.id for e in res))
+        self.assertTrue(all(isinstance(e, DoomEpisode) for e in res))
+        self.assertEqual(6, m_scan.call_count)
+        self.assertEqual(
+            {"name": {"AttributeValueList": [{"S": u"level"}], "ComparisonOperator": "BEGINS_WITH"}},
+            m_scan.call_args[1]["scan_filter"])
+
+    @mock.patch("dynamodb_mapper.model.ConnectionBorg._get_connection")
+    def test_scan_segments_autoincrement(self, m_get_connection):
+        m_get_connection.return_value.scan.return_value = {"Items": [
+            {"id": {"N": str(MAGIC_KEY)}},
+            {"id": {"N": "1"}, "text": {"S": u"Hangar"}},
+        ]}
+
+        res = list(LogEntry.scan(segments=2, compact=True))
+
+        self.assertEqual([1, 1], [e.id for e in res])
+
+    @mock.patch("dynamodb_mapper.model.ConnectionBorg._get_connection")
+    def test_scan_segments_error(self, m_get_connection):
+        m_get_connection.return_value.scan.side_effect = DynamoDBResponseError(
+            400, "Bad Request", {"__type": "ProvisionedThroughputExceededException"})
+
+        self.assertRaises(DynamoDBResponseError, list, DoomEpisode.scan(segments=4))
+
+    def test_compact_record_pickle(self):
+        import pickle
+        record = DoomEpisode.compact_class()._from_db_dict({"id": 1, "name": u"Hangar"})
+
+        copy = pickle.loads(pickle.dumps(record, pickle.HIGHEST_PROTOCOL))
+
+        self.assertIsInstance(copy, DoomEpisode.compact_class())
+        self.assertEqual(1, copy.id)
+        self.assertEqual(u"Hangar", copy.name)
+        self.assertEqual({"id": 1, "name": u"Hangar"}, copy._raw_data)
+
     @mock.patch("dynamodb_mapper.model.boto")
     @mock.patch("dynamodb_mapper.model.Item")
     def test_delete_hash_key(self, m_item, m_boto):
@@ -1297,3 +2517,44 @@ class TestDynamoDBModel(unittest.TestCase):
         })
 
         self.assertEqual(d._raw_data, raw_data) #no change
+
+    @mock.patch("dynamodb_mapper.model.ConnectionBorg.get_table")
+    @mock.patch("dynamodb_mapper.model.Item")
+    def test_delete_conflict(self, m_item, m_get_table):
+        m_item.return_value.delete.side_effect = ConditionalCheckFailedException(400, "mock")
+        raw_data = {u"episode_id": 42, u"name": u"level super geek"}
+        d = DoomMap._from_db_dict(dict(raw_data))
+
+        self.assertRaises(ConflictError, d.delete, raise_on_conflict=True)
+        m_item.assert_called_once_with(m_get_table.return_value, 42, u"level super geek")
+        self.assertEqual(raw_data, d._raw_data) #no change
+
+    @mock.patch("dynamodb_mapper.model.ConnectionBorg.get_table")
+    @mock.patch("dynamodb_mapper.model.Item")
+    def test_delete_projection_roc(self, m_item, m_get_table):
+        p = DoomPlayer._get_row_factory(projection=frozenset(["id", "name"]))({"id": 1})
+
+        self.assertRaises(ProjectionError, p.delete, raise_on_conflict=True)
+        self.assertFalse(m_item.called)
+        self.assertEqual({"id": 1}, p._raw_data)
+
+        # without conflict detection, there is nothing to check
+        p.delete()
+        m_item.return_value.delete.assert_called_once_with(None)
+
+    @mock.patch("dynamodb_mapper.model.ConnectionBorg.get_table")
+    @mock.patch("dynamodb_mapper.model.Item")
+    def test_delete_projection_version_key_roc(self, m_item, m_get_table):
+        d = DoomCampaignVersioned._get_row_factory(projection=frozenset(["id", "version"]))(
+            {"id": 1, "version": 5})
+        d.delete(raise_on_conflict=True)
+
+        m_item.return_value.delete.assert_called_with({"version": 5})
+
+    @mock.patch("dynamodb_mapper.model.ConnectionBorg.get_table")
+    @mock.patch("dynamodb_mapper.model.Item")
+    def test_delete_version_key_roc(self, m_item, m_get_table):
+        d = DoomCampaignVersioned._from_db_dict({"id": 1, "name": u"Hangar", "version": 5})
+        d.delete(raise_on_conflict=True)
+
+        m_item.return_value.delete.assert_called_with({"version": 5})
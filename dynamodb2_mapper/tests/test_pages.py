@@ -0,0 +1,252 @@
+from __future__ import absolute_import
+
+import time
+import unittest
+import mock
+
+from dynamodb2_mapper.pages import (Page, Count, encode_cursor, decode_cursor,
+    fetch_query_page, query_pages, scan_pages, parallel_pages, prefetch_pages,
+    count_query, count_scan)
+
+
+def _segment_pages(segment, total_segments):
+    for page in xrange(3):
+        yield [(segment, page, i) for i in xrange(5)]
+
+
+def _failing_pages(segment, total_segments):
+    yield [segment]
+    raise KeyError(segment)
+
+
+class TestCursor(unittest.TestCase):
+    def test_roundtrip(self):
+        key = {"episode_id": {"N": "1"}, "name": {"S": u"Hangar \xe9"}}
+        cursor = encode_cursor(key)
+        self.assertIsInstance(cursor, str)
+        self.assertNotIn("=", cursor)
+        self.assertEqual(key, decode_cursor(cursor))
+        self.assertEqual(key, decode_cursor(unicode(cursor)))
+
+    def test_none(self):
+        self.assertIsNone(encode_cursor(None))
+        self.assertIsNone(encode_cursor({}))
+        self.assertIsNone(decode_cursor(None))
+
+    def test_invalid(self):
+        self.assertRaises(ValueError, decode_cursor, "not a cursor")
+        self.assertRaises(ValueError, decode_cursor, encode_cursor([1]))
+
+    def test_page(self):
+        page = Page([1, 2], "abc")
+        self.assertEqual([1, 2], list(page))
+        self.assertEqual(2, len(page))
+        self.assertEqual("abc", page.cursor)
+
+
+class TestQueryPage(unittest.TestCase):
+    def test_query_page(self):
+        m_connection = mock.Mock()
+        m_connection.query.return_value = {
+            "Items": [{"id": {"N": "1"}}],
+            "LastEvaluatedKey": {"id": {"N": "1"}},
+        }
+        key_conditions = {"id": {"AttributeValueList": [{"N": "1"}], "ComparisonOperator": "EQ"}}
+
+        items, last_key = fetch_query_page(
+            m_connection, "doom_map", key_conditions, consistent_read=True, reverse=True,
+            limit=10, exclusive_start_key={"id": {"N": "0"}})
+
+        self.assertEqual([{"id": 1}], items)
+        self.assertEqual({"id": {"N": "1"}}, last_key)
+        m_connection.query.assert_called_once_with(
+            "doom_map", key_conditions, exclusive_start_key={"id": {"N": "0"}},
+            consistent_read=True, scan_index_forward=False, limit=10)
+
+    def test_query_filter(self):
+        from boto.dynamodb import condition
+        m_connection = mock.Mock()
+        m_connection.query.return_value = {"Items": []}
+        query_filter = {
+            "name": condition.BEGINS_WITH(u"E1"),
+            "score": {"AttributeValueList": [{"N": "1"}], "ComparisonOperator": "GT"},
+        }
+
+        fetch_query_page(m_connection, "doom_map", {}, query_filter=query_filter)
+
+        m_connection.query.assert_called_once_with(
+            "doom_map", {}, exclusive_start_key=None, query_filter={
+                "name": {"AttributeValueList": [{"S": u"E1"}], "ComparisonOperator": "BEGINS_WITH"},
+                "score": {"AttributeValueList": [{"N": "1"}], "ComparisonOperator": "GT"},
+            })
+
+    def test_query_pages_limit(self):
+        m_connection = mock.Mock()
+        m_connection.query.side_effect = [
+            {"Items": [{"id": {"N": "1"}}, {"id": {"N": "2"}}],
+             "LastEvaluatedKey": {"id": {"N": "2"}}},
+            {"Items": [{"id": {"N": "3"}}], "LastEvaluatedKey": {"id": {"N": "3"}}},
+        ]
+
+        pages = list(query_pages(m_connection, "doom_map", {}, limit=3, index="by_name"))
+
+        self.assertEqual([[{"id": 1}, {"id": 2}], [{"id": 3}]], pages)
+        self.assertEqual([
+            mock.call("doom_map", {}, exclusive_start_key=None, limit=3, index_name="by_name"),
+            mock.call("doom_map", {}, exclusive_start_key={"id": {"N": "2"}}, limit=1,
+                      index_name="by_name"),
+        ], m_connection.query.call_args_list)
+
+    def test_query_pages_limit_filter(self):
+        m_connection = mock.Mock()
+        query_filter = {"score": {"AttributeValueList": [{"N": "1"}], "ComparisonOperator": "GT"}}
+        m_connection.query.side_effect = [
+            {"Items": [{"id": {"N": "1"}}], "LastEvaluatedKey": {"id": {"N": "4"}}},
+            {"Items": [{"id": {"N": "5"}}, {"id": {"N": "6"}}],
+             "LastEvaluatedKey": {"id": {"N": "6"}}},
+        ]
+
+        pages = list(query_pages(m_connection, "doom_map", {}, limit=2,
+                                 query_filter=query_filter))
+
+        # the limit bounds the filtered items, it is not sent to DynamoDB
+        self.assertEqual([[{"id": 1}], [{"id": 5}]], pages)
+        self.assertEqual([
+            mock.call("doom_map", {}, exclusive_start_key=None, query_filter=query_filter),
+            mock.call("doom_map", {}, exclusive_start_key={"id": {"N": "4"}},
+                      query_filter=query_filter),
+        ], m_connection.query.call_args_list)
+
+
+class TestCount(unittest.TestCase):
+    def test_sum(self):
+        count = Count.sum([Count(1, 2, 0.5), Count(3, 4, None), Count(5, 6, 1.5)])
+        self.assertEqual(9, count)
+        self.assertEqual(12, count.scanned_count)
+        self.assertEqual(2.0, count.consumed_capacity)
+        self.assertIsNone(Count.sum([Count(1), Count(2)]).consumed_capacity)
+
+    def test_count_scan(self):
+        m_connection = mock.Mock()
+        m_connection.scan.side_effect = [
+            {"Count": 10, "ScannedCount": 20, "ConsumedCapacity": {"CapacityUnits": 2.5},
+             "LastEvaluatedKey": {"id": {"N": "1"}}},
+            {"Count": 5, "ScannedCount": 5, "ConsumedCapacity": {"CapacityUnits": 0.5}},
+        ]
+
+        count = count_scan(m_connection, "doom_episode", segment=0, total_segments=2)
+
+        self.assertEqual(15, count)
+        self.assertEqual(25, count.scanned_count)
+        self.assertEqual(3.0, count.consumed_capacity)
+        m_connection.scan.assert_called_with(
+            "doom_episode", select="COUNT", return_consumed_capacity="TOTAL",
+            exclusive_start_key={"id": {"N": "1"}}, segment=0, total_segments=2)
+
+    def test_count_query(self):
+        m_connection = mock.Mock()
+        m_connection.query.return_value = {"Count": 3, "ScannedCount": 3}
+
+        count = count_query(m_connection, "doom_map", {}, consistent_read=True)
+
+        self.assertEqual(3, count)
+        self.assertIsNone(count.consumed_capacity)
+        m_connection.query.assert_called_once_with(
+            "doom_map", select="COUNT", return_consumed_capacity="TOTAL",
+            exclusive_start_key=None, key_conditions={}, consistent_read=True)
+
+
+class TestScanPages(unittest.TestCase):
+    def test_pages(self):
+        m_connection = mock.Mock()
+        m_connection.scan.side_effect = [
+            {"Items": [{"id": {"N": "1"}}], "LastEvaluatedKey": {"id": {"N": "1"}}},
+            {"Items": [{"id": {"N": "2"}}, {"id": {"N": "3"}}]},
+        ]
+
+        pages = list(scan_pages(m_connection, "doom_episode", segment=1, total_segments=4))
+
+        self.assertEqual([[{"id": 1}], [{"id": 2}, {"id": 3}]], pages)
+        self.assertEqual([
+            mock.call("doom_episode", exclusive_start_key=None, segment=1, total_segments=4),
+            mock.call("doom_episode", exclusive_start_key={"id": {"N": "1"}},
+                      segment=1, total_segments=4),
+        ], m_connection.scan.call_args_list)
+
+
+class TestPrefetchPages(unittest.TestCase):
+    def _wait_for(self, predicate):
+        deadline = time.time() + 5
+        while not predicate():
+            self.assertLess(time.time(), deadline)
+            time.sleep(0.001)
+
+    def test_prefetch(self):
+        fetched = []
+        def pages():
+            for page in xrange(10):
+                fetched.append(page)
+                yield [page]
+
+        prefetched = prefetch_pages(pages(), 2)
+        self.assertEqual([0], next(prefetched))
+        # 2 pages waiting, the next one blocked until there is room
+        self._wait_for(lambda: len(fetched) == 4)
+        time.sleep(0.01)
+        self.assertEqual(4, len(fetched))
+
+        self.assertEqual([[page] for page in xrange(1, 10)], list(prefetched))
+
+    def test_error(self):
+        def pages():
+            yield [1]
+            raise KeyError(1)
+
+        prefetched = prefetch_pages(pages(), 3)
+        self.assertEqual([1], next(prefetched))
+        self.assertRaises(KeyError, next, prefetched)
+
+    def test_close(self):
+        fetched = []
+        def pages():
+            for page in xrange(100):
+                fetched.append(page)
+                yield [page]
+
+        prefetched = prefetch_pages(pages(), 1)
+        next(prefetched)
+        prefetched.close()
+        time.sleep(0.2)
+        self.assertLess(len(fetched), 5)
+
+
+class TestParallelPages(unittest.TestCase):
+    def _check(self, processes):
+        tasks = [(segment, 8) for segment in xrange(8)]
+        rows = [row for page in parallel_pages(_segment_pages, tasks, 3, processes)
+                for row in page]
+        self.assertEqual(
+            sorted((s, p, i) for s in xrange(8) for p in xrange(3) for i in xrange(5)),
+            sorted(rows))
+
+    def test_threads(self):
+        self._check(False)
+
+    def test_processes(self):
+        self._check(True)
+
+    def test_error(self):
+        tasks = [(segment, 8) for segment in xrange(8)]
+        for processes in (False, True):
+            self.assertRaises(
+                KeyError, list, parallel_pages(_failing_pages, tasks, 3, processes))
+
+    def test_initializer(self):
+        m_initializer = mock.Mock()
+        list(parallel_pages(_segment_pages, [(0, 2), (1, 2)], 2, initializer=m_initializer))
+        self.assertEqual(2, m_initializer.call_count)
+
+    def test_close(self):
+        pages = parallel_pages(_segment_pages, [(s, 8) for s in xrange(8)], 2)
+        next(pages)
+        pages.close()
@@ -0,0 +1,55 @@
+from __future__ import absolute_import
+
+import threading
+import unittest
+
+from dynamodb2_mapper.session import Session, get_session
+
+
+class Player(object):
+    pass
+
+
+class Monster(object):
+    pass
+
+
+class TestSession(unittest.TestCase):
+    def test_context(self):
+        self.assertIsNone(get_session())
+        with Session() as outer:
+            self.assertIs(outer, get_session())
+            with Session() as inner:
+                self.assertIs(inner, get_session())
+            self.assertIs(outer, get_session())
+        self.assertIsNone(get_session())
+
+    def test_thread_local(self):
+        seen = []
+        thread = threading.Thread(target=lambda: seen.append(get_session()))
+        with Session():
+            thread.start()
+            thread.join()
+        self.assertEqual([None], seen)
+
+    def test_get_add_discard(self):
+        session = Session()
+        player = Player()
+        identity = ("player", 1, None)
+
+        self.assertIsNone(session.get(Player, identity))
+        session.add(identity, player)
+        self.assertIs(player, session.get(Player, identity))
+        # same table, other model
+        self.assertIsNone(session.get(Monster, identity))
+        self.assertEqual(1, session.hits)
+        self.assertEqual(2, session.misses)
+
+        session.discard(identity)
+        session.discard(identity)
+        self.assertEqual(0, len(session))
+
+        session.add(identity, player)
+        session.clear()
+        self.assertIsNone(session.get(Player, identity))
+        self.assertEqual(3, session.misses)
@@ -0,0 +1,82 @@
+from __future__ import absolute_import
+
+import unittest
+
+import mock
+
+from boto.dynamodb2.exceptions import ProvisionedThroughputExceededException
+
+from dynamodb2_mapper.exceptions import MaxRetriesExceededError
+from dynamodb2_mapper.throttle import Throttle, MAX_THROTTLED_RETRIES
+
+
+class _Clock(object):
+    """Fake time, advanced by sleeps"""
+    def __init__(self):
+        self.now = 1000.0
+        self.sleeps = []
+
+    def time(self):
+        return self.now
+
+    def sleep(self, delay):
+        self.sleeps.append(delay)
+        self.now += delay
+
+
+class TestThrottle(unittest.TestCase):
+    def setUp(self):
+        self.clock = _Clock()
+        patcher = mock.patch("dynamodb2_mapper.throttle.time", self.clock)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_invalid_rate(self):
+        self.assertRaises(ValueError, Throttle, 0)
+
+    def test_pacing(self):
+        throttle = Throttle(10)
+
+        # the bucket starts full: no wait
+        throttle.wait()
+        throttle.consume(30)
+        self.assertEqual([], self.clock.sleeps)
+
+        # 20 units of debt at 10 units/s
+        throttle.wait()
+        self.assertEqual([2.0], self.clock.sleeps)
+
+        # idle time pays for later requests, up to the burst
+        throttle.consume(5)
+        self.clock.now += 60
+        throttle.consume(25)
+        throttle.wait()
+        self.assertEqual([2.0, 1.5], self.clock.sleeps)
+        self.assertEqual(60, throttle.consumed)
+
+    def test_request(self):
+        throttle = Throttle(4)
+        send = mock.Mock(return_value={"Items": [], "ConsumedCapacity": {"CapacityUnits": 12.0}})
+
+        self.assertEqual(send.return_value, throttle.request(send, "table", limit=3))
+        throttle.request(send, "table", limit=3)
+
+        send.assert_called_with("table", limit=3, return_consumed_capacity="TOTAL")
+        self.assertEqual([2.0], self.clock.sleeps)
+        self.assertEqual(24, throttle.consumed)
+
+    @mock.patch("dynamodb2_mapper.throttle.backoff")
+    def test_request_throughput_exceeded(self, m_backoff):
+        error = ProvisionedThroughputExceededException(400, "Bad Request")
+        send = mock.Mock(side_effect=[error, error, {"Items": []}])
+
+        self.assertEqual({"Items": []}, Throttle(10).request(send))
+
+        self.assertEqual([mock.call(0), mock.call(1)], m_backoff.call_args_list)
+
+    @mock.patch("dynamodb2_mapper.throttle.backoff")
+    def test_request_max_retries(self, m_backoff):
+        send = mock.Mock(side_effect=ProvisionedThroughputExceededException(400, "Bad Request"))
+
+        self.assertRaises(MaxRetriesExceededError, Throttle(10).request, send)
+        self.assertEqual(MAX_THROTTLED_RETRIES, send.call_count)
@@ -33,6 +33,31 @@ class Reward(DynamoDBModel):
         'collected': bool,
     }
 
+class VersionedUser(DynamoDBModel):
+    __table__ = "versioned_user"
+    __hash_key__ = "id"
+    __version_key__ = "version"
+    __schema__ = {
+        "id": unicode,
+        "energy": int,
+        "version": int,
+    }
+
+class VersionedUserEnergyTransaction(Transaction):
+    """Same as UserEnergyTransaction, on a target with a version key"""
+    __table__ = "energyTransaction"
+    __hash_key__ = "user_id"
+    __schema__ = {
+        u"user_id": int,
+        u"datetime": datetime,
+        u"energy": int,
+    }
+    def _get_target(self):
+        return VersionedUser.get(self.user_id)
+
+    def _alter_target(self, target):
+        target.energy += self.energy
+
 class InsufficientEnergyError(Exception):
     """Raised when a transaction would make a User's energy negative."""
     pass
@@ -263,3 +288,19 @@ class TestTransaction(unittest.TestCase):
 
         m_energy_commit.assert_called()
 
+    @mock.patch("dynamodb_mapper.transactions.Transaction.save")
+    @mock.patch("dynamodb_mapper.model.ConnectionBorg.get_table")
+    @mock.patch("dynamodb_mapper.model.Item")
+    @mock.patch.object(VersionedUser, "get")
+    def test_versioned_target(self, m_user_get, m_item, m_get_table, m_transaction_save):
+        m_user_get.return_value = VersionedUser._from_db_dict(
+            {"id": USER_ID, "energy": ENERGY, "version": 7})
+
+        t = VersionedUserEnergyTransaction(user_id=USER_ID, energy=-ENERGY)
+        t.commit()
+
+        # only the version is checked, and it is bumped
+        m_item.assert_called_once_with(
+            mock.ANY, attrs={"id": unicode(USER_ID), "energy": 0, "version": 8})
+        m_item.return_value.put.assert_called_once_with({"version": 7})
+        self.assertEqual(t.status, "done")
@@ -0,0 +1,94 @@
+"""Pacing of the requests of long running reads, such as maintenance scans,
+so that they leave enough capacity to the live traffic of the table.
+
+A :py:class:`Throttle` is a token bucket filled with ``rate`` capacity units
+per second. Each request waits for the bucket to hold tokens, then pays for
+the capacity DynamoDB reports it consumed (``ReturnConsumedCapacity``). The
+bucket may go into debt: a 1MB scan page costs 128 units whatever the rate,
+the next request then waits for the debt to be paid back.
+
+Requests rejected because the table's capacity is exceeded anyway are sent
+again with an exponential backoff.
+"""
+from __future__ import absolute_import
+
+import logging
+import time
+
+from boto.dynamodb2.exceptions import ProvisionedThroughputExceededException
+
+from dynamodb2_mapper.batch import backoff
+from dynamodb2_mapper.exceptions import MaxRetriesExceededError
+
+
+log = logging.getLogger(__name__)
+
+#: Maximum number of attempts of a request rejected by throughput errors
+MAX_THROTTLED_RETRIES = 10
+
+
+class Throttle(object):
+    """Token bucket pacing requests to consume ``rate`` capacity units per
+    second on average. Not thread safe: give each thread its own throttle
+    and its share of the rate.
+
+    :param rate: capacity units per second
+    :param burst: capacity units which may be accumulated while no request is
+        sent. Defaults to one second worth of ``rate``.
+    """
+    def __init__(self, rate, burst=None):
+        if rate <= 0:
+            raise ValueError("Throttle rate must be positive, got {!r}".format(rate))
+        self.rate = float(rate)
+        self.burst = float(burst if burst is not None else rate)
+        self.consumed = 0.0
+        self._tokens = self.burst
+        self._last = time.time()
+
+    def _refill(self):
+        now = time.time()
+        self._tokens = min(self.burst, self._tokens + (now - self._last) * self.rate)
+        self._last = now
+
+    def wait(self):
+        """Block until the bucket is out of debt."""
+        self._refill()
+        if self._tokens < 0:
+            delay = -self._tokens / self.rate
+            log.debug("Throttled for %.2fs", delay)
+            time.sleep(delay)
+            self._refill()
+
+    def consume(self, units):
+        """Pay for ``units`` consumed capacity units."""
+        self._refill()
+        self._tokens -= units
+        self.consumed += units
+
+    def request(self, send, *args, **kwargs):
+        """Call ``send(*args, **kwargs)``, a low level request, once the
+        bucket allows it, asking DynamoDB for the consumed capacity.
+
+        :return: the response of the request
+
+        :raises MaxRetriesExceededError: when the request is still rejected
+            for exceeding the table's throughput after
+            :py:data:`MAX_THROTTLED_RETRIES` attempts
+        """
+        kwargs["return_consumed_capacity"] = "TOTAL"
+        for attempt in xrange(MAX_THROTTLED_RETRIES):
+            if attempt:
+                backoff(attempt - 1)
+            self.wait()
+            try:
+                response = send(*args, **kwargs)
+            except ProvisionedThroughputExceededException:
+                log.debug("Throughput exceeded, attempt %d", attempt + 1)
+                continue
+            capacity = response.get("ConsumedCapacity")
+            if capacity:
+                self.consume(capacity.get("CapacityUnits", 0))
+            return response
+
+        raise MaxRetriesExceededError(
+            "Request still throttled after {} attempts".format(MAX_THROTTLED_RETRIES))
@@ -116,7 +116,8 @@ class Transaction(DynamoDBModel):
         raising :exc:`ConflictError`.
 
         Will succeed iff no attributes of the object returned by getter has been
-        modified before our save method to prevent accidental overwrites.
+        modified before our save method to prevent accidental overwrites. When
+        the target declares a ``__version_key__``, only its version is checked.
 
         :param getter: getter as defined in :py:meth:`_get_transactors`
         :param setter: setter as defined in :py:meth:`_get_transactors`
@@ -234,7 +235,7 @@ class Transaction(DynamoDBModel):
                 # or if it failed partway through.
                 self._retry(self._assign_datetime_and_save, OverwriteError)
 
-    def save(self, raise_on_conflict=True):
+    def save(self, raise_on_conflict=True, partial=None):
         """If the transaction is transient (``transient = True``),
         do nothing.
 
@@ -249,5 +250,5 @@ class Transaction(DynamoDBModel):
                 "class=%s: Transient transaction, ignoring save attempt.",
                 type(self))
         else:
-            super(Transaction, self).save(raise_on_conflict=raise_on_conflict)
+            super(Transaction, self).save(raise_on_conflict=raise_on_conflict, partial=partial)
 